@@ -7,7 +7,7 @@ from django.contrib import messages
 from django.contrib.auth import authenticate, login
 from django.contrib.auth import logout
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
-from django.core.mail import send_mail
+from core.jobs import send_email
 from django.urls import reverse
 from django.utils.encoding import force_bytes, force_str
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
@@ -49,7 +49,7 @@ def register(request):
                 reverse("accounts:verify_email")
             ) + f"?token={str(token)}"
 
-            send_mail(
+            send_email.enqueue(
                 subject="Verify your email - YourStore",
                 message=f"Welcome to YourStore!\n\nClick to verify: {verify_link}\n\nThis link expires in 1 hour.",
                 from_email=settings.DEFAULT_FROM_EMAIL,
@@ -146,7 +146,7 @@ def password_reset_request(request):
             token = token_generator.make_token(user)
             # uri_path = "{% url 'accounts:reset_password' %}"
             reset_link = request.build_absolute_uri(f"/accounts/reset/{uid}/{token}/")
-            send_mail(
+            send_email.enqueue(
                 "Password Reset",
                 f"Click here to reset your password: {reset_link}",
                 "support@yourstore.com",
@@ -222,12 +222,11 @@ def contact(request):
 
             full_message = f"From: {name} <{email}>\n\n{message}"
 
-            send_mail(
+            send_email.enqueue(
                 subject,
                 full_message,
                 settings.EMAIL_HOST_USER,   # from
                 [settings.EMAIL_HOST_USER], # to
-                fail_silently=False,
             )
             return render(request, "accounts/contact_success.html", {"name": name})
     else:
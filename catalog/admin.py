@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Product, Category, ProductImage, CategoryImage
+from .search import search_products
 
 class CategoryImageInline(admin.TabularInline):  # or admin.StackedInline
     model = CategoryImage
@@ -18,6 +19,12 @@ class ProductAdmin(admin.ModelAdmin):
     prepopulated_fields = {"slug": ("title",)}
     inlines = [ProductImageInline]
 
+    def get_search_results(self, request, queryset, search_term):
+        # Use the full-text index instead of LIKE scans over search_fields
+        if not search_term:
+            return queryset, False
+        return search_products(search_term, queryset), False
+
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
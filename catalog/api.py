@@ -0,0 +1,83 @@
+"""
+Read-only JSON API for the catalog, used by the mobile frontend.
+
+    GET /catalog/api/products/?category=phones&price=5000-10000&fields=id,title,price
+    GET /catalog/api/products/<slug>/
+    GET /catalog/api/categories/
+
+Lists are cursor-paginated. Every response carries an ETag and Last-Modified
+derived from the shared catalog version (catalog.versions), so clients that
+revalidate get a 304 without the catalog tables being touched.
+"""
+
+import hashlib
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from rest_framework import viewsets
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import AllowAny
+from . import versions
+from .facets import apply_filters
+from .models import Product, Category
+from .serializers import ProductSerializer, CategorySerializer, requested_fields
+
+
+def catalog_etag(request, *args, **kwargs):
+    # The path carries the cursor, filters and ?fields=; Accept separates JSON from the browsable API
+    key = f"{versions.current()['version']}:{request.get_full_path()}:{request.headers.get('Accept', '')}"
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def catalog_last_modified(request, *args, **kwargs):
+    return versions.current()["modified"]
+
+
+conditional = method_decorator(condition(etag_func=catalog_etag, last_modified_func=catalog_last_modified), name="dispatch")
+
+
+class ProductCursorPagination(CursorPagination):
+    ordering = ("-created_at", "-id")
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class CategoryCursorPagination(CursorPagination):
+    ordering = "name"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+
+def _wants(request, field):
+    fields = requested_fields(request)
+    return fields is None or field in fields
+
+
+@conditional
+class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = ProductSerializer
+    pagination_class = ProductCursorPagination
+    permission_classes = [AllowAny]
+    lookup_field = "slug"
+
+    def get_queryset(self):
+        products = Product.objects.filter(is_active=True).select_related("category", "primary_image")
+        if _wants(self.request, "images"):
+            products = products.prefetch_related("images")
+        products, _ = apply_filters(products, self.request.query_params)
+        return products
+
+
+@conditional
+class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = CategorySerializer
+    pagination_class = CategoryCursorPagination
+    permission_classes = [AllowAny]
+    lookup_field = "slug"
+
+    def get_queryset(self):
+        categories = Category.objects.all()
+        if _wants(self.request, "images"):
+            categories = categories.prefetch_related("images")
+        return categories
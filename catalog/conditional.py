@@ -0,0 +1,65 @@
+"""
+Conditional GET (ETag / Last-Modified) for the HTML catalog pages.
+
+Each page supplies a validator returning the ``(id, updated_at)`` rows of the
+objects it shows, or a cheaper marker that changes with them (listings use
+the shop.cache catalog generations). The
+ETag hashes those together with the request path and the per-visitor parts of
+the layout: the logged-in user, the cart badge, the CSRF cookie the forms were
+rendered for, and pending flash messages. A matching If-None-Match gets a 304
+after the validator's few narrow queries, without running the view or the
+template engine.
+
+Last-Modified is only sent for pages that aren't personalised (anonymous
+visitor, empty cart), since it can't reflect changes to the visitor's own state.
+"""
+
+import hashlib
+from django.conf import settings
+from django.views.decorators.http import condition
+from orders.cart import Cart
+
+
+def versions(queryset):
+    """``(id, updated_at)`` of every object in ``queryset``: the cheap part of a page validator."""
+    return list(queryset.values_list("id", "updated_at"))
+
+
+def latest(*row_lists):
+    """Most recent ``updated_at`` across ``versions()`` results (None when there are no rows)."""
+    return max((updated_at for rows in row_lists for _, updated_at in rows), default=None)
+
+
+def _visitor(request):
+    user = request.user.pk if request.user.is_authenticated else None
+    return [
+        user,
+        Cart.count(request),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME),
+        request.COOKIES.get("messages"),  # CookieStorage's cookie
+    ]
+
+
+def conditional_page(validator):
+    """
+    ``condition()`` driven by ``validator(request, *args, **kwargs)``, which
+    returns ``(parts, last_modified)``; ``parts`` is anything repr()-able that
+    changes whenever the rendered page would.
+    """
+
+    def compute(request, *args, **kwargs):
+        if not hasattr(request, "_page_validator"):
+            parts, last_modified = validator(request, *args, **kwargs)
+            visitor = _visitor(request)
+            key = repr([request.get_full_path(), visitor, parts])
+            personalised = visitor[0] is not None or visitor[1]
+            request._page_validator = (
+                hashlib.md5(key.encode()).hexdigest(),
+                None if personalised else last_modified,
+            )
+        return request._page_validator
+
+    return condition(
+        etag_func=lambda request, *args, **kwargs: compute(request, *args, **kwargs)[0],
+        last_modified_func=lambda request, *args, **kwargs: compute(request, *args, **kwargs)[1],
+    )
@@ -0,0 +1,224 @@
+"""
+Faceted filtering for catalog listings.
+
+Facet counts ("Phones (312)", "₦5k–₦10k (88)") for the unfiltered catalog are
+read from the FacetCount table instead of being counted per request; pages
+narrowed by a category, a facet or a search query count their own matches
+(scoped_counts). The table is adjusted by +1/-1
+from the Product signals as rows are created, edited or deleted, and can be
+recomputed from scratch with ``manage.py rebuild_facets``. Reads go through
+shop.cache, keyed on the product and category generations.
+
+Category and price counts cover active products only; the status facet
+counts every product.
+"""
+
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, F, Q
+from shop import cache
+from .models import Category, FacetCount, Product
+
+# (key, label, lower bound inclusive, upper bound exclusive)
+PRICE_BUCKETS = [
+    ("0-5000", "Under ₦5k", None, Decimal("5000")),
+    ("5000-10000", "₦5k–₦10k", Decimal("5000"), Decimal("10000")),
+    ("10000-50000", "₦10k–₦50k", Decimal("10000"), Decimal("50000")),
+    ("50000-100000", "₦50k–₦100k", Decimal("50000"), Decimal("100000")),
+    ("100000-", "₦100k+", Decimal("100000"), None),
+]
+STATUS_OPTIONS = [("1", "Active"), ("0", "Inactive")]
+
+_BUCKETS_BY_KEY = {bucket[0]: bucket for bucket in PRICE_BUCKETS}
+
+
+def price_bucket(price):
+    price = Decimal(str(price))
+    for key, _, low, high in PRICE_BUCKETS:
+        if (low is None or price >= low) and (high is None or price < high):
+            return key
+    return None
+
+
+def _price_q(bucket):
+    _, _, low, high = bucket
+    q = Q()
+    if low is not None:
+        q &= Q(price__gte=low)
+    if high is not None:
+        q &= Q(price__lt=high)
+    return q
+
+
+def _values(category_id, price, is_active):
+    values = {("active", "1" if is_active else "0")}
+    if is_active:
+        values.add(("category", str(category_id)))
+        values.add(("price", price_bucket(price)))
+    return values
+
+
+def facet_values(product):
+    """The set of (facet, value) pairs a product contributes a count to."""
+    return _values(product.category_id, product.price, product.is_active)
+
+
+# --- incremental maintenance (called from catalog.signals) ---
+
+def stored_values(product):
+    """
+    What the product's stored row counts towards: as of its last save here, else as
+    loaded (Product.from_db keeps the fields), else None.
+    """
+    if hasattr(product, "_facet_values"):
+        return product._facet_values
+    row = getattr(product, "_facet_row", None)
+    return _values(*row) if row else None
+
+
+def snapshot_from_db(product):
+    """Fallback for instances that were loaded with facet fields deferred."""
+    original = Product.objects.filter(pk=product.pk).only(*Product.FACET_FIELDS).first()
+    product._facet_values = facet_values(original) if original else set()
+
+
+def _adjust(pairs, delta):
+    for facet, value in pairs:
+        rows = FacetCount.objects.filter(facet=facet, value=value)
+        if not rows.update(count=F("count") + delta):
+            # First count for this value: create the row at zero (get_or_create tolerates a
+            # concurrent insert) and apply the delta in the database like any other writer
+            FacetCount.objects.get_or_create(facet=facet, value=value)
+            rows.update(count=F("count") + delta)
+
+
+def record_save(product, created):
+    old = set() if created else stored_values(product) or set()
+    new = facet_values(product)
+    with transaction.atomic():
+        _adjust(old - new, -1)
+        _adjust(new - old, +1)
+    product._facet_values = new
+
+
+def record_delete(product):
+    _adjust(stored_values(product) or facet_values(product), -1)
+
+
+def apply_deltas(deltas):
+    """Apply a ``{(facet, value): delta}`` mapping, e.g. accumulated by a bulk import that bypasses signals."""
+    with transaction.atomic():
+        for pair, delta in deltas.items():
+            if delta:
+                _adjust([pair], delta)
+
+
+def rebuild_facet_counts():
+    """Recompute the whole FacetCount table from the Product table."""
+    rows = []
+    active = Product.objects.filter(is_active=True)
+    for category_id, n in active.values_list("category_id").annotate(n=Count("id")).order_by():
+        rows.append(FacetCount(facet="category", value=str(category_id), count=n))
+    price_counts = active.aggregate(**{b[0]: Count("id", filter=_price_q(b)) for b in PRICE_BUCKETS})
+    rows += [FacetCount(facet="price", value=key, count=n) for key, n in price_counts.items()]
+    for is_active, n in Product.objects.values_list("is_active").annotate(n=Count("id")).order_by():
+        rows.append(FacetCount(facet="active", value="1" if is_active else "0", count=n))
+    with transaction.atomic():
+        FacetCount.objects.all().delete()
+        FacetCount.objects.bulk_create(rows)
+    cache.bump("product")
+    return len(rows)
+
+
+# --- reading counts ---
+
+def precomputed_counts():
+    """All catalog-wide facet counts: {(facet, value): count}."""
+    return cache.catalog_get_or_set("facet-counts", lambda: {
+        (facet, value): count for facet, value, count in FacetCount.objects.values_list("facet", "value", "count")
+    })
+
+
+def scoped_counts(queryset):
+    """
+    Facet counts restricted to ``queryset`` (e.g. search results), computed
+    with one grouped query plus one conditional aggregate.
+    """
+    products = Product.objects.filter(pk__in=queryset.values("pk"))
+    counts = {
+        ("category", str(category_id)): n
+        for category_id, n in products.filter(is_active=True).values_list("category_id").annotate(n=Count("id")).order_by()
+    }
+    aggregates = {f"price_{b[0]}": Count("id", filter=Q(is_active=True) & _price_q(b)) for b in PRICE_BUCKETS}
+    aggregates.update(active_1=Count("id", filter=Q(is_active=True)), active_0=Count("id", filter=Q(is_active=False)))
+    for name, n in products.aggregate(**aggregates).items():
+        facet, _, value = name.partition("_")
+        counts[(facet, value)] = n
+    return counts
+
+
+# --- filtering ---
+
+def apply_filters(queryset, params):
+    """Filter ``queryset`` by the facet GET parameters; returns (queryset, selected values)."""
+    selected = {}
+    slug = params.get("category")
+    if slug:
+        queryset = queryset.filter(category__slug=slug)
+        selected["category"] = slug
+    bucket = _BUCKETS_BY_KEY.get(params.get("price"))
+    if bucket:
+        queryset = queryset.filter(_price_q(bucket))
+        selected["price"] = bucket[0]
+    if params.get("active") in ("1", "0"):
+        queryset = queryset.filter(is_active=params["active"] == "1")
+        selected["active"] = params["active"]
+    return queryset, selected
+
+
+def _option(params, name, value, label, count, selected):
+    is_selected = selected.get(name) == value
+    query = params.copy()
+    # Clicking a selected option clears it; any change restarts paging
+    for key in (name, "cursor", "page"):
+        query.pop(key, None)
+    if not is_selected:
+        query[name] = value
+    return {
+        "value": value,
+        "label": label,
+        "count": count,
+        "selected": is_selected,
+        "query": "?" + query.urlencode(),
+    }
+
+
+def facet_groups(params, selected, counts):
+    """Template-ready facet groups with per-option counts and links built from the request's ``params``."""
+    categories = cache.catalog_get_or_set(
+        "facet-categories", lambda: list(Category.objects.order_by("name").values_list("id", "slug", "name"))
+    )
+    category_options = [
+        _option(params, "category", slug, name, counts.get(("category", str(pk)), 0), selected)
+        for pk, slug, name in categories
+    ]
+    return [
+        {
+            "label": "Category",
+            "options": [o for o in category_options if o["count"] or o["selected"]],
+        },
+        {
+            "label": "Price",
+            "options": [
+                _option(params, "price", key, label, counts.get(("price", key), 0), selected)
+                for key, label, _, _ in PRICE_BUCKETS
+            ],
+        },
+        {
+            "label": "Status",
+            "options": [
+                _option(params, "active", value, label, counts.get(("active", value), 0), selected)
+                for value, label in STATUS_OPTIONS
+            ],
+        },
+    ]
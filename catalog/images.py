@@ -0,0 +1,111 @@
+"""
+Responsive image variants for ProductImage and CategoryImage.
+
+When an image is saved, a job (catalog.jobs) is queued to generate
+fixed-width WebP and JPEG copies, so the admin request that uploaded the
+file never waits on Pillow. The widths that were produced are
+recorded on the instance (``variants``) and the ``responsive_image`` template
+tag turns them into ``srcset``/``sizes`` markup.
+
+Variant files live next to the originals under ``variants/``:
+    product_images/shoe.png -> variants/product_images/shoe-400w.webp
+"""
+
+import io
+import posixpath
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps
+from . import versions
+
+VARIANT_WIDTHS = (200, 400, 800, 1200)
+VARIANT_FORMATS = {
+    # format: (extension, Pillow save options)
+    "webp": ("webp", {"quality": 80, "method": 4}),
+    "jpeg": ("jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def variant_name(name, width, fmt):
+    """Storage path of the ``width``-pixel ``fmt`` variant of the original file ``name``."""
+    stem, _ = posixpath.splitext(name)
+    return f"variants/{stem}-{width}w.{VARIANT_FORMATS[fmt][0]}"
+
+
+def render_variants(name, storage=None):
+    """
+    Write every variant of the stored image ``name`` and return the widths produced.
+
+    Widths larger than the original are skipped (no upscaling); if the original
+    is narrower than every width, one variant is made at its native width.
+    """
+    storage = storage or default_storage
+    with storage.open(name, "rb") as f:
+        original = Image.open(f)
+        original = ImageOps.exif_transpose(original)
+        original.load()
+
+    widths = [w for w in VARIANT_WIDTHS if w <= original.width] or [original.width]
+    for width in widths:
+        height = max(1, round(original.height * width / original.width))
+        resized = original.resize((width, height), Image.LANCZOS)
+        for fmt, (_, options) in VARIANT_FORMATS.items():
+            image = resized
+            if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+                # JPEG has no alpha channel: flatten onto white
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                background.paste(image, mask=image.convert("RGBA").getchannel("A"))
+                image = background
+            buffer = io.BytesIO()
+            image.save(buffer, fmt.upper(), **options)
+            path = variant_name(name, width, fmt)
+            if storage.exists(path):
+                storage.delete(path)
+            storage.save(path, ContentFile(buffer.getvalue()))
+    return widths
+
+
+def delete_variants(name, storage=None):
+    storage = storage or default_storage
+    for width in VARIANT_WIDTHS:
+        for fmt in VARIANT_FORMATS:
+            path = variant_name(name, width, fmt)
+            if storage.exists(path):
+                storage.delete(path)
+
+
+def needs_variants(instance):
+    return bool(instance.image) and instance.variants.get("source") != instance.image.name
+
+
+def process_image(model_label, pk):
+    """Generate variants for one image instance and record them on the row."""
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not instance.image:
+        return
+    # Errors propagate: the job queue retries, then keeps the failed job for the admin
+    widths = render_variants(instance.image.name)
+    # update() rather than save() so this doesn't re-trigger the post_save signal
+    model.objects.filter(pk=pk).update(variants={"source": instance.image.name, "widths": widths})
+    touch_owner(instance)
+    # Runs in a worker, outside any transaction: tell cached views directly
+    versions.committed("product" if hasattr(instance, "product_id") else "category")
+
+
+def touch_owner(instance):
+    """Bump ``updated_at`` on the product or category an image belongs to, so cached pages revalidate."""
+    owner = instance._meta.get_field("product" if hasattr(instance, "product_id") else "category")
+    owner.related_model.objects.filter(pk=getattr(instance, owner.attname)).update(updated_at=timezone.now())
+
+
+def srcset(instance, fmt):
+    """``srcset`` attribute value for an image's ``fmt`` variants ('' when none exist yet)."""
+    if not instance.image or instance.variants.get("source") != instance.image.name:
+        return ""
+    return ", ".join(
+        f"{default_storage.url(variant_name(instance.image.name, width, fmt))} {width}w"
+        for width in instance.variants.get("widths", [])
+    )
@@ -0,0 +1,14 @@
+from jobs.queue import job
+from . import images
+
+
+@job()
+def render_image_variants(model_label, pk):
+    """Write the responsive variants of one saved image and record them on its row; queued by catalog.signals."""
+    images.process_image(model_label, pk)
+
+
+@job()
+def remove_image_variants(name):
+    """Delete the variant files of a deleted image's original ``name``."""
+    images.delete_variants(name)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef, Subquery
+from catalog.models import Product, ProductImage
+
+
+class Command(BaseCommand):
+    help = "Set Product.primary_image for products that have images but no primary image yet."
+
+    def handle(self, *args, **options):
+        images = ProductImage.objects.filter(product=OuterRef("pk"))
+        updated = Product.objects.filter(Exists(images), primary_image__isnull=True).update(
+            primary_image=Subquery(images.order_by("id").values("id")[:1])
+        )
+        self.stdout.write(self.style.SUCCESS(f"Updated {updated} products."))
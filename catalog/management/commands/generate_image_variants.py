@@ -0,0 +1,57 @@
+import os
+import time
+import django
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.core.management.base import BaseCommand
+from catalog.models import ProductImage, CategoryImage
+from catalog.images import render_variants, needs_variants
+
+
+def _init_worker():
+    # Needed when the platform spawns (rather than forks) worker processes
+    django.setup()
+
+
+def _render(name):
+    try:
+        return name, render_variants(name), None
+    except Exception as e:
+        return name, None, str(e)
+
+
+class Command(BaseCommand):
+    help = "Generate responsive WebP/JPEG variants for existing product and category images."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="Number of worker processes.")
+        parser.add_argument("--force", action="store_true", help="Regenerate variants that already exist.")
+
+    def handle(self, *args, **options):
+        # Map file name -> (model, pk) rows to update; workers only touch files, never the database
+        pending = {}
+        for model in (ProductImage, CategoryImage):
+            for instance in model.objects.only("id", "image", "variants").iterator():
+                if instance.image and (options["force"] or needs_variants(instance)):
+                    pending.setdefault(instance.image.name, []).append((model, instance.pk))
+
+        if not pending:
+            self.stdout.write("All images already have variants.")
+            return
+
+        self.stdout.write(f"Generating variants for {len(pending)} images with {options['workers']} workers...")
+        started = time.monotonic()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options["workers"], initializer=_init_worker) as pool:
+            futures = [pool.submit(_render, name) for name in pending]
+            for future in as_completed(futures):
+                name, widths, error = future.result()
+                if error:
+                    failed += 1
+                    self.stderr.write(f"Failed {name}: {error}")
+                    continue
+                for model, pk in pending[name]:
+                    model.objects.filter(pk=pk).update(variants={"source": name, "widths": widths})
+                done += 1
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Processed {done} images ({failed} failed) in {elapsed:.1f}s."))
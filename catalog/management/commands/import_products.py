@@ -0,0 +1,210 @@
+import csv
+import json
+import sys
+import time
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+from catalog import snapshots, versions
+from shop import cache
+from catalog.facets import apply_deltas, facet_values
+from catalog.models import Category, Product
+from catalog.search import index_products
+from catalog.suggest import suggest_index
+
+SLUG_LENGTH = Product._meta.get_field("slug").max_length
+UPDATE_FIELDS = ["title", "description", "price", "category", "affliliate_link", "is_active", "updated_at"]
+FACET_FIELDS = ("category", "price", "is_active")
+TRUE_VALUES = {"1", "true", "yes", "y", "t"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-import products from a CSV or JSONL file (use '-' for stdin). "
+        "Columns: title, price, category (name or slug), and optionally slug, description, "
+        "affiliate_link, is_active. Rows are streamed and written in chunks with bulk_create, "
+        "so model signals do not fire; the search index, facet counts and suggest index are "
+        "updated by the command itself."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSONL file, or '-' for stdin.")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="Input format (default: from the file extension).")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Rows written per transaction.")
+        parser.add_argument("--update", action="store_true", help="Update products whose slug already exists instead of skipping them.")
+        parser.add_argument("--create-categories", action="store_true", help="Create categories that don't exist yet instead of rejecting the row.")
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or ("jsonl" if options["path"].endswith((".jsonl", ".ndjson")) else "csv")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive.")
+        self.update = options["update"]
+        self.create_categories = options["create_categories"]
+        self.categories = self._category_map()
+        self.stats = Counter()
+
+        stream = sys.stdin if options["path"] == "-" else open(options["path"], newline="", encoding="utf-8")
+        started = time.monotonic()
+        try:
+            rows = self._read(stream, fmt)
+            while True:
+                chunk = list(islice(rows, options["chunk_size"]))
+                if not chunk:
+                    break
+                self._import_chunk(chunk)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"{self.stats['rows']} rows, {self.stats['rows'] / elapsed:.0f} rows/s "
+                    f"({self.stats['created']} created, {self.stats['updated']} updated)"
+                )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        if self.stats["created"] or self.stats["updated"]:
+            versions.bump()
+            cache.bump("product")  # bulk writes skip the signals that normally do this
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {self.stats['rows']} rows in {elapsed:.1f}s "
+            f"({self.stats['rows'] / elapsed if elapsed else 0:.0f} rows/s): "
+            f"{self.stats['created']} created, {self.stats['updated']} updated, "
+            f"{self.stats['skipped']} skipped, {self.stats['failed']} failed."
+        ))
+
+    def _read(self, stream, fmt):
+        """
+        Yield ``(row dict, None)`` per row, or ``(None, error)`` for a line that isn't
+        a JSON object, without holding the file in memory.
+        """
+        if fmt == "csv":
+            for row in csv.DictReader(stream):
+                yield row, None
+            return
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield None, f"line {line_number}: {e}"
+                continue
+            if isinstance(row, dict):
+                yield row, None
+            else:
+                yield None, f"line {line_number}: expected a JSON object, got {type(row).__name__}"
+
+    def _category_map(self):
+        """Category lookup by slug and by lowercased name, loaded once."""
+        categories = {}
+        for pk, name, slug in Category.objects.values_list("id", "name", "slug"):
+            categories[slug] = pk
+            categories[name.lower()] = pk
+        return categories
+
+    def _category_id(self, value):
+        value = (value or "").strip()
+        pk = self.categories.get(value.lower()) or self.categories.get(slugify(value))
+        if pk is None and value and self.create_categories:
+            category = Category.objects.create(name=value)
+            pk = self.categories[category.slug] = self.categories[value.lower()] = category.pk
+        if pk is None:
+            raise ValueError(f"unknown category {value!r}")
+        return pk
+
+    def _build(self, row):
+        title = (row.get("title") or "").strip()
+        if not title:
+            raise ValueError("missing title")
+        try:
+            price = Decimal(str(row.get("price", "")).strip())
+        except InvalidOperation:
+            price = None
+        if price is None or not price.is_finite():  # Decimal accepts "NaN" and "Infinity"
+            raise ValueError(f"invalid price {row.get('price')!r}")
+        is_active = row.get("is_active", True)
+        if isinstance(is_active, str):
+            is_active = is_active.strip().lower() in TRUE_VALUES
+        return Product(
+            title=title,
+            slug=(row.get("slug") or "").strip(),
+            description=row.get("description") or "",
+            price=price,
+            category_id=self._category_id(row.get("category")),
+            affliliate_link=row.get("affiliate_link") or row.get("affliliate_link") or "",
+            is_active=bool(is_active),
+        )
+
+    def _import_chunk(self, chunk):
+        products = []
+        for row, error in chunk:
+            self.stats["rows"] += 1
+            try:
+                if error:
+                    raise ValueError(error)
+                products.append(self._build(row))
+            except ValueError as e:
+                self.stats["failed"] += 1
+                self.stderr.write(f"Row {self.stats['rows']}: {e}")
+
+        explicit = {p.slug for p in products if p.slug}
+        existing = {p.slug: p for p in Product.objects.filter(slug__in=explicit).only("id", "slug", *FACET_FIELDS)}
+        to_create, to_update, deltas = [], [], Counter()
+        now = timezone.now()  # bulk_update() skips auto_now
+        for product in products:
+            current = existing.get(product.slug)
+            if current is None:
+                to_create.append(product)
+            elif self.update:
+                for pair in facet_values(current):
+                    deltas[pair] -= 1
+                product.pk, product.updated_at = current.pk, now
+                to_update.append(product)
+            else:
+                self.stats["skipped"] += 1
+
+        self._assign_slugs(to_create)
+        with transaction.atomic():
+            created = Product.objects.bulk_create(to_create)
+            if to_update:
+                Product.objects.bulk_update(to_update, UPDATE_FIELDS)
+            for product in created + to_update:
+                for pair in facet_values(product):
+                    deltas[pair] += 1
+            apply_deltas(deltas)
+            index_products(created + to_update)
+            changed = created + to_update
+            transaction.on_commit(lambda: suggest_index.products_changed(changed))
+            if to_update:
+                updated_ids = [p.pk for p in to_update]
+                transaction.on_commit(lambda: snapshots.invalidate(updated_ids))
+        self.stats["created"] += len(created)
+        self.stats["updated"] += len(to_update)
+
+    def _assign_slugs(self, products):
+        """
+        Give every new product a unique slug, resolving collisions in memory.
+
+        One query finds which base slugs are taken; only for those (and for bases
+        repeated inside the chunk) a second query fetches the "<base>-N" slugs in use.
+        """
+        for product in products:
+            product.slug = (product.slug or slugify(product.title) or "product")[: SLUG_LENGTH - 8]
+        repeats = Counter(p.slug for p in products)
+        taken = set(Product.objects.filter(slug__in=list(repeats)).values_list("slug", flat=True))
+        colliding = [Q(slug__startswith=f"{b}-") for b in repeats if b in taken or repeats[b] > 1]
+        if colliding:
+            taken.update(Product.objects.filter(Q(*colliding, _connector=Q.OR)).values_list("slug", flat=True))
+        for product in products:
+            base, suffix = product.slug, 2
+            while product.slug in taken:
+                product.slug = f"{base}-{suffix}"
+                suffix += 1
+            taken.add(product.slug)
+
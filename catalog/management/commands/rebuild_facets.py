@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from catalog.facets import rebuild_facet_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute the precomputed facet counts from the Product table."
+
+    def handle(self, *args, **options):
+        rows = rebuild_facet_counts()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} facet counts."))
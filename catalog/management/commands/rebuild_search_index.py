@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from catalog.models import Product
+from catalog.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product full-text search index from the Product table."
+
+    def handle(self, *args, **options):
+        rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {Product.objects.count()} products."))
@@ -1,3 +1,4 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils.text import slugify
 from django.urls import reverse
@@ -6,6 +7,8 @@ from decimal import Decimal
 class Category(models.Model):
     name = models.CharField(max_length=120, unique=True)
     slug = models.SlugField(max_length=140, unique=True, blank=True)
+    # Also bumped when the category's images change; catalog pages use it for ETag/Last-Modified
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name_plural = "categories"
@@ -19,6 +22,8 @@ class Category(models.Model):
 class CategoryImage(models.Model):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="images")
     image = models.ImageField(upload_to="category_images/")
+    # Resized copies produced by catalog.images: {"source": <image name>, "widths": [...]}
+    variants = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return f"Image for {self.category.name}"
@@ -32,13 +37,47 @@ class Product(models.Model):
     affliliate_link = models.URLField(blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Also bumped when the product's images change; catalog pages use it for ETag/Last-Modified
+    updated_at = models.DateTimeField(auto_now=True)
+    # Denormalized first image so listings can select_related it instead of
+    # querying images per product; maintained by the ProductImage signals.
+    primary_image = models.ForeignKey(
+        "ProductImage", null=True, blank=True, editable=False, on_delete=models.SET_NULL, related_name="+"
+    )
     
     class Meta:
         ordering = ["-created_at", "title"]
+        indexes = [
+            # Listings page newest-first on (created_at, id) (see catalog.pagination)
+            models.Index(fields=["-created_at", "-id"], name="product_recent_idx"),
+            models.Index(
+                fields=["-created_at", "-id"], condition=models.Q(is_active=True), name="product_active_recent_idx"
+            ),
+            models.Index(
+                fields=["category", "-created_at", "-id"],
+                condition=models.Q(is_active=True),
+                name="product_cat_active_recent_idx",
+            ),
+            # Price facet filters
+            models.Index(fields=["price"], condition=models.Q(is_active=True), name="product_active_price_idx"),
+        ]
         
     def get_absolute_url(self):
         return reverse("catalog:detail", args=[self.slug])
 
+    # Fields the facet counts depend on (see catalog.facets)
+    FACET_FIELDS = ("category_id", "price", "is_active")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored facet fields, so a later save or delete can adjust the counts. Only
+        # rows loaded from the database need it; unlike a post_init hook, this costs unsaved
+        # instances nothing.
+        if set(cls.FACET_FIELDS).issubset(field_names):
+            instance._facet_row = tuple(getattr(instance, name) for name in cls.FACET_FIELDS)
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.slug: self.slug = slugify(self.title)
         super().save(*args, **kwargs)
@@ -48,6 +87,60 @@ class Product(models.Model):
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="images")
     image = models.ImageField(upload_to="product_images/")
+    variants = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return f"Image for {self.product.title}"
+
+class FacetCount(models.Model):
+    """
+    Precomputed number of products per facet value, e.g. ("category", "3") -> 312.
+
+    Kept current by the Product signals in catalog.signals so listing pages can
+    show counts without a COUNT query per facet value.
+    """
+    facet = models.CharField(max_length=20)
+    value = models.CharField(max_length=64)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("facet", "value")
+
+    def __str__(self):
+        return f"{self.facet}={self.value}: {self.count}"
+
+# The search index table (catalog.search) differs by database, so each backend has its
+# own unmanaged model over it, and only that backend's search() may use it or its
+# reverse relation on Product: search_entry on SQLite, search_document on PostgreSQL.
+
+class ProductSearchEntry(models.Model):
+    """
+    A row of the SQLite full-text index (an FTS5 table created by catalog.search), so
+    searches can join it to products once instead of matching it again per row.
+
+    Unmanaged: the columns are FTS5's own. ``rowid`` is the product id, the hidden
+    column named after the table takes the MATCH query and ``rank`` is the match score.
+    SQLite only.
+    """
+    product = models.OneToOneField(
+        Product, primary_key=True, db_column="rowid", db_constraint=False,
+        on_delete=models.DO_NOTHING, related_name="search_entry",
+    )
+    query = models.TextField(db_column="catalog_product_search")
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "catalog_product_search"
+
+
+class ProductSearchDocument(models.Model):
+    """The PostgreSQL index row: a product's weighted tsvector (see catalog.search). PostgreSQL only."""
+    product = models.OneToOneField(
+        Product, primary_key=True, db_constraint=False, on_delete=models.DO_NOTHING, related_name="search_document",
+    )
+    document = SearchVectorField()
+
+    class Meta:
+        managed = False
+        db_table = "catalog_product_search"
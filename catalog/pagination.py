@@ -0,0 +1,121 @@
+"""
+Keyset (cursor) pagination for catalog listings.
+
+Pages are addressed by an opaque cursor holding the ``(created_at, id)`` of the
+row at the page boundary, so fetching page 900 costs the same single indexed
+range query as page 1: no OFFSET and no COUNT(*) per request. A total count is
+still available, but it is computed lazily and cached.
+"""
+
+import json
+import base64
+import hashlib
+from datetime import datetime
+from django.core.cache import cache
+from django.db.models import Q
+
+DEFAULT_PER_PAGE = 20
+COUNT_CACHE_TIMEOUT = 300  # seconds
+
+
+def encode_cursor(obj, direction):
+    """Build a url-safe cursor pointing just past ``obj`` in ``direction`` ('n' or 'p')."""
+    data = json.dumps([obj.created_at.isoformat(), obj.pk, direction], separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return ``(created_at, id, direction)`` or None for a missing/garbled cursor."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, pk, direction = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if direction not in ("n", "p"):
+            return None
+        return datetime.fromisoformat(created_at), int(pk), direction
+    except (ValueError, TypeError):
+        return None
+
+
+class KeysetPage:
+    """One page of results, with cursors for the neighbouring pages."""
+
+    def __init__(self, paginator, object_list, next_cursor=None, previous_cursor=None):
+        self.paginator = paginator
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def count(self):
+        """Cached total number of rows across all pages."""
+        return self.paginator.count
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset newest-first on ``(created_at, id)``.
+
+    Usage:
+        page = KeysetPaginator(products, 20).page(request.GET.get("cursor"))
+    """
+
+    def __init__(self, queryset, per_page=DEFAULT_PER_PAGE, count_timeout=COUNT_CACHE_TIMEOUT):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.count_timeout = count_timeout
+
+    @property
+    def count(self):
+        if not hasattr(self, "_count"):
+            # Key the cached count on the SQL so every distinct listing gets its own entry
+            key = "catalog:count:" + hashlib.md5(str(self.queryset.query).encode()).hexdigest()
+            self._count = cache.get_or_set(key, self.queryset.count, self.count_timeout)
+        return self._count
+
+    def window(self, cursor=None):
+        """The query ``page(cursor)`` evaluates: one page of rows plus a look-ahead row."""
+        position = decode_cursor(cursor)
+        if position is None:
+            return self.queryset.order_by("-created_at", "-id")[: self.per_page + 1]
+        created_at, pk, direction = position
+        if direction == "n":
+            after = Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            return self.queryset.filter(after).order_by("-created_at", "-id")[: self.per_page + 1]
+        before = Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+        return self.queryset.filter(before).order_by("created_at", "id")[: self.per_page + 1]
+
+    def page(self, cursor=None):
+        position = decode_cursor(cursor)
+        rows = list(self.window(cursor))
+        has_more, rows = len(rows) > self.per_page, rows[: self.per_page]
+        if position is None:
+            return self._build_page(rows, has_next=has_more, has_previous=False)
+        if position[2] == "n":
+            return self._build_page(rows, has_next=has_more, has_previous=True)
+        rows.reverse()
+        return self._build_page(rows, has_next=True, has_previous=has_more)
+
+    def _build_page(self, rows, has_next, has_previous):
+        next_cursor = encode_cursor(rows[-1], "n") if rows and has_next else None
+        previous_cursor = encode_cursor(rows[0], "p") if rows and has_previous else None
+        return KeysetPage(self, rows, next_cursor, previous_cursor)
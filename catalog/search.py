@@ -0,0 +1,249 @@
+"""
+Full-text search index for the product catalog.
+
+Products are mirrored into a side table that the database can search with a
+real inverted index instead of ``LIKE '%term%'`` scans:
+
+- SQLite: an FTS5 virtual table ranked with bm25(), joined to the products
+  through the unmanaged ProductSearchEntry model
+- PostgreSQL: a tsvector table with a GIN index ranked with ts_rank(),
+  joined through ProductSearchDocument
+
+Any other database falls back to the old icontains lookup. The index is kept
+up to date by the Product signals in ``catalog.signals`` and can be rebuilt
+from scratch with ``manage.py rebuild_search_index``.
+"""
+
+import re
+import logging
+from django.db import connection
+from django.db.models import F, Lookup, Q
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from .models import Product, ProductSearchEntry
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = ProductSearchEntry._meta.db_table
+
+# Title matches should outrank description matches
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class Match(Lookup):
+    """``column MATCH value``: an FTS5 full-text query, or a ranking function for ``rank``."""
+    lookup_name = "match"
+    prepare_rhs = False  # always a string, whatever the column's type
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", lhs_params + rhs_params
+
+
+for _name in ("query", "rank"):
+    ProductSearchEntry._meta.get_field(_name).register_lookup(Match)
+
+
+def _tokens(query):
+    """Split a raw user query into plain word tokens (drops all search syntax)."""
+    return _TOKEN_RE.findall((query or "").lower())
+
+
+class BaseSearchBackend:
+    vendor = None
+
+    def ensure_index(self):
+        """Create the index table if needed. Returns True when it was created."""
+        return False
+
+    def rebuild(self):
+        pass
+
+    def index_products(self, products):
+        pass
+
+    def remove_products(self, product_ids):
+        pass
+
+    def search(self, query, queryset=None):
+        if queryset is None:
+            queryset = Product.objects.all()
+        tokens = _tokens(query)
+        if not tokens:
+            return queryset.none()
+        condition = Q()
+        for token in tokens:
+            condition &= Q(title__icontains=token) | Q(description__icontains=token)
+        return queryset.filter(condition)
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    vendor = "sqlite"
+
+    def ensure_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [SEARCH_TABLE]
+            )
+            if cursor.fetchone():
+                return False
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+                "title, description, tokenize = 'unicode61 remove_diacritics 2')"
+            )
+        self.rebuild()
+        return True
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, title, description) "
+                f"SELECT id, title, description FROM {Product._meta.db_table}"
+            )
+
+    def index_products(self, products):
+        rows = [(p.pk, p.title, p.description or "") for p in products]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [(r[0],) for r in rows])
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, title, description) VALUES (%s, %s, %s)", rows
+            )
+
+    def remove_products(self, product_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [(pk,) for pk in product_ids])
+
+    def _match_expression(self, tokens):
+        # Every token is quoted (so user input can't inject FTS syntax) and
+        # prefix-matched so search-as-you-type still finds partial words.
+        return " ".join('"{}"*'.format(token.replace('"', '""')) for token in tokens)
+
+    def search(self, query, queryset=None):
+        if queryset is None:
+            queryset = Product.objects.all()
+        tokens = _tokens(query)
+        if not tokens:
+            return queryset.none()
+        # One join: the index is matched once and each hit's rank read with it, rather
+        # than re-running the match per product for its score
+        return (
+            queryset.filter(
+                search_entry__query__match=self._match_expression(tokens),
+                search_entry__rank__match=f"bm25({TITLE_WEIGHT}, {DESCRIPTION_WEIGHT})",
+            )
+            .annotate(search_rank=F("search_entry__rank"))
+            .order_by("search_rank", "-created_at")  # bm25() is lower-is-better
+        )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    vendor = "postgresql"
+
+    def ensure_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass(%s)", [SEARCH_TABLE])
+            if cursor.fetchone()[0]:
+                return False
+            cursor.execute(
+                f"CREATE TABLE {SEARCH_TABLE} ("
+                f"product_id bigint PRIMARY KEY REFERENCES {Product._meta.db_table} (id) "
+                "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+                "document tsvector NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX {SEARCH_TABLE}_document_idx ON {SEARCH_TABLE} USING gin (document)"
+            )
+        self.rebuild()
+        return True
+
+    def _document_sql(self, title, description):
+        return (
+            f"setweight(to_tsvector('simple', coalesce({title}, '')), 'A') || "
+            f"setweight(to_tsvector('simple', coalesce({description}, '')), 'D')"
+        )
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {SEARCH_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE} (product_id, document) "
+                f"SELECT id, {self._document_sql('title', 'description')} FROM {Product._meta.db_table}"
+            )
+
+    def index_products(self, products):
+        rows = [(p.pk, p.title, p.description or "") for p in products]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (product_id, document) "
+                f"VALUES (%s, {self._document_sql('%s', '%s')}) "
+                "ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document",
+                rows,
+            )
+
+    def remove_products(self, product_ids):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE product_id = ANY(%s)", [list(product_ids)])
+
+    def search(self, query, queryset=None):
+        if queryset is None:
+            queryset = Product.objects.all()
+        tokens = _tokens(query)
+        if not tokens:
+            return queryset.none()
+        tsquery = SearchQuery(" & ".join(f"{token}:*" for token in tokens), config="simple", search_type="raw")
+        # One join, as on SQLite: the rank is read from the matched row, not looked up again per product
+        return (
+            queryset.filter(search_document__document=tsquery)
+            .annotate(search_rank=SearchRank(F("search_document__document"), tsquery))
+            .order_by("-search_rank", "-created_at")
+        )
+
+
+_BACKENDS = {
+    SQLiteSearchBackend.vendor: SQLiteSearchBackend,
+    PostgresSearchBackend.vendor: PostgresSearchBackend,
+}
+
+
+def get_backend():
+    """Return the search backend for the default database connection."""
+    return _BACKENDS.get(connection.vendor, BaseSearchBackend)()
+
+
+def search_products(query, queryset=None):
+    """Return products matching ``query``, best matches first."""
+    return get_backend().search(query, queryset)
+
+
+def index_products(products):
+    """
+    Add or refresh the given products in the search index. Errors propagate: the
+    index is written in the caller's transaction, so a failure rolls back the
+    product change with it rather than leaving the two out of step.
+    """
+    get_backend().index_products(products)
+
+
+def remove_products(product_ids):
+    """Drop the given product ids from the search index (errors propagate, as for index_products)."""
+    get_backend().remove_products(product_ids)
+
+
+def ensure_search_index(**kwargs):
+    """post_migrate hook: create (and backfill) the search table on first migrate."""
+    if get_backend().ensure_index():
+        logger.info("Created product search index")
+
+
+def rebuild_search_index():
+    backend = get_backend()
+    backend.ensure_index()
+    backend.rebuild()
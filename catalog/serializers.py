@@ -0,0 +1,73 @@
+from django.urls import reverse
+from rest_framework import serializers
+from .models import Product, Category
+
+
+class SparseFieldsMixin:
+    """
+    Limit the serialized fields to those named in ``?fields=a,b,c``.
+
+    Unknown names are ignored; without the parameter every field is returned.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        requested = requested_fields(request)
+        if requested:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+
+def requested_fields(request):
+    """The set of field names asked for with ``?fields=``, or None for all fields."""
+    fields = request.query_params.get("fields") if request is not None else None
+    if not fields:
+        return None
+    return {name.strip() for name in fields.split(",") if name.strip()}
+
+
+def _absolute(request, url):
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+class ProductSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    category = serializers.SlugRelatedField(slug_field="slug", read_only=True)
+    url = serializers.SerializerMethodField()
+    image = serializers.SerializerMethodField()
+    images = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = ("id", "title", "slug", "description", "price", "category", "url", "image", "images", "created_at")
+        read_only_fields = fields
+
+    def get_url(self, obj):
+        return _absolute(self.context.get("request"), obj.get_absolute_url())
+
+    def get_image(self, obj):
+        image = obj.primary_image
+        return _absolute(self.context.get("request"), image.image.url) if image else None
+
+    def get_images(self, obj):
+        request = self.context.get("request")
+        return [_absolute(request, image.image.url) for image in obj.images.all()]
+
+
+class CategorySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    url = serializers.SerializerMethodField()
+    images = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Category
+        fields = ("id", "name", "slug", "url", "images")
+        read_only_fields = fields
+
+    def get_url(self, obj):
+        return _absolute(
+            self.context.get("request"), reverse("catalog:category_list_by_category", args=[obj.slug])
+        )
+
+    def get_images(self, obj):
+        request = self.context.get("request")
+        return [_absolute(request, image.image.url) for image in obj.images.all()]
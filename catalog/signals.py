@@ -0,0 +1,170 @@
+from functools import partial
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.db import transaction
+from django.db.models import Subquery
+from .models import Product, Category, ProductImage, CategoryImage
+from .suggest import suggest_index
+from .images import needs_variants, touch_owner
+from .jobs import render_image_variants, remove_image_variants
+from .search import index_products, remove_products
+from . import facets, snapshots, versions
+from shop import cache
+
+
+@receiver(post_save, sender=Product)
+def update_search_index(sender, instance, raw=False, **kwargs):
+    """Keep the full-text search index in sync with saved products."""
+    if raw:
+        return
+    index_products([instance])
+
+
+@receiver(post_delete, sender=Product)
+def remove_from_search_index(sender, instance, **kwargs):
+    remove_products([instance.pk])
+
+
+def first_image_id(product_id):
+    """Subquery for the id of a product's first (oldest) image."""
+    return Subquery(ProductImage.objects.filter(product_id=product_id).order_by("id").values("id")[:1])
+
+
+@receiver(post_save, sender=ProductImage)
+def set_primary_image(sender, instance, raw=False, **kwargs):
+    """Make the first image uploaded for a product its primary image."""
+    if raw:
+        return
+    Product.objects.filter(pk=instance.product_id, primary_image__isnull=True).update(primary_image=instance)
+
+
+@receiver(post_delete, sender=ProductImage)
+def replace_primary_image(sender, instance, **kwargs):
+    """Promote the next image when the primary one is deleted (SET_NULL has already cleared it)."""
+    Product.objects.filter(pk=instance.product_id, primary_image__isnull=True).update(
+        primary_image=first_image_id(instance.product_id)
+    )
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_save, sender=CategoryImage)
+def generate_image_variants(sender, instance, raw=False, **kwargs):
+    """Build resized variants off the request path whenever a new file is saved."""
+    if not raw and needs_variants(instance):
+        render_image_variants.enqueue(instance._meta.label, instance.pk)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_save, sender=CategoryImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_delete, sender=CategoryImage)
+def touch_image_owner(sender, instance, raw=False, **kwargs):
+    """Images are part of their product/category pages: refresh the owner's updated_at."""
+    if not raw:
+        touch_owner(instance)
+
+
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_delete, sender=CategoryImage)
+def delete_image_variants(sender, instance, **kwargs):
+    if instance.variants.get("source"):
+        remove_image_variants.enqueue(instance.variants["source"])
+
+
+# The suggest index is changed only after commit, so no worker ever serves (or
+# publishes to the others) a change that was rolled back.
+
+@receiver(post_save, sender=Product)
+def update_suggest_product(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(lambda: suggest_index.product_changed(instance))
+
+
+@receiver(post_delete, sender=Product)
+def remove_suggest_product(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: suggest_index.product_deleted(pk))
+
+
+@receiver(post_save, sender=Category)
+def update_suggest_category(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(lambda: suggest_index.category_changed(instance))
+
+
+@receiver(post_delete, sender=Category)
+def remove_suggest_category(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: suggest_index.category_deleted(pk))
+
+
+@receiver(pre_save, sender=Product)
+def snapshot_facets_before_save(sender, instance, raw=False, **kwargs):
+    """Instances loaded with deferred facet fields (or built by hand) don't know their stored row; read it."""
+    if not raw and not instance._state.adding and facets.stored_values(instance) is None:
+        facets.snapshot_from_db(instance)
+
+
+@receiver(post_save, sender=Product)
+def update_facet_counts(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        facets.record_save(instance, created)
+
+
+@receiver(post_delete, sender=Product)
+def decrement_facet_counts(sender, instance, **kwargs):
+    facets.record_delete(instance)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=CategoryImage)
+@receiver(post_delete, sender=CategoryImage)
+def bump_catalog_version(sender, raw=False, **kwargs):
+    """Invalidate ETags of catalog API responses once the change is committed."""
+    if not raw:
+        transaction.on_commit(versions.bump)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_snapshot(sender, instance, raw=False, **kwargs):
+    """Carts in every worker pick up the new title/price once the change is committed."""
+    if not raw:
+        pk = instance.pk
+        transaction.on_commit(lambda: snapshots.invalidate([pk]))
+
+
+def bump_generation(name):
+    """
+    Bump now, so this worker's own reads inside the transaction see the change,
+    and again after commit, so nobody keeps a value computed from uncommitted data.
+
+    The after-commit step runs once per saved row, so it is kept idempotent and
+    cheap: a cache increment, and versions.changed receivers that queue their
+    work as unique jobs (one waiting rebuild however many rows changed).
+    """
+    cache.bump(name)
+    transaction.on_commit(partial(versions.committed, name))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def bump_product_generation(sender, raw=False, **kwargs):
+    if not raw:
+        bump_generation("product")
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=CategoryImage)
+@receiver(post_delete, sender=CategoryImage)
+def bump_category_generation(sender, raw=False, **kwargs):
+    if not raw:
+        bump_generation("category")
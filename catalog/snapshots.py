@@ -0,0 +1,110 @@
+"""
+Product snapshots: the handful of product fields carts and checkout need,
+cached so cart pages don't query the Product table.
+
+Lookups go through the two tiers of shop.cache:
+- a per-process LRU keyed by ``(product id, generation)``;
+- the shared cache, holding both the snapshots and each product's
+  ``product:<id>`` generation.
+
+Saving or deleting a product bumps its generation (see catalog.signals).
+Every worker sees the bump on its next lookup and ignores its now-outdated
+LRU entry. A cart of N products costs one cache ``get_many`` for the
+generations, plus a second cache call and one DB query only for products
+that aren't cached anywhere yet.
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal
+from django.core.cache import cache
+from django.urls import reverse
+from shop.cache import LRU, bump_many, generations
+from .models import Product
+
+LRU_SIZE = 2048
+SNAPSHOT_TIMEOUT = 24 * 60 * 60
+
+
+@dataclass(frozen=True)
+class ProductSnapshot:
+    id: int
+    title: str
+    slug: str
+    price: Decimal
+    is_active: bool
+    weight: Decimal = None  # only when the Product model defines it (used by shipping)
+
+    @property
+    def pk(self):
+        return self.id
+
+    def get_absolute_url(self):
+        return reverse("catalog:detail", args=[self.slug])
+
+    @classmethod
+    def from_product(cls, product):
+        return cls(
+            id=product.pk,
+            title=product.title,
+            slug=product.slug,
+            price=product.price,
+            is_active=product.is_active,
+            weight=getattr(product, "weight", None),
+        )
+
+
+_local = LRU(LRU_SIZE)
+
+
+def _generation(pk):
+    return f"product:{pk}"
+
+
+def _snapshot_key(pk, version):
+    return f"catalog:product:{pk}:v{version}"
+
+
+def _versions(ids):
+    current = generations([_generation(pk) for pk in ids])
+    return {pk: current[_generation(pk)] for pk in ids}
+
+
+def get_snapshots(ids):
+    """``{id: ProductSnapshot}`` for the given product ids; ids of deleted products are left out."""
+    versions = _versions(set(ids))
+    snapshots, misses = {}, {}
+    for pk, version in versions.items():
+        snapshot = _local.get((pk, version))
+        if snapshot is None:
+            misses[_snapshot_key(pk, version)] = (pk, version)
+        else:
+            snapshots[pk] = snapshot
+    if not misses:
+        return snapshots
+
+    for key, snapshot in cache.get_many(misses).items():
+        _local.set(misses.pop(key), snapshot)
+        snapshots[snapshot.id] = snapshot
+    if misses:
+        by_id = {pk: key for key, (pk, _) in misses.items()}
+        fetched = {}
+        for product in Product.objects.filter(id__in=by_id):
+            snapshot = ProductSnapshot.from_product(product)
+            fetched[by_id[product.pk]] = snapshot
+            _local.set(misses[by_id[product.pk]], snapshot)
+            snapshots[product.pk] = snapshot
+        cache.set_many(fetched, timeout=SNAPSHOT_TIMEOUT)
+    return snapshots
+
+
+def get_snapshot(pk):
+    """Snapshot of one product; raises Product.DoesNotExist like ``Product.objects.get``."""
+    snapshot = get_snapshots([int(pk)]).get(int(pk))
+    if snapshot is None:
+        raise Product.DoesNotExist(f"Product {pk} does not exist")
+    return snapshot
+
+
+def invalidate(ids):
+    """Give the products a new generation so every worker refetches them."""
+    bump_many([_generation(pk) for pk in ids])
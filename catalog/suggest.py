@@ -0,0 +1,235 @@
+"""
+In-process prefix index behind the search-as-you-type suggest endpoint.
+
+Each worker keeps sorted arrays of normalized product titles and category
+names (plus the word-starts inside them, so "gal" finds "Samsung Galaxy")
+and answers prefix lookups with a binary search: no database access on the
+request path.
+
+Keeping workers in step:
+- the worker that saves a Product/Category patches its own index in place,
+  bumps the shared "suggest" generation (see shop.cache) and stores the
+  change, ``(kind, id, name, slug)``, in the shared cache under the new
+  generation;
+- every lookup compares its local version with the shared one and applies
+  the changes published since, so other workers catch up without touching
+  the database;
+- only when that log is incomplete (expired, evicted, too far behind) does a
+  worker rebuild from the database, in a background thread, answering from
+  its current index meanwhile. A new worker builds its first index the same
+  way.
+"""
+
+import bisect
+import logging
+import threading
+import unicodedata
+from django.db import connection
+from django.urls import reverse
+from shop import cache
+from .models import Product, Category
+
+logger = logging.getLogger(__name__)
+
+GENERATION = "suggest"
+CHANGES_TIMEOUT = 60 * 60  # a worker idle for longer rebuilds instead
+MAX_PENDING = 1000  # versions behind; beyond this a rebuild is cheaper than the log
+MAX_KEY_LENGTH = 32  # longer prefixes are rare; cap key size to keep the index compact
+MAX_WORDS = 4  # word-starts indexed per name, beyond the full name itself
+
+
+def normalize(text):
+    """Lowercase, strip accents and collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.lower().split())
+
+
+def _keys_for(name):
+    words = normalize(name).split()
+    return {" ".join(words[i:])[:MAX_KEY_LENGTH] for i in range(min(len(words), MAX_WORDS))}
+
+
+class PrefixIndex:
+    """Sorted array of (key, object id) pairs supporting prefix lookups."""
+
+    def __init__(self):
+        self._keys = []  # sorted "key\x00id" strings
+        self._names = {}  # id -> (label, slug)
+
+    def add(self, pk, label, slug):
+        self.remove(pk)
+        self._names[pk] = (label, slug)
+        for key in _keys_for(label):
+            bisect.insort(self._keys, f"{key}\x00{pk}")
+
+    def remove(self, pk):
+        names = self._names.pop(pk, None)
+        if names is None:
+            return
+        for key in _keys_for(names[0]):
+            entry = f"{key}\x00{pk}"
+            i = bisect.bisect_left(self._keys, entry)
+            if i < len(self._keys) and self._keys[i] == entry:
+                del self._keys[i]
+
+    @classmethod
+    def build(cls, rows):
+        """Bulk-build from ``(pk, label, slug)`` rows (much faster than repeated add())."""
+        index = cls()
+        keys = []
+        for pk, label, slug in rows:
+            index._names[pk] = (label, slug)
+            keys.extend(f"{key}\x00{pk}" for key in _keys_for(label))
+        keys.sort()
+        index._keys = keys
+        return index
+
+    def search(self, prefix, limit):
+        """Return up to ``limit`` ``(pk, label, slug)`` tuples whose name has a word starting with ``prefix``."""
+        prefix = normalize(prefix)[:MAX_KEY_LENGTH]
+        if not prefix:
+            return []
+        results, seen = [], set()
+        i = bisect.bisect_left(self._keys, prefix)
+        while i < len(self._keys) and len(results) < limit:
+            key, _, pk = self._keys[i].rpartition("\x00")
+            if not key.startswith(prefix):
+                break
+            pk = int(pk)
+            if pk not in seen:
+                seen.add(pk)
+                results.append((pk, *self._names[pk]))
+            i += 1
+        return results
+
+    def __len__(self):
+        return len(self._names)
+
+
+def _changes_key(version):
+    return f"{GENERATION}:changes:{version}"
+
+
+def product_change(product):
+    """The published form of a saved product: inactive products leave the index."""
+    if product.is_active:
+        return ("product", product.pk, product.title, product.slug)
+    return ("product", product.pk, None, None)
+
+
+class SuggestIndex:
+    """The per-process product and category indexes plus the version they were built at."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.products = PrefixIndex()
+        self.categories = PrefixIndex()
+        self.rebuilding = False
+
+    def shared_version(self):
+        return cache.generation(GENERATION)
+
+    def publish(self, changes):
+        """Advance the shared version and store ``changes`` under it for the other workers."""
+        version = cache.bump(GENERATION)
+        cache.shared.set(_changes_key(version), changes, CHANGES_TIMEOUT)
+        if self.version is not None and version == self.version + 1:
+            self.version = version  # nobody else changed anything since our last sync
+
+    def apply(self, changes):
+        for kind, pk, name, slug in changes:
+            index = self.products if kind == "product" else self.categories
+            if name is None:
+                index.remove(pk)
+            else:
+                index.add(pk, name, slug)
+
+    def rebuild(self, version):
+        products = PrefixIndex.build(
+            Product.objects.filter(is_active=True).values_list("id", "title", "slug").iterator()
+        )
+        categories = PrefixIndex.build(Category.objects.values_list("id", "name", "slug").iterator())
+        with self.lock:
+            self.products, self.categories, self.version = products, categories, version
+        logger.info(f"Rebuilt suggest index: {len(products)} products, {len(categories)} categories")
+
+    def rebuild_in_background(self, version):
+        with self.lock:
+            if self.rebuilding:
+                return
+            self.rebuilding = True
+
+        def run():
+            try:
+                self.rebuild(version)
+            except Exception as e:
+                logger.error(f"Failed to rebuild suggest index: {e}")
+            finally:
+                self.rebuilding = False
+                connection.close()  # this thread's own connection
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def catch_up(self, version):
+        """Apply the changes published up to ``version``; False if the log doesn't cover them."""
+        with self.lock:
+            if self.version is None or not 0 < version - self.version <= MAX_PENDING:
+                return False
+            versions = range(self.version + 1, version + 1)
+            log = cache.shared.get_many([_changes_key(v) for v in versions])
+            for v in versions:
+                changes = log.get(_changes_key(v))
+                if changes is None:
+                    return False
+                self.apply(changes)
+                self.version = v
+            return True
+
+    def sync(self, background=False):
+        """Bring the index up to the shared version: from the change log, else by a rebuild."""
+        version = self.shared_version()
+        if version == self.version or self.catch_up(version):
+            return
+        if background:
+            self.rebuild_in_background(version)
+        else:
+            self.rebuild(version)
+
+    def search(self, query, limit):
+        self.sync(background=True)  # never rebuild on the request path
+        return {
+            "products": [
+                {"title": title, "url": reverse("catalog:detail", args=[slug])}
+                for pk, title, slug in self.products.search(query, limit)
+            ],
+            "categories": [
+                {"name": name, "url": reverse("catalog:category_list_by_category", args=[slug])}
+                for pk, name, slug in self.categories.search(query, limit)
+            ],
+        }
+
+    def changed(self, changes):
+        """Apply ``changes`` here and publish them; called after the change commits."""
+        with self.lock:
+            self.apply(changes)
+            self.publish(changes)
+
+    def product_changed(self, product):
+        self.products_changed([product])
+
+    def products_changed(self, products):
+        self.changed([product_change(product) for product in products])
+
+    def product_deleted(self, pk):
+        self.changed([("product", pk, None, None)])
+
+    def category_changed(self, category):
+        self.changed([("category", category.pk, category.name, category.slug)])
+
+    def category_deleted(self, pk):
+        self.changed([("category", pk, None, None)])
+
+
+suggest_index = SuggestIndex()
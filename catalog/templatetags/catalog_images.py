@@ -0,0 +1,30 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+from catalog.images import srcset
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(image, sizes="100vw", alt="", css_class="", loading="lazy", **attrs):
+    """
+    Render a ProductImage/CategoryImage as a <picture> with WebP and JPEG srcsets.
+
+    Falls back to a plain <img> of the original while variants are still being generated.
+    Extra keyword arguments become attributes, with underscores turned into dashes:
+
+        {% responsive_image product.primary_image sizes="(max-width: 768px) 50vw, 25vw" alt=product.title css_class="card-img-top" %}
+    """
+    if not image or not image.image:
+        return ""
+    extra = format_html_join("", ' {}="{}"', ((k.replace("_", "-"), v) for k, v in attrs.items()))
+    webp, jpeg = srcset(image, "webp"), srcset(image, "jpeg")
+    if not webp:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="{}"{}>', image.image.url, alt, css_class, loading, extra
+        )
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" loading="{}"{}></picture>',
+        webp, sizes, image.image.url, jpeg, sizes, alt, css_class, loading, extra,
+    )
@@ -1,3 +1,636 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+from unittest import mock
+from decimal import Decimal
+from PIL import Image
+from django.test import TestCase, override_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.template import Template, Context
+from django.core.cache import cache
+from django.test.utils import CaptureQueriesContext
+from django.db import DatabaseError, connection, transaction
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from catalog.models import Product, Category, ProductImage, CategoryImage, FacetCount
+from catalog.search import search_products, rebuild_search_index
+from catalog.pagination import KeysetPaginator
+from catalog.images import process_image, variant_name
+from catalog.suggest import PrefixIndex, SuggestIndex, suggest_index
+from catalog.facets import apply_deltas, precomputed_counts, scoped_counts, rebuild_facet_counts
+from jobs.models import Job
+from jobs.queue import run_batch
 
-# Create your tests here.
+User = get_user_model()
+
+
+class ProductSearchTest(TestCase):
+    """Test the full-text product search index."""
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Phones", slug="phones")
+        self.phone = Product.objects.create(
+            category=self.category,
+            title="Samsung Galaxy Phone",
+            description="Android smartphone with a great camera",
+            price=Decimal("150000.00"),
+        )
+        self.case = Product.objects.create(
+            category=self.category,
+            title="Leather Case",
+            description="Protective case that fits any Samsung phone",
+            price=Decimal("5000.00"),
+        )
+
+    def test_search_matches_title_and_description(self):
+        results = list(search_products("samsung"))
+        self.assertEqual(set(results), {self.phone, self.case})
+
+    def test_title_matches_rank_first(self):
+        results = list(search_products("samsung"))
+        self.assertEqual(results[0], self.phone)
+
+    def test_prefix_search(self):
+        self.assertEqual(list(search_products("leath")), [self.case])
+
+    def test_index_matched_once(self):
+        results = search_products("samsung")
+        if connection.vendor == "sqlite":
+            self.assertEqual(str(results.query).count(" MATCH "), 2)  # the query and the rank function, on one join
+            self.assertNotIn("SELECT bm25", str(results.query))
+        self.assertLess(results[0].search_rank, results[1].search_rank)
+
+    def test_index_updated_on_save_and_delete(self):
+        self.case.title = "Silicone Cover"
+        self.case.save()
+        self.assertEqual(list(search_products("silicone")), [self.case])
+        self.assertEqual(list(search_products("leather")), [])
+
+        self.case.delete()
+        self.assertEqual(list(search_products("silicone")), [])
+
+    def test_index_errors_roll_back_the_save(self):
+        with mock.patch("catalog.search.SQLiteSearchBackend.index_products", side_effect=DatabaseError("disk full")):
+            with self.assertRaises(DatabaseError), transaction.atomic():
+                Product.objects.create(category=self.category, title="Unindexed", price=Decimal("1.00"))
+        self.assertFalse(Product.objects.filter(title="Unindexed").exists())
+
+    def test_search_syntax_is_ignored(self):
+        self.assertEqual(list(search_products('"samsung*')), list(search_products("samsung")))
+        self.assertEqual(list(search_products("***")), [])
+
+    def test_rebuild_search_index(self):
+        rebuild_search_index()
+        self.assertEqual(list(search_products("camera")), [self.phone])
+
+    def test_search_view_uses_index(self):
+        user = User.objects.create_user(username="shopper", email="shopper@example.com", password="pass12345")
+        self.client.force_login(user)
+        response = self.client.get(reverse("catalog:search"), {"q": "galaxy"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["page_obj"]), [self.phone])
+
+
+class KeysetPaginationTest(TestCase):
+    """Test cursor pagination on catalog listings."""
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Gadgets", slug="gadgets")
+        self.products = [
+            Product.objects.create(category=self.category, title=f"Gadget {i}", price=Decimal("1000.00"))
+            for i in range(7)
+        ]
+        # Newest first, id breaks ties between rows created in the same instant
+        self.expected = sorted(self.products, key=lambda p: (p.created_at, p.id), reverse=True)
+
+    def test_walk_forward_and_back(self):
+        paginator = KeysetPaginator(Product.objects.all(), per_page=3)
+        first = paginator.page()
+        self.assertEqual(list(first), self.expected[:3])
+        self.assertFalse(first.has_previous())
+
+        second = paginator.page(first.next_cursor)
+        self.assertEqual(list(second), self.expected[3:6])
+        third = paginator.page(second.next_cursor)
+        self.assertEqual(list(third), self.expected[6:])
+        self.assertFalse(third.has_next())
+
+        back = paginator.page(third.previous_cursor)
+        self.assertEqual(list(back), self.expected[3:6])
+        self.assertEqual(list(paginator.page(back.previous_cursor)), self.expected[:3])
+        self.assertFalse(paginator.page(back.previous_cursor).has_previous())
+
+    def test_invalid_cursor_returns_first_page(self):
+        paginator = KeysetPaginator(Product.objects.all(), per_page=3)
+        self.assertEqual(list(paginator.page("not-a-cursor")), self.expected[:3])
+
+    def test_page_query_count_is_constant(self):
+        paginator = KeysetPaginator(Product.objects.all(), per_page=2)
+        cursor = paginator.page().next_cursor
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                cursor = paginator.page(cursor).next_cursor
+
+    def test_json_variant(self):
+        user = User.objects.create_user(username="shopper", email="shopper@example.com", password="pass12345")
+        self.client.force_login(user)
+        url = reverse("catalog:category_list_by_category", args=[self.category.slug])
+        data = self.client.get(url, {"format": "json"}).json()
+        self.assertEqual(len(data["results"]), 7)
+        self.assertEqual(data["count"], 7)
+        self.assertIsNone(data["next"])
+        self.assertEqual(data["results"][0]["slug"], self.expected[0].slug)
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertContains(self.client.get(url, {"partial": 1}), "Gadget 6")
+
+
+class PrimaryImageTest(TestCase):
+    """Test the denormalized primary image and fixed query counts on catalog pages."""
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Shoes", slug="shoes")
+        self.user = User.objects.create_user(username="shopper", email="shopper@example.com", password="pass12345")
+        self.client.force_login(self.user)
+
+    def add_products(self, count):
+        for i in range(count):
+            product = Product.objects.create(category=self.category, title=f"Sneaker {Product.objects.count()}", price=Decimal("9000.00"))
+            ProductImage.objects.create(product=product, image=f"product_images/{product.slug}-1.jpg")
+            ProductImage.objects.create(product=product, image=f"product_images/{product.slug}-2.jpg")
+            CategoryImage.objects.create(category=self.category, image=f"category_images/{product.slug}.jpg")
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_primary_image_follows_first_image(self):
+        product = Product.objects.create(category=self.category, title="Boot", price=Decimal("1.00"))
+        first = ProductImage.objects.create(product=product, image="product_images/boot-1.jpg")
+        second = ProductImage.objects.create(product=product, image="product_images/boot-2.jpg")
+        product.refresh_from_db()
+        self.assertEqual(product.primary_image, first)
+
+        first.delete()
+        product.refresh_from_db()
+        self.assertEqual(product.primary_image, second)
+
+        second.delete()
+        product.refresh_from_db()
+        self.assertIsNone(product.primary_image)
+
+    def test_query_count_independent_of_product_count(self):
+        urls = [
+            reverse("core:home"),
+            reverse("catalog:list"),
+            reverse("catalog:category_list_by_category", args=[self.category.slug]),
+            reverse("catalog:search") + "?q=sneaker",
+        ]
+        self.add_products(2)
+        small = [self.count_queries(url) for url in urls]
+        self.add_products(8)
+        large = [self.count_queries(url) for url in urls]
+        self.assertEqual(small, large)
+
+    def test_detail_query_count_independent_of_image_count(self):
+        self.add_products(1)
+        product = Product.objects.get()
+        before = self.count_queries(product.get_absolute_url())
+        for i in range(5):
+            ProductImage.objects.create(product=product, image=f"product_images/extra-{i}.jpg")
+        self.assertEqual(self.count_queries(product.get_absolute_url()), before)
+
+
+class ImageVariantTest(TestCase):
+    """Test responsive image variant generation."""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        buffer = io.BytesIO()
+        Image.new("RGBA", (500, 250), (200, 30, 30, 128)).save(buffer, "PNG")
+        category = Category.objects.create(name="Bags", slug="bags")
+        product = Product.objects.create(category=category, title="Tote", price=Decimal("2500.00"))
+        self.image = ProductImage.objects.create(
+            product=product, image=SimpleUploadedFile("tote.png", buffer.getvalue(), content_type="image/png")
+        )
+
+    def test_process_image_writes_variants(self):
+        process_image("catalog.ProductImage", self.image.pk)
+        self.image.refresh_from_db()
+        # No upscaling past the 500px original
+        self.assertEqual(self.image.variants, {"source": self.image.image.name, "widths": [200, 400]})
+        for width in (200, 400):
+            for fmt in ("webp", "jpeg"):
+                self.assertTrue(default_storage.exists(variant_name(self.image.image.name, width, fmt)))
+        with default_storage.open(variant_name(self.image.image.name, 200, "jpeg")) as f:
+            self.assertEqual(Image.open(f).size, (200, 100))
+
+    def test_saving_an_image_queues_its_variants(self):
+        job = Job.objects.get(name="catalog.jobs.render_image_variants")
+        self.assertEqual(job.args, ["catalog.ProductImage", self.image.pk])
+        run_batch()
+        self.image.refresh_from_db()
+        self.assertEqual(self.image.variants["widths"], [200, 400])
+
+        source = self.image.image.name
+        self.image.delete()
+        self.assertEqual(Job.objects.get(name="catalog.jobs.remove_image_variants").args, [source])
+        run_batch()
+        self.assertFalse(default_storage.exists(variant_name(source, 200, "webp")))
+
+    def test_responsive_image_tag(self):
+        template = Template('{% load catalog_images %}{% responsive_image image sizes="25vw" alt="Tote" %}')
+        html = template.render(Context({"image": self.image}))
+        self.assertNotIn("srcset", html)  # variants not generated yet
+
+        process_image("catalog.ProductImage", self.image.pk)
+        self.image.refresh_from_db()
+        html = template.render(Context({"image": self.image}))
+        self.assertIn('type="image/webp"', html)
+        self.assertIn("-400w.webp 400w", html)
+        self.assertIn("-200w.jpg 200w", html)
+        self.assertIn('sizes="25vw"', html)
+
+    def test_backfill_command(self):
+        call_command("generate_image_variants", workers=1, stdout=io.StringIO())
+        self.image.refresh_from_db()
+        self.assertEqual(self.image.variants["widths"], [200, 400])
+
+
+class SuggestTest(TestCase):
+    """Test the autocomplete prefix index and endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        self.phones = Category.objects.create(name="Phones", slug="phones")
+        self.galaxy = Product.objects.create(category=self.phones, title="Samsung Galaxy S24", price=Decimal("1.00"))
+        self.pixel = Product.objects.create(category=self.phones, title="Google Pixel", price=Decimal("1.00"))
+        Product.objects.create(category=self.phones, title="Hidden Phone", price=Decimal("1.00"), is_active=False)
+        suggest_index.sync()  # a worker's first build runs in a background thread, which can't see test data
+
+    def test_prefix_index(self):
+        index = PrefixIndex.build([(1, "Samsung Galaxy", "samsung-galaxy"), (2, "Café Crème", "cafe-creme")])
+        self.assertEqual(index.search("sams", 5), [(1, "Samsung Galaxy", "samsung-galaxy")])
+        self.assertEqual(index.search("GAL", 5), [(1, "Samsung Galaxy", "samsung-galaxy")])
+        self.assertEqual(index.search("creme", 5), [(2, "Café Crème", "cafe-creme")])
+        self.assertEqual(index.search("x", 5), [])
+
+        index.add(3, "Samsung Buds", "samsung-buds")
+        self.assertEqual([r[0] for r in index.search("samsung", 5)], [3, 1])
+        index.remove(1)
+        self.assertEqual([r[0] for r in index.search("samsung", 5)], [3])
+
+    def test_suggest_endpoint(self):
+        data = self.client.get(reverse("catalog:suggest"), {"q": "ga"}).json()
+        self.assertEqual(data["products"], [{"title": "Samsung Galaxy S24", "url": self.galaxy.get_absolute_url()}])
+        self.assertEqual(data["categories"], [])
+
+        data = self.client.get(reverse("catalog:suggest"), {"q": "pho"}).json()
+        self.assertEqual([c["name"] for c in data["categories"]], ["Phones"])
+        self.assertEqual(data["products"], [])  # inactive products are not suggested
+
+    def test_suggest_does_not_query_database_once_built(self):
+        suggest_index.sync()
+        with self.assertNumQueries(0):
+            self.client.get(reverse("catalog:suggest"), {"q": "goo"})
+
+    def test_other_workers_converge(self):
+        other_worker = SuggestIndex()
+        other_worker.sync()
+        self.assertEqual(other_worker.search("pix", 5)["products"][0]["title"], "Google Pixel")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pixel.title = "Google Pixel 9"
+            self.pixel.save()
+            self.galaxy.delete()
+        # The saving worker patched its own index; the other one applies the published changes
+        self.assertEqual(suggest_index.version, suggest_index.shared_version())
+        with self.assertNumQueries(0):
+            self.assertEqual(other_worker.search("pix", 5)["products"][0]["title"], "Google Pixel 9")
+            self.assertEqual(other_worker.search("gal", 5)["products"], [])
+        self.assertEqual(other_worker.version, suggest_index.version)
+
+    def test_incomplete_change_log_rebuilds_in_background(self):
+        other_worker = SuggestIndex()
+        other_worker.sync()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pixel.title = "Google Pixel 9"
+            self.pixel.save()
+        cache.delete(f"suggest:changes:{suggest_index.version}")  # evicted
+        with mock.patch.object(other_worker, "rebuild_in_background") as rebuild, self.assertNumQueries(0):
+            # Still answers, from the index it has
+            self.assertEqual(other_worker.search("pix", 5)["products"][0]["title"], "Google Pixel")
+        rebuild.assert_called_once_with(suggest_index.version)
+
+
+class FacetTest(TestCase):
+    """Test precomputed facet counts and facet filtering."""
+
+    def setUp(self):
+        self.phones = Category.objects.create(name="Phones", slug="phones")
+        self.bags = Category.objects.create(name="Bags", slug="bags")
+        self.phone = Product.objects.create(category=self.phones, title="Galaxy", price=Decimal("150000.00"))
+        self.cheap_phone = Product.objects.create(category=self.phones, title="Nokia", price=Decimal("8000.00"))
+        self.bag = Product.objects.create(category=self.bags, title="Tote", price=Decimal("2500.00"))
+        self.user = User.objects.create_user(username="shopper", email="shopper@example.com", password="pass12345")
+        self.client.force_login(self.user)
+
+    def counts(self):
+        return {key: n for key, n in precomputed_counts().items() if n}
+
+    def test_counts_follow_saves_and_deletes(self):
+        self.assertEqual(self.counts(), {
+            ("category", str(self.phones.pk)): 2,
+            ("category", str(self.bags.pk)): 1,
+            ("price", "100000-"): 1,
+            ("price", "5000-10000"): 1,
+            ("price", "0-5000"): 1,
+            ("active", "1"): 3,
+        })
+
+        self.cheap_phone.category = self.bags
+        self.cheap_phone.price = Decimal("60000.00")
+        self.cheap_phone.save()
+        self.bag.is_active = False
+        self.bag.save()
+        self.phone.delete()
+        # Instances loaded with deferred facet fields fall back to reading the stored row
+        deferred = Product.objects.only("id", "title").get(pk=self.cheap_phone.pk)
+        deferred.price = Decimal("70000.00")
+        deferred.save()
+
+        expected = {
+            ("category", str(self.bags.pk)): 1,
+            ("price", "50000-100000"): 1,
+            ("active", "1"): 1,
+            ("active", "0"): 1,
+        }
+        self.assertEqual(self.counts(), expected)
+        FacetCount.objects.update(count=0)
+        call_command("rebuild_facets", stdout=io.StringIO())
+        self.assertEqual(self.counts(), expected)
+
+    def test_loaded_product_diffs_against_its_row(self):
+        self.assertFalse(hasattr(Product(category=self.phones, title="Unsaved", price=1), "_facet_row"))
+        product = Product.objects.get(pk=self.cheap_phone.pk)
+        product.price = Decimal("60000.00")
+        with mock.patch("catalog.facets.snapshot_from_db") as reread:
+            product.save()
+        reread.assert_not_called()  # the old values came with the row
+        self.assertNotIn(("price", "5000-10000"), self.counts())
+        self.assertEqual(self.counts()[("price", "50000-100000")], 1)
+
+    def test_first_count_for_a_value_keeps_its_delta(self):
+        FacetCount.objects.filter(facet="price").delete()
+        apply_deltas({("price", "0-5000"): -1, ("price", "5000-10000"): 2})
+        self.assertEqual(FacetCount.objects.get(facet="price", value="0-5000").count, -1)
+        self.assertEqual(FacetCount.objects.get(facet="price", value="5000-10000").count, 2)
+
+    def test_scoped_counts(self):
+        counts = scoped_counts(Product.objects.filter(category=self.phones))
+        self.assertEqual(counts[("category", str(self.phones.pk))], 2)
+        self.assertNotIn(("category", str(self.bags.pk)), counts)
+        self.assertEqual(counts[("price", "0-5000")], 0)
+        self.assertEqual(counts[("active", "1")], 2)
+
+    def test_filtered_listing(self):
+        response = self.client.get(reverse("catalog:list"), {"category": "phones", "price": "5000-10000"})
+        self.assertEqual(list(response.context["page_obj"]), [self.cheap_phone])
+        # Counted over the filtered products, not the whole catalog
+        categories, prices, _ = response.context["facets"]
+        self.assertEqual([(o["label"], o["count"]) for o in categories["options"]], [("Phones", 1)])
+        self.assertEqual({o["value"]: o["count"] for o in prices["options"]}["100000-"], 0)
+        self.assertContains(response, "(1)")
+
+        response = self.client.get(reverse("catalog:product_list_by_category", args=["bags"]))
+        categories = response.context["facets"][0]
+        self.assertEqual([(o["label"], o["count"]) for o in categories["options"]], [("Bags", 1)])
+
+        data = self.client.get(reverse("catalog:list"), {"price": "0-5000", "format": "json"}).json()
+        self.assertEqual([p["slug"] for p in data["results"]], [self.bag.slug])
+
+    def test_facet_counts_do_not_count_products(self):
+        rebuild_facet_counts()
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse("catalog:list"))
+        facet_queries = [q["sql"] for q in ctx.captured_queries if "COUNT(" in q["sql"].upper()]
+        self.assertEqual(facet_queries, [])
+
+
+class CatalogAPITest(TestCase):
+    """Test the read-only catalog API."""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Phones", slug="phones")
+        self.products = [
+            Product.objects.create(category=self.category, title=f"Phone {i}", price=Decimal("1000.00"))
+            for i in range(3)
+        ]
+        for product in self.products:
+            ProductImage.objects.create(product=product, image=f"product_images/{product.slug}.jpg")
+        Product.objects.create(category=self.category, title="Hidden", price=Decimal("1.00"), is_active=False)
+        self.url = reverse("catalog:api-product-list")
+
+    def test_list_is_cursor_paginated(self):
+        data = self.client.get(self.url, {"page_size": 2}).json()
+        self.assertEqual(len(data["results"]), 2)
+        self.assertIsNotNone(data["next"])
+        rest = self.client.get(data["next"]).json()
+        self.assertEqual(len(rest["results"]), 1)  # inactive products are excluded
+        self.assertTrue(data["results"][0]["image"].endswith(".jpg"))
+
+    def test_sparse_fieldsets(self):
+        data = self.client.get(self.url, {"fields": "id,title"}).json()
+        self.assertEqual(set(data["results"][0]), {"id", "title"})
+
+        detail = self.client.get(reverse("catalog:api-product-detail", args=[self.products[0].slug]), {"fields": "slug"})
+        self.assertEqual(detail.json(), {"slug": self.products[0].slug})
+
+    def test_query_count_independent_of_page_size(self):
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(self.url, {"page_size": 1})
+        with CaptureQueriesContext(connection) as large:
+            self.client.get(self.url, {"page_size": 3})
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+
+    def test_conditional_get(self):
+        response = self.client.get(self.url)
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        self.assertNotEqual(self.client.get(self.url, {"fields": "id"})["ETag"], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.products[0].title = "Renamed"
+            self.products[0].save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_categories(self):
+        data = self.client.get(reverse("catalog:api-category-list"), {"fields": "name,slug"}).json()
+        self.assertEqual(data["results"], [{"name": "Phones", "slug": "phones"}])
+
+
+class ImportProductsTest(TestCase):
+    """Test the bulk import_products command."""
+
+    def setUp(self):
+        cache.clear()
+        self.phones = Category.objects.create(name="Phones", slug="phones")
+        self.existing = Product.objects.create(category=self.phones, title="Nokia", price=Decimal("8000.00"))
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+
+    def write(self, name, content):
+        path = f"{self.tmpdir}/{name}"
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def test_csv_import(self):
+        path = self.write("products.csv", (
+            "title,price,category,description\n"
+            "Nokia,9000,Phones,Duplicate title\n"
+            "Nokia,9500,phones,Another one\n"
+            "Samsung Galaxy,150000,Phones,Android flagship\n"
+            "Tote,2500,Bags,\n"
+            "Broken,abc,Phones,\n"
+        ))
+        out, err = io.StringIO(), io.StringIO()
+        call_command("import_products", path, chunk_size=2, stdout=out, stderr=err)
+        self.assertIn("3 created", out.getvalue())
+        self.assertIn("2 failed", out.getvalue())
+        self.assertIn("rows/s", out.getvalue())
+        self.assertIn("unknown category 'Bags'", err.getvalue())
+        self.assertEqual(
+            set(Product.objects.values_list("slug", flat=True)),
+            {"nokia", "nokia-2", "nokia-3", "samsung-galaxy"},
+        )
+        # Side effects that signals would normally handle
+        self.assertEqual(list(search_products("flagship")), [Product.objects.get(slug="samsung-galaxy")])
+        self.assertEqual(precomputed_counts()[("category", str(self.phones.pk))], 4)
+
+    def test_slug_collisions_checked_in_one_query(self):
+        Product.objects.create(category=self.phones, title="Tote", price=Decimal("2500.00"))
+        path = self.write("products.csv", (
+            "title,price,category\n"
+            "Nokia,9000,Phones\n"
+            "Tote,2500,Phones\n"
+            "Tote,2600,Phones\n"
+            "Pixel,90000,Phones\n"
+            "Pixel,95000,Phones\n"
+        ))
+        with CaptureQueriesContext(connection) as queries:
+            call_command("import_products", path, stdout=io.StringIO())
+        self.assertEqual(len([q for q in queries if "LIKE" in q["sql"] and "catalog_product" in q["sql"]]), 1)
+        self.assertEqual(
+            set(Product.objects.values_list("slug", flat=True)),
+            {"nokia", "nokia-2", "tote", "tote-2", "tote-3", "pixel", "pixel-2"},
+        )
+
+    def test_jsonl_update_and_create_categories(self):
+        path = self.write("products.jsonl", "\n".join([
+            '{"slug": "nokia", "title": "Nokia 3310", "price": "7000", "category": "Phones"}',
+            '{"title": "Tote", "price": 2500, "category": "Bags", "is_active": false}',
+        ]))
+        call_command("import_products", path, update=True, create_categories=True, stdout=io.StringIO())
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.title, "Nokia 3310")
+        tote = Product.objects.get(slug="tote")
+        self.assertEqual(tote.category.name, "Bags")
+        self.assertFalse(tote.is_active)
+        counts = precomputed_counts()
+        self.assertEqual(counts[("active", "0")], 1)
+        self.assertEqual(counts[("price", "5000-10000")], 1)
+
+
+    def test_bad_jsonl_rows_are_reported(self):
+        path = self.write("products.jsonl", "\n".join([
+            '[]',
+            '1',
+            '"Tote"',
+            '{"title": "Pixel", "price": "NaN", "category": "Phones"}',
+            '{"title": "Galaxy", "price": "Infinity", "category": "Phones"}',
+            '{"title": "Tecno", "price": "90000", "category": "Phones"}',
+        ]))
+        out, err = io.StringIO(), io.StringIO()
+        call_command("import_products", path, stdout=out, stderr=err)
+        self.assertIn("1 created", out.getvalue())
+        self.assertIn("5 failed", out.getvalue())
+        self.assertIn("line 1: expected a JSON object, got list", err.getvalue())
+        self.assertIn("invalid price 'NaN'", err.getvalue())
+        self.assertEqual(set(Product.objects.values_list("slug", flat=True)), {"nokia", "tecno"})
+
+
+class ConditionalGetTest(TestCase):
+    """Test ETag/Last-Modified handling on the catalog pages."""
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Shoes", slug="shoes")
+        self.product = Product.objects.create(category=self.category, title="Sneaker", price=Decimal("9000.00"))
+        self.user = User.objects.create_user(username="shopper", email="shopper@example.com", password="pass12345")
+
+    def assertRevalidates(self, url, change):
+        self.client.get(url)  # the first visit sets the CSRF cookie, which is part of the validator
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        change()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def rename(self):
+        self.product.title = "Sneaker v2"
+        self.product.save()
+
+    def test_home_last_modified_for_anonymous_visitors(self):
+        response = self.client.get(reverse("core:home"))
+        self.assertEqual(
+            self.client.get(reverse("core:home"), HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]).status_code, 304
+        )
+        self.assertRevalidates(reverse("core:home"), self.rename)
+
+    def test_catalog_pages_revalidate(self):
+        self.client.force_login(self.user)
+        self.assertRevalidates(self.product.get_absolute_url(), self.rename)
+        self.assertRevalidates(
+            reverse("catalog:category_list_by_category", args=[self.category.slug]),
+            lambda: ProductImage.objects.create(product=self.product, image="product_images/sneaker.jpg"),
+        )
+        self.assertRevalidates(
+            reverse("catalog:list"), lambda: CategoryImage.objects.create(category=self.category, image="category_images/shoes.jpg")
+        )
+
+    def test_not_modified_skips_rendering(self):
+        self.client.force_login(self.user)
+        url = reverse("catalog:category_list_by_category", args=[self.category.slug])
+        self.client.get(url)
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.templates, [])
+
+    def test_listing_revalidation_skips_catalog_queries(self):
+        self.client.force_login(self.user)
+        url = reverse("catalog:list")
+        self.client.get(url)
+        etag = self.client.get(url)["ETag"]
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertFalse([q for q in queries if "catalog_" in q["sql"]])
+
+    def test_validator_is_per_visitor(self):
+        etag = self.client.get(reverse("core:home"))["ETag"]
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("core:home"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("Last-Modified"))
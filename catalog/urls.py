@@ -1,11 +1,19 @@
-from django.urls import path
-from .views import product_list, product_detail, search_product, category_list
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import product_list, product_detail, search_product, category_list, suggest
+from .api import ProductViewSet, CategoryViewSet
 
 app_name = 'catalog'
 
+router = DefaultRouter()
+router.register('products', ProductViewSet, basename='api-product')
+router.register('categories', CategoryViewSet, basename='api-category')
+
 urlpatterns = [
     path('', product_list, name='list'),
     path('search-result/', search_product, name='search'),
+    path('api/suggest/', suggest, name='suggest'),
+    path('api/', include(router.urls)),
     path('<slug:slug>/', product_detail, name='detail'),
     path("product/<slug:category_slug>/", product_list, name="product_list_by_category"),
     path("category/<slug:category_slug>/", category_list, name="category_list_by_category"),
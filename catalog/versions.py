@@ -0,0 +1,40 @@
+"""
+A single "catalog last changed" marker shared by all workers through the cache.
+
+Any save or delete of a product, category or image bumps it (after commit), so
+responses derived from catalog data can use it as a cheap validator for
+ETag / Last-Modified without querying the catalog tables.
+"""
+
+import time
+from django.core.cache import cache
+from django.dispatch import Signal
+from django.utils import timezone
+from shop import cache as tiered
+
+VERSION_KEY = "catalog:version"
+
+# Sent with ``generation="product"`` or ``"category"`` once a change has
+# committed and that shop.cache generation has been bumped: the place to
+# refresh precomputed data, such as the home feed, ahead of the next request.
+changed = Signal()
+
+
+def current():
+    """``{"version": int, "modified": datetime}`` for the latest catalog change."""
+    state = cache.get(VERSION_KEY)
+    if state is None:
+        # Cold cache: we can't know when the catalog last changed, so assume "now"
+        cache.add(VERSION_KEY, {"version": time.time_ns(), "modified": timezone.now()}, timeout=None)
+        state = cache.get(VERSION_KEY)
+    return state
+
+
+def bump():
+    cache.set(VERSION_KEY, {"version": time.time_ns(), "modified": timezone.now()}, timeout=None)
+
+
+def committed(generation):
+    """Bump ``generation`` for a committed change and send ``changed``."""
+    tiered.bump(generation)
+    changed.send(sender=None, generation=generation)
@@ -1,76 +1,132 @@
 from django.shortcuts import render, get_object_or_404
-from .models import Product, Category
+from .models import Product, Category, CategoryImage
+from django.db.models import Prefetch
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import Q
+from .search import search_products
 from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from .pagination import KeysetPaginator
+from .suggest import suggest_index
+from .facets import apply_filters, facet_groups, precomputed_counts, scoped_counts
+from .conditional import conditional_page, versions, latest
+from . import versions as catalog_versions
+from shop import cache
 
 
-@login_required
-def category_list(request, category_slug=None):
-    category = None
+LISTING_PAGE_SIZE = 20
+
+# Category cards show at most six gallery images; fetch them for all categories in one query
+CATEGORY_PREVIEW_IMAGES = Prefetch(
+    'images', queryset=CategoryImage.objects.order_by('id')[:6], to_attr='preview_images'
+)
+
+
+def _product_card_data(product):
+    first_image = product.primary_image
+    return {
+        'id': product.id,
+        'title': product.title,
+        'slug': product.slug,
+        'price': str(product.price),
+        'url': product.get_absolute_url(),
+        'image': first_image.image.url if first_image else None,
+    }
+
+
+def _keyset_listing(request, products, template_name, context):
+    """
+    Render one cursor-paginated page of ``products``.
+
+    ``?format=json`` returns the page as JSON and ``?partial=1`` returns just the
+    product cards, both for infinite scroll; otherwise the full template is rendered.
+    """
+    page_obj = KeysetPaginator(products.select_related('primary_image'), LISTING_PAGE_SIZE).page(request.GET.get("cursor"))
+
+    if request.GET.get("format") == "json":
+        return JsonResponse({
+            'results': [_product_card_data(p) for p in page_obj],
+            'next': page_obj.next_cursor,
+            'previous': page_obj.previous_cursor,
+            'count': page_obj.count,
+        })
+    if request.GET.get("partial"):
+        response = render(request, 'catalog/partials/product_cards.html', {'products': page_obj})
+        if page_obj.next_cursor:
+            response['X-Next-Cursor'] = page_obj.next_cursor
+        return response
+
+    context['page_obj'] = page_obj
+    return render(request, template_name, context)
+
+
+def listing_products(params, category=None):
+    """
+    The products a listing shows for the GET ``params`` (optionally within one
+    ``category``), and the selected facets. Shared with the benchmark_templates
+    and check_query_plans commands so they measure the real query.
+    """
     products = Product.objects.all()
-    categories = Category.objects.all()
-    
-    if category_slug:
-        category = get_object_or_404(Category, slug=category_slug)
-        products = products.filter(category=category, is_active=True).order_by('-id')
-        
-    # products = Product.objects.all().order_by('-id')   # or any ordering you prefer
-    paginator = Paginator(products, 20)  # 12 products per page
-    page_number = request.GET.get("page")
-    try:
-        page_obj = paginator.get_page(page_number)
-    except PageNotAnInteger:
-        # If page is not an integer, deliver first page.
-        page_obj = paginator.page(1)
-    except EmptyPage:
-        # If page is out of range (e.g. 9999), deliver last page of results.
-        page_obj = paginator.page(paginator.num_pages)
-        
-    return render(request, 'catalog/category_list.html', {
+    if category is not None:
+        products = products.filter(category=category, is_active=True)
+    return apply_filters(products, params)
+
+
+def _listing_validator(request, category_slug=None):
+    """
+    Validate listings on the catalog generations instead of the page's rows: any
+    product, category or image change bumps them, so a 304 costs one cache lookup
+    and no catalog query. An unrelated change only costs a full render.
+    """
+    generations = cache.generations(cache.CATALOG)
+    return [sorted(generations.items())], catalog_versions.current()["modified"]
+
+
+def _listing(request, category_slug, template_name):
+    category = get_object_or_404(Category, slug=category_slug) if category_slug else None
+    products, selected = listing_products(request.GET, category)
+    # The precomputed counts cover the whole catalog; a narrowed listing counts its own products
+    counts = scoped_counts(products) if category or selected else precomputed_counts()
+    return _keyset_listing(request, products, template_name, {
         'products': products,
-        'categories': categories,
+        'categories': Category.objects.prefetch_related(CATEGORY_PREVIEW_IMAGES),
         'category': category,
-        'page_obj': page_obj
+        'facets': facet_groups(request.GET, selected, counts),
+        'selected_facets': selected,
     })
 
 @login_required
+@conditional_page(_listing_validator)
+def category_list(request, category_slug=None):
+    return _listing(request, category_slug, 'catalog/category_list.html')
+
+@login_required
+@conditional_page(_listing_validator)
 def product_list(request, category_slug=None):
-    category = None
-    products = Product.objects.all()
-    categories = Category.objects.all()
-    
-    if category_slug:
-        category = get_object_or_404(Category, slug=category_slug)
-        products = products.filter(category=category, is_active=True).order_by('-id')
-    
-    # products = Product.objects.all().order_by('-id')   # or any ordering you prefer
-    paginator = Paginator(products, 20)  # 12 products per page
-    page_number = request.GET.get("page")
-    try:
-        page_obj = paginator.get_page(page_number)
-    except PageNotAnInteger:
-        # If page is not an integer, deliver first page.
-        page_obj = paginator.page(1)
-    except EmptyPage:
-        # If page is out of range (e.g. 9999), deliver last page of results.
-        page_obj = paginator.page(paginator.num_pages)
+    return _listing(request, category_slug, 'catalog/list.html')
+
 
-    return render(request, 'catalog/list.html', {'products': products, 'categories': categories, 'page_obj': page_obj, 'category': category})
+def _detail_validator(request, slug):
+    rows = versions(Product.objects.filter(slug=slug, is_active=True))
+    return [rows], latest(rows)
 
 @login_required
+@conditional_page(_detail_validator)
 def product_detail(request, slug):
-    product = get_object_or_404(Product, slug=slug, is_active=True)
+    product = get_object_or_404(
+        Product.objects.select_related('primary_image').prefetch_related('images'), slug=slug, is_active=True
+    )
     return render(request, 'catalog/detail.html', {'product': product})
 
 @login_required
 def search_product(request):
     query = request.GET.get("q", "")
-    products = Product.objects.all()
+    products = Product.objects.select_related('primary_image')
 
     if query:
-        products = products.filter(Q(title__icontains=query) |
-                                   Q(description__icontains=query)).distinct() # adjust field as needed
+        products = search_products(query, products)  # ranked, served from the full-text index
+    products, selected = apply_filters(products, request.GET)
+    # Catalog-wide counts are precomputed; search results and filtered pages count their own matches
+    counts = scoped_counts(products) if query or selected else precomputed_counts()
 
     paginator = Paginator(products, 20)  # 12 results per page
     page_number = request.GET.get("page")
@@ -85,4 +141,26 @@ def search_product(request):
         # If page is out of range (e.g. 9999), deliver last page of results.
         page_obj = paginator.page(paginator.num_pages)
 
-    return render(request, 'catalog/search.html', {'products': products, 'query': query, 'page_obj': page_obj})
\ No newline at end of file
+    return render(request, 'catalog/search.html', {
+        'products': products,
+        'query': query,
+        'page_obj': page_obj,
+        'facets': facet_groups(request.GET, selected, counts),
+        'selected_facets': selected,
+    })
+
+
+def suggest(request):
+    """
+    Search-as-you-type endpoint served from the in-memory prefix index.
+    GET parameters:
+    - q: the prefix typed so far
+    - limit: max results per group (default 8, max 20)
+    """
+    query = request.GET.get("q", "").strip()
+    try:
+        limit = min(max(int(request.GET.get("limit", 8)), 1), 20)
+    except ValueError:
+        limit = 8
+    results = suggest_index.search(query, limit) if query else {'products': [], 'categories': []}
+    return JsonResponse({'query': query, **results})
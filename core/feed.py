@@ -0,0 +1,57 @@
+"""
+The materialized home-page feed.
+
+The home page shows the newest active products. Rather than querying and
+rendering them on every hit, the feed is stored in shop.cache as one value:
+the ordered product ids, each product's card HTML rendered in advance, and
+the validator data for ETag / Last-Modified. It is keyed on the "product"
+generation, so any product or image change makes the next read miss.
+
+Rebuilds happen:
+- in the job worker, queued once a product or image change commits
+  (core.signals; one queued rebuild covers any number of changes), so visitors
+  normally find it warm;
+- from ``manage.py build_home_feed``, to run on a schedule;
+- on a read that misses (cold cache, or a change that bypassed signals).
+
+A warm read is one shared-cache round trip (the generation check) and no
+database queries.
+"""
+
+import hashlib
+from django.template.loader import render_to_string
+from django.utils import timezone
+from catalog.models import Product
+from shop import cache
+
+FEED_KEY = "core:home-feed"
+FEED_SIZE = 40
+DEPENDS_ON = ("product",)
+FEED_TIMEOUT = 24 * 60 * 60  # superseded entries age out; a scheduled rebuild refreshes the live one
+
+
+def home_products():
+    return Product.objects.filter(is_active=True).order_by('-created_at', '-id')[:FEED_SIZE]
+
+
+def build():
+    """Query and render the feed."""
+    products = list(home_products().select_related('primary_image'))
+    rows = [(p.id, p.updated_at) for p in products]
+    return {
+        "ids": [p.id for p in products],
+        "cards": [render_to_string("catalog/partials/product_card.html", {"product": p}) for p in products],
+        "signature": hashlib.md5(repr(rows).encode()).hexdigest(),
+        "modified": max((updated_at for _, updated_at in rows), default=None),
+        "built_at": timezone.now(),
+    }
+
+
+def get():
+    return cache.get_or_set(FEED_KEY, build, DEPENDS_ON, FEED_TIMEOUT)
+
+
+def rebuild():
+    feed = build()
+    cache.put(FEED_KEY, feed, DEPENDS_ON, FEED_TIMEOUT)
+    return feed
@@ -0,0 +1,22 @@
+from django.core.mail import EmailMessage
+from jobs.queue import job
+from shop import mail, sitemaps
+from . import feed
+
+
+@job()
+def send_email(subject, message, from_email, recipient_list):
+    """Plain-text email from a view (sign-up, password reset, contact form), sent off the request path."""
+    mail.send(EmailMessage(subject, message, from_email, recipient_list))
+
+
+@job(unique=True)
+def rebuild_home_feed():
+    """Refresh the materialized home feed (core.feed) after products change."""
+    feed.rebuild()
+
+
+@job(unique=True)
+def build_sitemaps():
+    """Rewrite the sitemap sections whose products or categories changed (shop.sitemaps)."""
+    sitemaps.build()
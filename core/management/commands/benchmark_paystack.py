@@ -0,0 +1,88 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from shop.payments.fake_paystack import Behaviour, start
+from shop.payments.paystack import CircuitBreaker, PaystackClient, PaystackUnavailable
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the Paystack client: concurrent initialize + verify calls against a fake Paystack "
+        "server started in-process (or --url), reporting latency percentiles, errors and how often "
+        "the circuit breaker failed calls fast."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", help="Use this server instead of starting a fake one.")
+        parser.add_argument("--calls", type=int, default=200, help="Checkouts to simulate (default 200).")
+        parser.add_argument("--concurrency", type=int, default=10, help="Parallel callers (default 10).")
+        parser.add_argument("--latency", type=float, default=0.05, help="Fake server latency in seconds.")
+        parser.add_argument("--failure-rate", type=float, default=0, help="Fake server failure fraction (0-1).")
+        parser.add_argument("--hang-rate", type=float, default=0, help="Fake server stall fraction (0-1).")
+
+    def handle(self, *args, **options):
+        server = None
+        url = options["url"]
+        if not url:
+            server = start(Behaviour(
+                latency=options["latency"], failure_rate=options["failure_rate"],
+                hang_rate=options["hang_rate"], hang=settings.PAYSTACK_READ_TIMEOUT + 1,
+            ))
+            url = server.url
+        client = PaystackClient(
+            "sk_test_benchmark",
+            base_url=url,
+            connect_timeout=settings.PAYSTACK_CONNECT_TIMEOUT,
+            read_timeout=settings.PAYSTACK_READ_TIMEOUT,
+            retries=settings.PAYSTACK_RETRIES,
+            pool_size=options["concurrency"],
+            breaker=CircuitBreaker(settings.PAYSTACK_BREAKER_THRESHOLD, settings.PAYSTACK_BREAKER_RESET),
+        )
+
+        def timed(call, *args):
+            started = time.perf_counter()
+            try:
+                call(*args)
+                outcome = "ok"
+            except PaystackUnavailable as e:
+                outcome = "circuit open" if "circuit open" in str(e) else "unavailable"
+            except Exception:
+                outcome = "error"
+            return outcome, (time.perf_counter() - started) * 1000
+
+        def checkout(i):
+            """Initialize a payment and, if that worked, verify it as the callback view would."""
+            reference = f"load_{i}_{time.time_ns()}"
+            results = {"initialize": timed(
+                client.initialize_transaction, {"email": f"load{i}@example.com", "amount": 250000, "reference": reference}
+            )}
+            if results["initialize"][0] == "ok":
+                results["verify"] = timed(client.verify_transaction, reference)
+            return results
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options["concurrency"]) as pool:
+            checkouts = list(pool.map(checkout, range(options["calls"])))
+        elapsed = time.perf_counter() - started
+
+        for call in ("initialize", "verify"):
+            results = [result[call] for result in checkouts if call in result]
+            if not results:
+                self.stdout.write(f"{call}: no calls")
+                continue
+            timings = sorted(ms for _, ms in results)
+            outcomes = {}
+            for outcome, _ in results:
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+            self.stdout.write(
+                f"{call}: median {statistics.median(timings):.1f} ms, p95 {timings[max(int(len(timings) * 0.95) - 1, 0)]:.1f} ms, "
+                f"max {timings[-1]:.1f} ms; outcomes: " + ", ".join(f"{name} {count}" for name, count in sorted(outcomes.items()))
+            )
+        if server:
+            self.stdout.write(f"server saw {server.requests} requests on {server.connections} connections")
+            server.shutdown()
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['calls']} checkouts in {elapsed:.1f}s ({options['calls'] / elapsed:.0f}/s)."
+        ))
@@ -0,0 +1,119 @@
+import statistics
+import time
+from decimal import Decimal
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template.loader import get_template
+from django.test import RequestFactory
+from catalog.facets import facet_groups, precomputed_counts, rebuild_facet_counts
+from catalog.models import Category, Product
+from catalog.pagination import KeysetPaginator
+from catalog.views import CATEGORY_PREVIEW_IMAGES, LISTING_PAGE_SIZE, listing_products
+from core import feed
+from orders.cart import Cart
+from orders.forms import CheckoutForm
+from orders.shipping import get_all_shipping_options
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the rendering of core/home.html, catalog/list.html and orders/checkout.html with "
+        "realistic contexts (a sample catalog and a three-item cart, created in a transaction "
+        "that is rolled back). Database work is done before timing starts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50, help="Warm renders per template (default 50).")
+        parser.add_argument("--products", type=int, default=60, help="Sample products to create (default 60).")
+        parser.add_argument(
+            "--no-fragment-cache", action="store_true",
+            help="Clear the layout fragment cache before every render, to measure what it saves.",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.create_sample(options["products"])
+            request = self.request()
+            results = [self.benchmark(name, context, request, options) for name, context in self.contexts(request)]
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{'template':<24} {'first ms':>9} {'min ms':>8} {'median':>8} {'p95':>8} {'KiB':>7}")
+        for name, first, timings, size in results:
+            p95 = timings[int(len(timings) * 0.95) - 1] if len(timings) > 1 else timings[0]
+            self.stdout.write(
+                f"{name:<24} {first:>9.2f} {timings[0]:>8.2f} {statistics.median(timings):>8.2f} {p95:>8.2f} {size / 1024:>7.1f}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{options['iterations']} renders per template, fragment cache "
+            f"{'disabled' if options['no_fragment_cache'] else 'enabled'}."
+        ))
+
+    def create_sample(self, count):
+        categories = [Category.objects.create(name=f"Benchmark category {i}") for i in range(8)]
+        Product.objects.bulk_create([
+            Product(
+                category=categories[i % len(categories)],
+                title=f"Benchmark product {i} with a realistically long title",
+                slug=f"benchmark-product-{i}",
+                description="Lorem ipsum dolor sit amet. " * 20,
+                price=Decimal(1500 + 997 * i),
+            )
+            for i in range(count)
+        ])
+        rebuild_facet_counts()  # bulk_create skips the signals that maintain them
+
+    def request(self):
+        # RequestFactory's default host, testserver, isn't in ALLOWED_HOSTS outside the test runner
+        request = RequestFactory().get("/", HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        SessionMiddleware(lambda r: None).process_request(request)
+        request.user = AnonymousUser()
+        cart = Cart(request)
+        for product in Product.objects.order_by("-id")[:3]:
+            cart.add(product.id, 2)
+        return request
+
+    def contexts(self, request):
+        yield "core/home.html", {"feed": feed.build()}
+
+        products, selected = listing_products(request.GET)
+        page = KeysetPaginator(products.select_related("primary_image"), LISTING_PAGE_SIZE).page(None)
+        page.object_list = list(page.object_list)
+        yield "catalog/list.html", {
+            "products": products,
+            "categories": list(Category.objects.prefetch_related(CATEGORY_PREVIEW_IMAGES)),
+            "category": None,
+            "facets": facet_groups(request.GET, selected, precomputed_counts()),
+            "selected_facets": selected,
+            "page_obj": page,
+        }
+
+        cart = Cart(request)
+        items = list(cart.items())
+        subtotal = sum(item["price"] * item["quantity"] for item in items)
+        yield "orders/checkout.html", {
+            "form": CheckoutForm(),
+            "cart_items": items,
+            "totals": cart.totals(),
+            "shipping_options": get_all_shipping_options(items, None, subtotal),
+            "selected_shipping_method": "standard",
+        }
+
+    def benchmark(self, name, context, request, options):
+        fragments = caches["templates"]
+        fragments.clear()
+        started = time.perf_counter()
+        template = get_template(name)
+        html = template.render(context, request)
+        first = (time.perf_counter() - started) * 1000
+        timings = []
+        for _ in range(options["iterations"]):
+            if options["no_fragment_cache"]:
+                fragments.clear()
+            started = time.perf_counter()
+            template.render(context, request)
+            timings.append((time.perf_counter() - started) * 1000)
+        return name, first, sorted(timings), len(html.encode())
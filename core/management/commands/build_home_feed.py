@@ -0,0 +1,17 @@
+import time
+from django.core.management.base import BaseCommand
+from core import feed
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the materialized home-page feed. Changes made through the models rebuild it "
+        "automatically; schedule this (e.g. every 10 minutes) to cover bulk changes made in SQL."
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        home_feed = feed.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt the home feed: {len(home_feed['ids'])} products in {time.monotonic() - started:.2f}s."
+        ))
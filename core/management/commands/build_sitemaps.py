@@ -0,0 +1,24 @@
+import time
+from django.core.management.base import BaseCommand
+from shop.sitemaps import build, output_dir
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the sitemap index and gzip sections, rewriting only the sections whose products "
+        "changed since the last run. Catalog changes queue the same build as a job; run this for "
+        "the first build or with --full."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Rewrite every section.")
+        parser.add_argument("--domain", help="Domain for the URLs (default: settings.SITEMAP_DOMAIN).")
+        parser.add_argument("--protocol", help="Protocol for the URLs (default: settings.SITEMAP_PROTOCOL).")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        rewritten, removed = build(full=options["full"], domain=options["domain"], protocol=options["protocol"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rewrote {len(rewritten)} sitemap sections, removed {len(removed)}, "
+            f"in {time.monotonic() - started:.1f}s ({output_dir()})."
+        ))
@@ -0,0 +1,87 @@
+import re
+from datetime import datetime, timezone
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.http import QueryDict
+from catalog.facets import apply_filters
+from catalog.models import Category, Product
+from catalog.pagination import KeysetPaginator, encode_cursor
+from catalog.search import search_products
+from catalog.views import LISTING_PAGE_SIZE, listing_products
+from core.feed import home_products
+from orders.models import Order
+
+CATEGORY = Category(pk=1, slug="example")
+CURSOR = encode_cursor(Product(pk=1000, created_at=datetime(2024, 1, 1, tzinfo=timezone.utc)), "n")
+
+
+def listing(query="", category=None, cursor=None):
+    """The page query catalog.views runs for a listing with GET ``query``."""
+    products, _ = listing_products(QueryDict(query), category)
+    return KeysetPaginator(products.select_related("primary_image"), LISTING_PAGE_SIZE).window(cursor)
+
+
+def search(query):
+    """The first-page query of catalog.views.search_product (20 per page) for GET ``query``."""
+    params = QueryDict(query)
+    products = search_products(params["q"], Product.objects.select_related("primary_image"))
+    products, _ = apply_filters(products, params)
+    return products[:20]
+
+
+# The queries behind the busiest pages, built by the same helpers the views use
+HOT_QUERIES = {
+    "core.feed (home page)": lambda: home_products().select_related("primary_image"),
+    "catalog.views.category_list (all products)": lambda: listing(),
+    "catalog.views.category_list (one category)": lambda: listing(category=CATEGORY),
+    "catalog.views.category_list (next page)": lambda: listing(category=CATEGORY, cursor=CURSOR),
+    "catalog.views.product_list (price facet)": lambda: listing("price=5000-10000"),
+    "catalog.views.product_list (category facet)": lambda: listing("category=example"),
+    "catalog.views.search_product": lambda: search("q=phone"),
+    "catalog.views.search_product (price facet)": lambda: search("q=phone&price=5000-10000"),
+    "catalog.views.product_detail": lambda: Product.objects.filter(slug="example", is_active=True),
+    "orders.views.verify_paystack": lambda: Order.objects.filter(stripe_payment_intent="order_1").order_by("pk")[:1],
+    "orders by status": lambda: Order.objects.filter(status="paid").order_by("-created_at")[:50],
+    "orders by email": lambda: Order.objects.filter(email="customer@example.com").order_by("-created_at")[:50],
+}
+
+FULL_SCAN_PATTERNS = {
+    # "SCAN t" is a full table scan; "SCAN t USING INDEX i" walks an index in order
+    "sqlite": re.compile(r"\bSCAN (\w+)(?! USING)\s*$", re.MULTILINE),
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+}
+
+
+def full_scans(plan, vendor=None):
+    """Names of the tables ``plan`` reads with a full scan."""
+    return FULL_SCAN_PATTERNS[vendor or connection.vendor].findall(plan)
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the hot catalog and order queries and fail if any of them falls back to a full table scan."
+
+    def handle(self, *args, **options):
+        if connection.vendor not in FULL_SCAN_PATTERNS:
+            self.stdout.write(self.style.WARNING(f"Query plan check is not supported on {connection.vendor}."))
+            return
+
+        failures = []
+        for name, build in HOT_QUERIES.items():
+            with transaction.atomic():
+                if connection.vendor == "postgresql":
+                    # On small tables Postgres rightly prefers a seq scan; we want to know whether an index *could* be used
+                    with connection.cursor() as cursor:
+                        cursor.execute("SET LOCAL enable_seqscan = off")
+                plan = build().explain()
+            scans = full_scans(plan)
+            if scans:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"FULL SCAN  {name}: {', '.join(scans)}"))
+            else:
+                self.stdout.write(f"ok         {name}")
+            if options["verbosity"] > 1 or scans:
+                self.stdout.write("    " + plan.replace("\n", "\n    "))
+
+        if failures:
+            raise CommandError(f"{len(failures)} hot queries fall back to a full table scan: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS(f"All {len(HOT_QUERIES)} hot queries use an index."))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from shop.compression import report, reset_report
+
+
+class Command(BaseCommand):
+    help = "Show the bytes saved by response compression, per route, since the counters were last reset."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Clear the counters after printing them.")
+
+    def handle(self, *args, **options):
+        rows = report()
+        if not rows:
+            self.stdout.write("No compressed responses recorded yet.")
+            return
+        rows = sorted(rows.items(), key=lambda item: item[1]["original"] - item[1]["sent"], reverse=True)
+        self.stdout.write(f"{'route':<40} {'responses':>10} {'original':>12} {'sent':>12} {'saved':>7}")
+        total_in = total_out = 0
+        for route, counts in rows:
+            total_in += counts["original"]
+            total_out += counts["sent"]
+            self.stdout.write(
+                f"{route:<40} {counts['responses']:>10} {counts['original']:>12} {counts['sent']:>12} "
+                f"{_saved(counts['original'], counts['sent']):>7}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Total: {total_in} bytes compressed to {total_out} ({_saved(total_in, total_out)} saved)."
+        ))
+        if options["reset"]:
+            reset_report()
+
+
+def _saved(original, sent):
+    return f"{100 * (original - sent) / original:.0f}%" if original else "-"
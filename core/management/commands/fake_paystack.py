@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from shop.payments.fake_paystack import Behaviour, FakePaystackServer
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local fake of the Paystack API (initialize and verify) with adjustable latency and "
+        "injected failures. Point PAYSTACK_BASE_URL at it to exercise checkout, or load-test the "
+        "client with benchmark_paystack."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default 8765).")
+        parser.add_argument("--latency", type=float, default=0.1, help="Seconds added to every response (default 0.1).")
+        parser.add_argument("--jitter", type=float, default=0.05, help="Up to this many extra seconds, at random.")
+        parser.add_argument("--failure-rate", type=float, default=0, help="Fraction of requests that fail (0-1).")
+        parser.add_argument("--failure-status", type=int, default=503, help="Status for failed requests (default 503).")
+        parser.add_argument("--hang-rate", type=float, default=0, help="Fraction of requests that stall (0-1).")
+        parser.add_argument("--hang", type=float, default=30, help="Seconds a stalled request waits (default 30).")
+        parser.add_argument("--verbose", action="store_true", help="Log every request.")
+
+    def handle(self, *args, **options):
+        behaviour = Behaviour(
+            latency=options["latency"],
+            jitter=options["jitter"],
+            failure_rate=options["failure_rate"],
+            failure_status=options["failure_status"],
+            hang_rate=options["hang_rate"],
+            hang=options["hang"],
+        )
+        server = FakePaystackServer(("127.0.0.1", options["port"]), behaviour, verbose=options["verbose"])
+        self.stdout.write(self.style.SUCCESS(f"Fake Paystack listening on {server.url} (Ctrl-C to stop)."))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        self.stdout.write(f"Served {server.requests} requests on {server.connections} connections.")
@@ -0,0 +1,43 @@
+import time
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired database sessions in small batches. Unlike clearsessions, which deletes "
+        "every expired row in one statement, each batch is its own short transaction, so the "
+        "session table is never locked for long. Schedule it (e.g. hourly)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows deleted per statement (default 1000).")
+        parser.add_argument("--sleep", type=float, default=0, help="Seconds to pause between batches.")
+        parser.add_argument("--max-batches", type=int, help="Stop after this many batches (default: until done).")
+
+    def handle(self, *args, **options):
+        if settings.SESSION_ENGINE not in ("django.contrib.sessions.backends.db", "django.contrib.sessions.backends.cached_db"):
+            self.stdout.write(self.style.WARNING(f"SESSION_ENGINE is {settings.SESSION_ENGINE}; no session table to prune."))
+            return
+
+        started = time.monotonic()
+        now = timezone.now()
+        deleted = batches = 0
+        while options["max_batches"] is None or batches < options["max_batches"]:
+            # Select the keys first: DELETE ... LIMIT isn't portable, and a primary-key
+            # IN list keeps each delete to exactly the rows chosen
+            keys = list(
+                Session.objects.filter(expire_date__lt=now).values_list("session_key", flat=True)[: options["batch_size"]]
+            )
+            if not keys:
+                break
+            deleted += Session.objects.filter(pk__in=keys).delete()[0]
+            batches += 1
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} expired sessions in {batches} batches ({time.monotonic() - started:.1f}s)."
+        ))
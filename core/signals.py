@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.dispatch import receiver
+from catalog import versions
+from .jobs import build_sitemaps, rebuild_home_feed
+
+
+@receiver(versions.changed)
+def queue_home_feed_rebuild(sender, generation, **kwargs):
+    """
+    Re-render the home feed in the background after a product change commits, so
+    visitors don't pay for the rebuild. One queued rebuild covers any number of
+    changes (a bulk edit, an admin save with inline images, a run of image variants).
+    """
+    if generation == "product":
+        rebuild_home_feed.enqueue()  # a unique job: no-op while one is waiting
+
+
+@receiver(versions.changed)
+def queue_sitemap_build(sender, generation, **kwargs):
+    """Rebuild the changed sitemap sections shortly after a product or category change commits."""
+    if generation in ("product", "category"):
+        build_sitemaps.enqueue_in(settings.SITEMAP_BUILD_DELAY)  # unique: later changes join the waiting build
@@ -0,0 +1,197 @@
+"""
+Optimized variants of the site's own static images (logo, favicon, backgrounds).
+
+``collectstatic`` runs OptimizedStaticFilesStorage.post_process, which, before
+the usual hashing and compression, writes for every PNG/JPEG under ``img/``:
+- resized copies at each of VARIANT_WIDTHS narrower than the original (plus
+  the original width), as AVIF (when Pillow supports it), WebP and an
+  optimized PNG/JPEG fallback:
+      img/jagoftrade.png -> img/variants/jagoftrade-256w.webp
+- ``img/favicon.ico`` (16, 32 and 48 px) and ``img/apple-touch-icon.png``
+  from FAVICON_SOURCE.
+
+The generated files then go through the manifest storage like any other
+static file, so they get content-hashed names and far-future caching.
+``static-images.json`` records which widths and formats exist for each image;
+the ``static_image`` and ``favicon_links`` template tags read it to pick the
+smallest variant that still covers the displayed size. Without it
+(development, or before collectstatic has run) they fall back to the original
+files.
+"""
+
+import io
+import json
+import logging
+import posixpath
+import time
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+logger = logging.getLogger(__name__)
+
+IMAGE_DIR = "img/"
+SOURCE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+VARIANT_WIDTHS = (32, 64, 128, 256, 512, 1024, 1600)
+VARIANT_FORMATS = {
+    # format: (extension, Pillow save options)
+    "avif": ("avif", {"quality": 55}),
+    "webp": ("webp", {"quality": 80, "method": 4}),
+    "png": ("png", {"optimize": True}),
+    "jpeg": ("jpg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+FAVICON_SOURCE = "img/jagoftrade.png"
+FAVICON_NAME = "img/favicon.ico"
+FAVICON_SIZES = (16, 32, 48)
+TOUCH_ICON_NAME = "img/apple-touch-icon.png"
+TOUCH_ICON_SIZE = 180
+MANIFEST_NAME = "static-images.json"
+MANIFEST_RETRY = 30  # seconds before looking again for a manifest that wasn't there
+
+
+def output_formats(name):
+    """Formats to produce for ``name``, best compression first; the last one is the universal fallback."""
+    modern = ["avif", "webp"] if features.check("avif") else ["webp"]
+    return modern + ["png" if name.lower().endswith(".png") else "jpeg"]
+
+
+def variant_name(name, width, fmt):
+    directory, filename = posixpath.split(name)
+    stem, _ = posixpath.splitext(filename)
+    return posixpath.join(directory, "variants", f"{stem}-{width}w.{VARIANT_FORMATS[fmt][0]}")
+
+
+def _encode(image, fmt, **options):
+    if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+        # JPEG has no alpha channel: flatten onto white
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.convert("RGBA").getchannel("A"))
+        image = background
+    elif fmt == "png" and image.mode in ("RGB", "RGBA"):
+        # A 256-colour palette (with alpha) is what makes PNG fallbacks small; the
+        # originals are logos and icons, where the loss isn't visible
+        image = image.quantize(256, method=Image.Quantize.FASTOCTREE)
+    buffer = io.BytesIO()
+    image.save(buffer, fmt.upper(), **{**VARIANT_FORMATS.get(fmt, (None, {}))[1], **options})
+    return buffer.getvalue()
+
+
+def render_variants(name, original):
+    """
+    Encode every variant of the opened image ``original`` stored as ``name``.
+
+    Returns ``(manifest entry, [(path, bytes), ...])``.
+    """
+    widths = [w for w in VARIANT_WIDTHS if w < original.width] + [original.width]
+    formats = output_formats(name)
+    files = []
+    for width in widths:
+        height = max(1, round(original.height * width / original.width))
+        resized = original if width == original.width else original.resize((width, height), Image.LANCZOS)
+        files += [(variant_name(name, width, fmt), _encode(resized, fmt)) for fmt in formats]
+    return {"width": original.width, "height": original.height, "widths": widths, "formats": formats}, files
+
+
+def render_favicons(original):
+    """``[(path, bytes)]`` for the multi-size favicon.ico and the Apple touch icon."""
+    square = ImageOps.pad(original.convert("RGBA"), (max(original.size),) * 2, color=(0, 0, 0, 0))
+    return [
+        (FAVICON_NAME, _encode(square, "ico", sizes=[(s, s) for s in FAVICON_SIZES])),
+        (TOUCH_ICON_NAME, _encode(square.resize((TOUCH_ICON_SIZE,) * 2, Image.LANCZOS), "png")),
+    ]
+
+
+def _is_source(name):
+    return (
+        name.startswith(IMAGE_DIR)
+        and name.lower().endswith(SOURCE_EXTENSIONS)
+        and "/variants/" not in name
+        and name != TOUCH_ICON_NAME
+    )
+
+
+class OptimizedStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """WhiteNoise's hashed + compressed storage, generating image variants before hashing."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            for name in self.generate_images(paths):
+                paths[name] = (self, name)
+        yield from super().post_process(paths, dry_run, **options)
+
+    def _write(self, name, content):
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(content))
+
+    def generate_images(self, paths):
+        """Write the variants of every source image in ``paths``; returns the names written."""
+        manifest, written = {"images": {}}, []
+        for name in sorted(paths):
+            if not _is_source(name):
+                continue
+            storage, path = paths[name]
+            with storage.open(path) as f:
+                original = ImageOps.exif_transpose(Image.open(f))
+                original.load()
+            manifest["images"][name], files = render_variants(name, original)
+            if name == FAVICON_SOURCE:
+                files += render_favicons(original)
+                manifest["favicon"] = {"ico": FAVICON_NAME, "touch_icon": TOUCH_ICON_NAME}
+            for variant, content in files:
+                self._write(variant, content)
+                written.append(variant)
+        self._write(MANIFEST_NAME, json.dumps(manifest, indent=1).encode())
+        logger.info(f"Generated {len(written)} static image variants")
+        return written
+
+
+_manifest = None
+_retry_at = 0.0  # while the manifest is missing
+
+
+def load_manifest(storage=None):
+    """
+    The variants manifest written by collectstatic, read once per process. Until it
+    exists this is ``{}``, and the file is looked for again every MANIFEST_RETRY
+    seconds, so a process started before collectstatic finished picks it up.
+    """
+    global _manifest, _retry_at
+    if _manifest is None or (not _manifest and time.monotonic() >= _retry_at):
+        storage = storage or staticfiles_storage
+        try:
+            with storage.open(MANIFEST_NAME) as f:
+                _manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            _manifest = {}
+            _retry_at = time.monotonic() + MANIFEST_RETRY
+    return _manifest
+
+
+def reset_manifest():
+    global _manifest, _retry_at
+    _manifest, _retry_at = None, 0.0
+
+
+def variants(name):
+    return load_manifest().get("images", {}).get(name)
+
+
+def pick_width(widths, needed):
+    """Smallest available width that covers ``needed`` pixels (the largest one if none does)."""
+    return next((w for w in widths if w >= needed), widths[-1])
+
+
+def srcset(name, info, width, fmt):
+    """``"<1x url> 1x, <2x url> 2x"`` for ``name`` displayed ``width`` CSS pixels wide."""
+    one, two = pick_width(info["widths"], width), pick_width(info["widths"], 2 * width)
+    url = staticfiles_storage.url(variant_name(name, one, fmt))
+    if two == one:
+        return url
+    return f"{url} 1x, {staticfiles_storage.url(variant_name(name, two, fmt))} 2x"
+
+
+def favicon_url():
+    favicon = load_manifest().get("favicon")
+    return staticfiles_storage.url(favicon["ico"] if favicon else FAVICON_SOURCE)
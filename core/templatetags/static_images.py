@@ -0,0 +1,51 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from core import static_images
+
+register = template.Library()
+
+
+@register.simple_tag
+def static_image(name, width, alt="", css_class="", loading="lazy", **attrs):
+    """
+    Render a static image displayed ``width`` CSS pixels wide as a <picture>
+    offering the smallest AVIF/WebP/PNG variants that cover 1x and 2x screens.
+
+        {% static_image "img/jagoftrade.png" 200 alt="JagofTrade" css_class="logo" %}
+
+    Falls back to the original file until collectstatic has generated the variants.
+    """
+    extra = format_html_join("", ' {}="{}"', ((k.replace("_", "-"), v) for k, v in attrs.items()))
+    info = static_images.variants(name)
+    if not info:
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" loading="{}"{}>', static(name), alt, css_class, loading, extra
+        )
+    *modern, fallback = info["formats"]
+    sources = format_html_join(
+        "", '<source type="image/{}" srcset="{}">',
+        ((fmt, static_images.srcset(name, info, width, fmt)) for fmt in modern),
+    )
+    height = round(info["height"] * width / info["width"])
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" width="{}" height="{}" alt="{}" class="{}" loading="{}"{}></picture>',
+        sources,
+        static(static_images.variant_name(name, static_images.pick_width(info["widths"], width), fallback)),
+        static_images.srcset(name, info, width, fallback),
+        width, height, alt, css_class, loading, extra,
+    )
+
+
+@register.simple_tag
+def favicon_links():
+    """<link> tags for the generated favicon.ico and Apple touch icon (the original image before collectstatic)."""
+    favicon = static_images.load_manifest().get("favicon")
+    if not favicon:
+        return format_html('<link rel="icon" type="image/png" href="{}">', static(static_images.FAVICON_SOURCE))
+    return format_html(
+        '<link rel="icon" href="{}" sizes="{}"><link rel="apple-touch-icon" href="{}">',
+        static(favicon["ico"]),
+        " ".join(f"{s}x{s}" for s in static_images.FAVICON_SIZES),
+        static(favicon["touch_icon"]),
+    )
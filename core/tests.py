@@ -1,3 +1,222 @@
-from django.test import TestCase
+import io
+import re
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from catalog.models import Category, Product
+from core import static_images, feed
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.template import Template, Context
+from django.core.cache import cache, caches
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+from unittest import mock
+from core.jobs import rebuild_home_feed
+from jobs.models import Job
+from jobs.queue import run_batch
+from core.management.commands.check_query_plans import full_scans
 
-# Create your tests here.
+User = get_user_model()
+
+
+class QueryPlanTest(TestCase):
+    """Test that the hot catalog and order queries are served from indexes."""
+
+    def test_hot_queries_use_indexes(self):
+        out = io.StringIO()
+        call_command("check_query_plans", stdout=out)
+        self.assertIn("hot queries use an index", out.getvalue())
+        self.assertIn("ok         catalog.views.search_product", out.getvalue())
+
+    def test_full_scan_detection(self):
+        self.assertEqual(full_scans("4 0 0 SCAN orders_order", "sqlite"), ["orders_order"])
+        self.assertEqual(full_scans("6 0 0 SCAN catalog_product USING INDEX product_recent_idx", "sqlite"), [])
+        self.assertEqual(full_scans("Seq Scan on orders_order  (cost=0.00..1.01 rows=1)", "postgresql"), ["orders_order"])
+
+
+class PruneSessionsTest(TestCase):
+    """Test batched deletion of expired sessions."""
+
+    def test_deletes_only_expired_sessions(self):
+        now = timezone.now()
+        for i in range(5):
+            Session.objects.create(session_key=f"expired{i}", session_data="", expire_date=now - timedelta(days=1))
+        Session.objects.create(session_key="live", session_data="", expire_date=now + timedelta(days=1))
+
+        out = io.StringIO()
+        call_command("prune_sessions", batch_size=2, max_batches=2, stdout=out)
+        self.assertEqual(Session.objects.count(), 2)
+        self.assertIn("Deleted 4 expired sessions in 2 batches", out.getvalue())
+
+        call_command("prune_sessions", batch_size=2, stdout=io.StringIO())
+        self.assertEqual(list(Session.objects.values_list("session_key", flat=True)), ["live"])
+
+
+class StaticImageTest(TestCase):
+    """Test the image variants generated by collectstatic and the tags that use them."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.root = tempfile.mkdtemp()
+        cls.override = override_settings(STATIC_ROOT=cls.root, STORAGES={
+            "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+            "staticfiles": {"BACKEND": "core.static_images.OptimizedStaticFilesStorage"},
+        })
+        cls.override.enable()
+        call_command("collectstatic", interactive=False, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.override.disable()
+        shutil.rmtree(cls.root, ignore_errors=True)
+        static_images.reset_manifest()
+        super().tearDownClass()
+
+    def setUp(self):
+        static_images.reset_manifest()
+
+    def test_variants_and_favicon(self):
+        from pathlib import Path
+        from PIL import Image
+        root = Path(self.root)
+        info = static_images.variants("img/jagoftrade.png")
+        self.assertEqual(info["widths"], [32, 64, 128, 256, 512, 1024])
+        self.assertIn("webp", info["formats"])
+        original = (root / "img/jagoftrade.png").stat().st_size
+        for fmt in info["formats"]:
+            self.assertLess((root / static_images.variant_name("img/jagoftrade.png", 512, fmt)).stat().st_size, original / 4)
+        with Image.open(root / "img/favicon.ico") as icon:
+            self.assertEqual(sorted(icon.info["sizes"]), [(16, 16), (32, 32), (48, 48)])
+
+    def test_tags_pick_smallest_covering_variant(self):
+        html = Template('{% load static_images %}{% static_image "img/jagoftrade.png" 200 alt="Logo" %}').render(Context())
+        self.assertIn("jagoftrade-256w.", html)  # 1x
+        self.assertIn("jagoftrade-512w.", html)  # 2x
+        self.assertNotIn("jagoftrade-1024w.", html)
+        self.assertIn('width="200" height="200"', html)
+        self.assertIn('type="image/webp"', html)
+
+        html = Template("{% load static_images %}{% favicon_links %}").render(Context())
+        self.assertRegex(html, r'href="/static/img/favicon\.[0-9a-f]+\.ico" sizes="16x16 32x32 48x48"')
+        response = self.client.get("/favicon.ico")
+        self.assertRegex(response["Location"], r"/static/img/favicon\.[0-9a-f]+\.ico$")
+
+    def test_fallback_without_manifest(self):
+        with override_settings(STORAGES={
+            "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+            "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+        }, STATIC_ROOT=tempfile.gettempdir() + "/no-static-here"):
+            static_images.reset_manifest()
+            html = Template('{% load static_images %}{% static_image "img/jagoftrade.png" 200 %}').render(Context())
+        self.assertIn('src="/static/img/jagoftrade.png"', html)
+
+    def test_missing_manifest_is_looked_for_again(self):
+        missing = override_settings(STATIC_ROOT=tempfile.gettempdir() + "/no-static-here")
+        with missing:
+            self.assertEqual(static_images.load_manifest(), {})  # read before collectstatic wrote it
+        self.assertEqual(static_images.load_manifest(), {})  # not looked for again yet
+        with mock.patch("core.static_images.time.monotonic", return_value=time.monotonic() + static_images.MANIFEST_RETRY):
+            self.assertIn("img/jagoftrade.png", static_images.load_manifest()["images"])
+
+
+class LayoutFragmentCacheTest(TestCase):
+    """Test the cached layout fragments in base.html and the render benchmark."""
+
+    def setUp(self):
+        caches["templates"].clear()
+        self.user = User.objects.create_user(username="shopper", email="shopper@example.com", password="pass12345")
+
+    def test_nav_varies_by_user_and_cart(self):
+        self.assertContains(self.client.get(reverse("core:home")), "Register")
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("core:home"))
+        self.assertContains(response, "Welcome shopper")
+        self.assertNotContains(response, "Register")
+
+        category = Category.objects.create(name="Phones", slug="phones")
+        product = Product.objects.create(category=category, title="Galaxy", price=Decimal("1.00"))
+        session = self.client.session
+        session["cart"] = f"1;{product.id},3,1.00"
+        session["cart_count"] = 3
+        session.save()
+        self.assertRegex(self.client.get(reverse("core:home")).content.decode(), r'id="cart-count"[^>]*>\s*3\s*<')
+
+    def test_forms_keep_fresh_csrf_tokens(self):
+        tokens = set()
+        for _ in range(2):
+            client = Client()
+            client.get(reverse("core:home"))  # first visit sets the CSRF cookie
+            html = client.get(reverse("core:home")).content.decode()
+            tokens.add(re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', html).group(1))
+        self.assertEqual(len(tokens), 2)
+
+    @override_settings(ALLOWED_HOSTS=["shop.example.com"])  # as in production: no testserver
+    def test_benchmark_command(self):
+        out = io.StringIO()
+        call_command("benchmark_templates", iterations=2, products=5, stdout=out)
+        for name in ("core/home.html", "catalog/list.html", "orders/checkout.html"):
+            self.assertIn(name, out.getvalue())
+        self.assertFalse(Product.objects.exists())  # sample data is rolled back
+
+
+class HomeFeedTest(TransactionTestCase):
+    """Test the materialized home-page feed (with real commits, so on_commit hooks run as in production)."""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name="Phones", slug="phones")
+        self.products = [
+            Product.objects.create(category=self.category, title=f"Phone {i}", price=Decimal("1000.00")) for i in range(3)
+        ]
+
+    def catalog_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("core:home"))
+        self.assertEqual(response.status_code, 200)
+        return response, [q["sql"] for q in ctx.captured_queries if '"catalog_' in q["sql"]]
+
+    def test_warm_feed_needs_no_catalog_queries(self):
+        self.catalog_queries()
+        response, queries = self.catalog_queries()
+        self.assertEqual(queries, [])
+        html = response.content.decode()
+        self.assertLess(html.index("Phone 2"), html.index("Phone 1"))  # newest first
+        self.assertEqual(feed.get()["ids"], [p.id for p in reversed(self.products)])
+
+    def test_rebuilt_after_changes_commit(self):
+        self.catalog_queries()
+        self.products[0].title = "Renamed phone"
+        self.products[0].save()
+        self.products[1].is_active = False
+        self.products[1].save()
+        self.assertEqual(run_batch(), (1, 1))  # one queued rebuild for both changes
+        response, queries = self.catalog_queries()
+        self.assertEqual(queries, [])
+        self.assertContains(response, "Renamed phone")
+        self.assertNotContains(response, "Phone 1")
+
+    def test_one_rebuild_per_transaction(self):
+        run_batch()
+        with mock.patch.object(feed, "build", wraps=feed.build) as build:
+            with transaction.atomic():
+                for i in range(10):
+                    Product.objects.create(category=self.category, title=f"Tablet {i}", price=Decimal("500.00"))
+            build.assert_not_called()  # nothing rendered in the saving request
+            self.products[0].save()  # another commit before the worker runs
+            self.assertEqual(Job.objects.filter(name=rebuild_home_feed.job_name).count(), 1)
+            self.assertEqual(run_batch(), (1, 1))
+            self.assertEqual(build.call_count, 1)
+        self.assertIn("Tablet 9", "".join(feed.get()["cards"]))
+
+    def test_build_command(self):
+        out = io.StringIO()
+        call_command("build_home_feed", stdout=out)
+        self.assertIn("3 products", out.getvalue())
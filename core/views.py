@@ -1,9 +1,15 @@
 from django.shortcuts import render, redirect
-from catalog.models import Product
+from catalog.conditional import conditional_page
+from core import feed
+from django.contrib.sitemaps.views import sitemap
+from django.views.decorators.cache import cache_control
+from shop import sitemaps
+import re
 import json
 from datetime import datetime
 from django.core.exceptions import PermissionDenied
-from django.http import HttpResponse
+from django.http import HttpResponse, FileResponse, Http404, HttpResponseRedirect
+from core.static_images import favicon_url
 from django.conf import settings
 
 
@@ -11,9 +17,21 @@ from django.conf import settings
 CONSENT_COOKIE_NAME = "cookie_consent"
 CONSENT_MAX_AGE = 365 * 24 * 60 * 60  # one year
 
+def _home_feed(request):
+    if not hasattr(request, "_home_feed"):
+        request._home_feed = feed.get()
+    return request._home_feed
+
+
+def _home_validator(request):
+    home_feed = _home_feed(request)
+    return [home_feed["signature"]], home_feed["modified"]
+
+
+@conditional_page(_home_validator)
 def home(request):
-    products = Product.objects.filter(is_active=True)[:40]  # Show latest 32 products
-    return render(request, 'core/home.html', {'products': products})
+    """Served from the materialized feed (core/feed.py): no catalog queries when it is warm."""
+    return render(request, 'core/home.html', {'feed': _home_feed(request)})
 
 
 def cookie_settings(request):
@@ -68,3 +86,36 @@ def robots_txt(request):
             "Sitemap: https://kaelzubs.pythonanywhere.com/sitemap.xml\n"
         )
     return HttpResponse(content, content_type="text/plain")
+
+
+SITEMAP_SECTION_RE = re.compile(r"^[a-z]+-\d+\.xml\.gz$")
+SITEMAP_MAX_AGE = 24 * 60 * 60
+
+
+@cache_control(public=True, max_age=SITEMAP_MAX_AGE)
+def sitemap_index(request):
+    """Serve the pre-built sitemap index; build the sitemap on the fly until `build_sitemaps` has run."""
+    path = sitemaps.output_dir() / "sitemap.xml"
+    if not path.exists():
+        return sitemap(request, {
+            "products": sitemaps.ProductSitemap,
+            "categories": sitemaps.CategorySitemap,
+            "static": sitemaps.StaticViewSitemap,
+        })
+    return FileResponse(open(path, "rb"), content_type="application/xml")
+
+
+@cache_control(public=True, max_age=SITEMAP_MAX_AGE)
+def sitemap_section(request, filename):
+    if not SITEMAP_SECTION_RE.match(filename):
+        raise Http404
+    path = sitemaps.output_dir() / filename
+    if not path.exists():
+        raise Http404
+    return FileResponse(open(path, "rb"), content_type="application/gzip")
+
+
+@cache_control(public=True, max_age=24 * 60 * 60)
+def favicon(request):
+    """Browsers ask for /favicon.ico directly: redirect to the hashed multi-size icon."""
+    return HttpResponseRedirect(favicon_url())
@@ -0,0 +1,48 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections
+from jobs import queue
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (emails and other slow side effects), claiming them in batches. "
+        "Runs until interrupted; start one or more alongside the web processes (on SQLite they take "
+        "turns, as it has a single writer). With --once it exits when nothing is due, e.g. to run from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=20, help="Jobs claimed at a time (default 20).")
+        parser.add_argument("--sleep", type=float, default=2, help="Seconds to wait when no job is due (default 2).")
+        parser.add_argument("--once", action="store_true", help="Exit as soon as no job is due.")
+        parser.add_argument("--max-batches", type=int, help="Stop after this many batches (default: no limit).")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        total = succeeded = batches = 0
+        try:
+            while options["max_batches"] is None or batches < options["max_batches"]:
+                # A long-running process must drop connections the database has timed out
+                close_old_connections()
+                try:
+                    ran, ok = queue.run_batch(options["batch_size"])
+                except OperationalError as e:
+                    # e.g. "database is locked" on SQLite when another worker claims at the same moment;
+                    # unfinished jobs keep their lease and are picked up again when it expires
+                    self.stderr.write(f"Batch failed, retrying: {e}")
+                    time.sleep(options["sleep"])
+                    continue
+                if ran:
+                    total += ran
+                    succeeded += ok
+                    batches += 1
+                elif options["once"]:
+                    break
+                else:
+                    time.sleep(options["sleep"])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Ran {total} jobs in {batches} batches, {total - succeeded} failed ({time.monotonic() - started:.1f}s)."
+        ))
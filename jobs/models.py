@@ -0,0 +1,34 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    """A queued call to a function registered with jobs.queue.job; see jobs/queue.py."""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (FAILED, 'Failed'),
+    ]
+    name = models.CharField(max_length=200)
+    # Set on jobs registered with job(unique=True) until a worker claims them: at most one waits per key
+    key = models.CharField(max_length=200, null=True, blank=True, unique=True, editable=False)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True, help_text="End of the running worker's lease")
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim the oldest due jobs
+            models.Index(fields=["status", "run_at"], name="job_due_idx"),
+        ]
+
+    def __str__(self): return f'{self.name} #{self.pk} ({self.status})'
@@ -0,0 +1,167 @@
+"""
+A small database-backed job queue for slow side effects (email, mostly).
+
+Requests enqueue work instead of doing it; ``manage.py run_worker`` runs it.
+A job is a row naming a registered function plus JSON arguments (ids and
+strings, not model instances):
+
+    @job()
+    def send_order_emails(order_id, emails): ...
+
+    send_order_emails.enqueue(order.pk, ["send_order_confirmation_email"])
+
+enqueue() inserts the row in the caller's transaction, so workers see the job
+only once that transaction commits, and it disappears with a rollback. Unlike
+deferring the insert with transaction.on_commit, nothing is lost if the
+process dies just after the commit.
+
+Workers claim due jobs in batches with SELECT ... FOR UPDATE SKIP LOCKED
+and hold them under a lease; a job whose worker died is claimed again once
+the lease expires. SQLite ignores SKIP LOCKED, so concurrent workers there
+can read the same ids: each job is leased by an UPDATE that re-checks it is
+still due, and a worker keeps only the jobs its own UPDATE changed. (The
+loser may instead get "database is locked"; run_worker retries the batch.)
+A successful job is deleted. A failing job is retried after an exponential,
+jittered backoff, until max_attempts, after which it stays in the table as
+FAILED (retry it from the admin). A job that partly succeeded can raise
+Retry with narrower arguments so the retry skips the finished part.
+
+A job registered with ``unique=True`` (a rebuild, a digest) has at most one
+queued copy: enqueueing it while one is waiting does nothing. The guarantee
+comes from a unique key on the row, so two requests committing at once can't
+both queue it. The key is released when a worker claims the job, and changes
+made while it runs queue a fresh one.
+"""
+
+import logging
+import random
+import traceback
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from shop import mail
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ATTEMPTS = 5
+BACKOFF_BASE = 30  # seconds before the first retry
+BACKOFF_MAX = 60 * 60
+LEASE = timedelta(minutes=5)  # longer than any job should take
+
+_registry = {}
+
+
+class Retry(Exception):
+    """Raise from a job to have its retry run with different arguments, e.g. only the part that failed."""
+
+    def __init__(self, message, args=None, kwargs=None):
+        super().__init__(message)
+        self.retry_args = args
+        self.retry_kwargs = kwargs
+
+
+def job(name=None, max_attempts=DEFAULT_MAX_ATTEMPTS, unique=False):
+    """
+    Register a function as a job; adds ``func.enqueue(*args, **kwargs)`` and ``func.enqueue_in(delay, ...)``.
+
+    With ``unique=True`` at most one copy waits in the queue (see the module docstring).
+    """
+    def decorator(func):
+        job_name = name or f"{func.__module__}.{func.__name__}"
+        key = job_name if unique else None
+        _registry[job_name] = func
+        func.job_name = job_name
+        func.enqueue = lambda *args, **kwargs: enqueue(job_name, args, kwargs, max_attempts=max_attempts, key=key)
+        func.enqueue_in = lambda delay, *args, **kwargs: enqueue(job_name, args, kwargs, delay, max_attempts, key)
+        return func
+    return decorator
+
+
+def enqueue(name, args=(), kwargs=None, delay=0, max_attempts=DEFAULT_MAX_ATTEMPTS, key=None):
+    """Queue a job; returns it, or None if a job with the same ``key`` is already waiting."""
+    entry = Job(
+        name=name,
+        key=key,
+        args=list(args),
+        kwargs=kwargs or {},
+        max_attempts=max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+    if key is None:
+        entry.save()
+        return entry
+    try:
+        with transaction.atomic():  # a savepoint, so a duplicate leaves the caller's transaction usable
+            entry.save()
+    except IntegrityError:
+        return None
+    return entry
+
+
+def backoff(attempts):
+    """Seconds to wait after the ``attempts``-th failure: doubling from BACKOFF_BASE, capped, jittered."""
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    # Spread retries out so jobs that failed together (an SMTP outage) don't all return at once
+    return random.uniform(delay / 2, delay)
+
+
+def _due(now):
+    return Q(status=Job.QUEUED, run_at__lte=now) | Q(status=Job.RUNNING, locked_until__lt=now)
+
+
+def _lease(pk, now):
+    """Lease one job if it is still due; False if another worker got there first."""
+    # Counting the attempt at claim time means a job that crashes its worker still runs out of attempts
+    # Releasing the key lets a change made while the job runs queue another copy
+    return bool(Job.objects.filter(_due(now), pk=pk).update(
+        status=Job.RUNNING, locked_until=now + LEASE, attempts=F("attempts") + 1, key=None
+    ))
+
+
+def claim(batch_size):
+    """Lease up to ``batch_size`` due jobs to this worker, oldest first."""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            Job.objects.select_for_update(skip_locked=True).filter(_due(now)).order_by("run_at").values_list("pk", flat=True)[:batch_size]
+        )
+        claimed = [pk for pk in ids if _lease(pk, now)]
+    return list(Job.objects.filter(pk__in=claimed).order_by("run_at"))
+
+
+def run(entry):
+    """Run one claimed job; returns True if it succeeded."""
+    func = _registry.get(entry.name)
+    try:
+        if func is None:
+            raise LookupError(f"No job registered as {entry.name!r}")
+        func(*entry.args, **entry.kwargs)
+    except Exception as e:
+        error = traceback.format_exc()
+        if entry.attempts >= entry.max_attempts:
+            Job.objects.filter(pk=entry.pk).update(status=Job.FAILED, locked_until=None, last_error=error)
+            logger.error(f"Job {entry} failed after {entry.attempts} attempts: {e}")
+        else:
+            retry_at = timezone.now() + timedelta(seconds=backoff(entry.attempts))
+            changes = {}
+            if isinstance(e, Retry):
+                if e.retry_args is not None:
+                    changes['args'] = list(e.retry_args)
+                if e.retry_kwargs is not None:
+                    changes['kwargs'] = e.retry_kwargs
+            Job.objects.filter(pk=entry.pk).update(
+                status=Job.QUEUED, locked_until=None, run_at=retry_at, last_error=error, **changes
+            )
+            logger.warning(f"Job {entry} failed (attempt {entry.attempts}/{entry.max_attempts}), retrying at {retry_at}: {e}")
+        return False
+    Job.objects.filter(pk=entry.pk).delete()
+    return True
+
+
+def run_batch(batch_size=20):
+    """Claim and run one batch; returns (jobs run, jobs succeeded)."""
+    with mail.batch():  # emails sent by the batch's jobs share one SMTP connection
+        results = [run(entry) for entry in claim(batch_size)]
+    return len(results), sum(results)
@@ -0,0 +1,147 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core import mail
+from django.core.management import call_command
+from django.db import OperationalError, transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from core.jobs import send_email
+from jobs import queue
+from jobs.models import Job
+
+calls = []
+
+
+@queue.job(name="jobs.tests.record", max_attempts=2)
+def record(value):
+    calls.append(value)
+
+
+@queue.job(name="jobs.tests.refresh", unique=True)
+def refresh():
+    calls.append("refresh")
+
+
+@queue.job(name="jobs.tests.explode", max_attempts=2)
+def explode():
+    raise ValueError("smtp down")
+
+
+class JobQueueTest(TestCase):
+    """Enqueue, batch claiming, retry with backoff and the worker command."""
+
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_and_run(self):
+        record.enqueue("a")
+        record.enqueue(value="b")
+        self.assertEqual(queue.run_batch(), (2, 2))
+        self.assertEqual(calls, ["a", "b"])
+        self.assertFalse(Job.objects.exists())  # done jobs are deleted
+
+    def test_batch_size_and_due_time(self):
+        for i in range(3):
+            record.enqueue(i)
+        queue.enqueue("jobs.tests.record", ["later"], delay=60)
+        self.assertEqual(queue.run_batch(batch_size=2), (2, 2))
+        self.assertEqual(queue.run_batch(batch_size=2), (1, 1))
+        self.assertEqual(queue.run_batch(batch_size=2), (0, 0))
+        self.assertEqual(calls, [0, 1, 2])
+
+    def test_failure_retries_with_backoff_then_fails(self):
+        entry = explode.enqueue()
+        self.assertEqual(queue.run_batch(), (1, 0))
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.attempts), (Job.QUEUED, 1))
+        self.assertIn("smtp down", entry.last_error)
+        self.assertGreater(entry.run_at, timezone.now() + timedelta(seconds=queue.BACKOFF_BASE / 2 - 1))
+        self.assertEqual(queue.run_batch(), (0, 0))  # not due yet
+
+        Job.objects.update(run_at=timezone.now())
+        queue.run_batch()
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.attempts), (Job.FAILED, 2))
+        Job.objects.update(run_at=timezone.now())
+        self.assertEqual(queue.run_batch(), (0, 0))
+
+    def test_backoff_grows_and_is_capped(self):
+        with mock.patch("jobs.queue.random.uniform", side_effect=lambda low, high: high):
+            self.assertEqual([queue.backoff(n) for n in (1, 2, 3)], [30, 60, 120])
+            self.assertEqual(queue.backoff(20), queue.BACKOFF_MAX)
+
+    def test_unique_job_waits_once(self):
+        self.assertIsNotNone(refresh.enqueue())
+        with transaction.atomic():
+            self.assertIsNone(refresh.enqueue())  # already waiting; the transaction carries on
+            record.enqueue("same transaction")
+        self.assertEqual(Job.objects.filter(name=refresh.job_name).count(), 1)
+        entry = queue.claim(10)[0]
+        self.assertIsNotNone(refresh.enqueue())  # claimed: a change now needs another run
+        queue.run(entry)
+        self.assertEqual(Job.objects.filter(name=refresh.job_name).count(), 1)
+
+    def test_expired_lease_is_reclaimed(self):
+        entry = record.enqueue("x")
+        Job.objects.filter(pk=entry.pk).update(status=Job.RUNNING, locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(queue.run_batch(), (1, 1))
+        self.assertEqual(calls, ["x"])
+
+    def test_job_taken_by_another_worker_is_skipped(self):
+        first, second = record.enqueue("first"), record.enqueue("second")
+        lease = queue._lease
+
+        def race(pk, now):
+            if pk == first.pk:
+                lease(pk, now)  # another worker read the same ids (SQLite) and updated first
+            return lease(pk, now)
+
+        with mock.patch("jobs.queue._lease", side_effect=race):
+            self.assertEqual([entry.pk for entry in queue.claim(10)], [second.pk])
+        self.assertEqual(Job.objects.get(pk=first.pk).attempts, 1)  # leased once, by the other worker
+
+    def test_run_worker_survives_a_locked_database(self):
+        record.enqueue("w")
+        run_batch, errors = queue.run_batch, [OperationalError("database is locked")]
+
+        def flaky(batch_size):
+            if errors:
+                raise errors.pop()
+            return run_batch(batch_size)
+
+        with mock.patch("jobs.queue.run_batch", side_effect=flaky):
+            err = StringIO()
+            call_command("run_worker", "--once", "--sleep", "0", stdout=StringIO(), stderr=err)
+        self.assertIn("database is locked", err.getvalue())
+        self.assertEqual(calls, ["w"])
+
+    def test_unknown_job_is_an_error(self):
+        queue.enqueue("jobs.tests.missing", max_attempts=1)
+        self.assertEqual(queue.run_batch(), (1, 0))
+        self.assertIn("No job registered", Job.objects.get().last_error)
+
+    def test_send_email_job(self):
+        send_email.enqueue("Hello", "Body", "shop@example.com", ["ada@example.com"])
+        self.assertEqual(len(mail.outbox), 0)
+        queue.run_batch()
+        self.assertEqual(mail.outbox[0].subject, "Hello")
+
+    def test_run_worker_once(self):
+        record.enqueue("w")
+        explode.enqueue()
+        out = StringIO()
+        call_command("run_worker", "--once", stdout=out)
+        self.assertIn("Ran 2 jobs in 1 batches, 1 failed", out.getvalue())
+        self.assertEqual(calls, ["w"])
+
+
+class JobTransactionTest(TransactionTestCase):
+    """Jobs are written in the caller's transaction."""
+
+    def test_rolled_back_job_is_not_queued(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                record.enqueue("lost")
+                raise RuntimeError
+        self.assertFalse(Job.objects.exists())
@@ -1,6 +1,16 @@
 from django.contrib import admin
+from django.db.models import Count
+from shop import cache
 from .models import Order, OrderItem, Address
 
+
+def status_counts():
+    """``{status: number of orders}``, cached until an order changes (shop.cache "order" generation)."""
+    return cache.orders_get_or_set("status-counts", lambda: dict(
+        Order.objects.values_list("status").annotate(n=Count("id")).order_by()
+    ))
+
+
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
@@ -10,5 +20,15 @@ class OrderAdmin(admin.ModelAdmin):
     list_display = ('id', 'email', 'status', 'total', 'created_at')
     list_filter = ('status',)
     inlines = [OrderItemInline]
+    change_list_template = 'admin/orders/order/change_list.html'
+
+    def changelist_view(self, request, extra_context=None):
+        # Totals per status above the list, without counting the table on every page view
+        counts = status_counts()
+        extra_context = {
+            **(extra_context or {}),
+            'status_counts': [(label, counts.get(status, 0)) for status, label in Order.STATUS_CHOICES],
+        }
+        return super().changelist_view(request, extra_context)
 
-admin.site.register(Address)
\ No newline at end of file
+admin.site.register(Address)
@@ -1,19 +1,62 @@
 from decimal import Decimal
-from catalog.models import Product
+from catalog.snapshots import get_snapshot, get_snapshots
 from orders.shipping import calculate_shipping
 
 
+CART_SESSION_KEY = "cart"
+COUNT_SESSION_KEY = "cart_count"  # total quantity, kept in step by save() so reads never walk the items
+CART_FORMAT = "1"
+
+
+def encode_cart(cart):
+    """
+    Compact session form of a cart: "<format>;<id>,<qty>,<price>;...".
+
+    {"12": {"quantity": 2, "price": "30000.00"}} -> "1;12,2,30000.00"
+    Titles and other product fields come from the product snapshot cache instead.
+    """
+    return ";".join([CART_FORMAT] + [f"{pid},{item['quantity']},{item['price']}" for pid, item in cart.items()])
+
+
+def decode_cart(value):
+    """Inverse of encode_cart(); also reads the original dict layout from older sessions."""
+    if not value:
+        return {}
+    if isinstance(value, dict):
+        return {pid: {"quantity": item["quantity"], "price": item["price"]} for pid, item in value.items()}
+    version, *entries = value.split(";")
+    if version != CART_FORMAT:
+        return {}  # unknown format (e.g. after a rollback): start with an empty cart rather than crash
+    cart = {}
+    for entry in entries:
+        try:
+            pid, quantity, price = entry.split(",")
+            Decimal(price)  # read back by items() and totals()
+            cart[pid] = {"quantity": int(quantity), "price": price}
+        except (ValueError, ArithmeticError):
+            continue  # a damaged entry drops that item, not the whole cart
+    return cart
+
+
 class Cart: 
     def __init__(self, request):
         self.session = request.session
-        cart = self.session.get("cart")
-        if not cart:
-            cart = self.session["cart"] = {}
-        self.cart = cart
+        # Reading only: nothing is written to the session until the first add(), so
+        # visitors who never use the cart don't get a session row or cookie
+        self.cart = decode_cart(self.session.get(CART_SESSION_KEY))
+
+    @staticmethod
+    def count(request):
+        """Item count for the cart badge, read from the session without building a Cart."""
+        count = request.session.get(COUNT_SESSION_KEY)
+        if count is None:
+            # Sessions from before the count was stored
+            count = sum(item["quantity"] for item in decode_cart(request.session.get(CART_SESSION_KEY)).values())
+        return count
         
     def add(self, product_id, quantity=1):
-        product = Product.objects.get(id=product_id)
-        item = self.cart.get(str(product_id), {'quantity': 0, 'price': str(product.price), 'title': product.title})
+        product = get_snapshot(product_id)
+        item = self.cart.get(str(product_id), {'quantity': 0, 'price': str(product.price)})
         item['quantity'] += quantity
         self.cart[str(product_id)] = item
         self.save()
@@ -23,38 +66,49 @@ class Cart:
         self.save()
 
     def clear(self):
-        self.session['cart'] = {}
+        self.cart = {}
         self.save()
 
     def __len__(self):
         """Return total quantity of items in the cart"""
-        return sum(item["quantity"] for item in self.cart.values())
+        count = self.session.get(COUNT_SESSION_KEY)
+        return count if count is not None else sum(item["quantity"] for item in self.cart.values())
     
     def save(self):
-        self.session.modified = True
+        if not self.cart:
+            # Emptying the cart removes it rather than storing an empty one (no-op for cart-less sessions)
+            for key in (CART_SESSION_KEY, COUNT_SESSION_KEY):
+                if key in self.session:
+                    del self.session[key]
+            return
+        self.session[CART_SESSION_KEY] = encode_cart(self.cart)
+        self.session[COUNT_SESSION_KEY] = sum(item["quantity"] for item in self.cart.values())
  
     def items(self):
-        product_ids = [int(pid) for pid in self.cart.keys()]
-        products = Product.objects.filter(id__in=product_ids)
-        for p in products:
-            data = self.cart[str(p.id)]
+        """Cart lines with a cached ProductSnapshot as 'product' (see catalog.snapshots); no DB query when warm."""
+        products = get_snapshots(int(pid) for pid in self.cart)
+        for pid, data in self.cart.items():
+            p = products.get(int(pid))
+            if p is None:
+                continue  # product deleted since it was added
             yield {
-                'title': data['title'],
+                'title': p.title,
                 'product': p,
                 'quantity': data['quantity'],
                 'price': Decimal(data['price']),
                 'line_total': Decimal(data['price']) * data['quantity'],
             }
 
-    def totals(self, shipping_method="standard", destination_state=None):
+    def totals(self, shipping_method="standard", destination_state=None, items=None):
         """
         Calculate cart totals including dynamic shipping.
         
         Args:
             shipping_method: 'standard', 'express', or 'economy'
             destination_state: customer's state for shipping surcharge
+            items: list(self.items()) if the caller already has it
         """
-        items_list = list(self.items())
+        items_list = list(self.items()) if items is None else items
         subtotal = sum(Decimal(i['price']) * i['quantity'] for i in items_list)
         
         # Calculate shipping dynamically
@@ -1,8 +1,12 @@
+from django.utils.functional import SimpleLazyObject
 from .cart import Cart
     
 def cart_context(request):
-    cart = Cart(request)
+    """
+    Lazy so that pages which never show the cart (errors, policies, emails)
+    don't read the session at all.
+    """
     return {
-        'cart': cart,
-        'cart_count': len(cart),
+        'cart': SimpleLazyObject(lambda: Cart(request)),
+        'cart_count': SimpleLazyObject(lambda: Cart.count(request)),
     }
@@ -1,13 +1,24 @@
 from django.core.mail import send_mail, EmailMultiAlternatives
+from django.db.models import Prefetch
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from django.conf import settings
-from .models import Order
+from shop import mail
+from .models import Order, OrderItem
 import logging
 
 logger = logging.getLogger(__name__)
 
-def _get_order_title(order):
+ADMIN_EVENT_LABELS = {
+    'created': 'New Order Received',
+    'paid': 'Payment Received',
+    'shipped': 'Order Shipped',
+    'delivered': 'Order Delivered',
+    'cancelled': 'Order Cancelled',
+}
+
+
+def _get_order_title(items, order_pk):
     """Generate a short human-friendly title for an order.
 
     Strategy:
@@ -15,61 +26,76 @@ def _get_order_title(order):
     - If only one item, return "<qty>x <product title>"
     - If multiple items, return "<qty>x <first product title> +N more"
     """
-    try:
-        items = list(order.items.all())
-        if not items:
-            return f"Order #{order.pk}"
-        first = items[0]
-        title = first.product.title if getattr(first.product, 'title', None) else str(first.product)
-        qty = getattr(first, 'quantity', 1)
-        if len(items) == 1:
-            return f"{qty}x {title}"
-        else:
-            return f"{qty}x {title} +{len(items)-1} more"
-    except Exception:
-        return f"Order #{order.pk}"
-
-
-def send_order_confirmation_email(order):
+    if not items:
+        return f"Order #{order_pk}"
+    first = items[0]
+    title = first.product.title if getattr(first.product, 'title', None) else str(first.product)
+    qty = getattr(first, 'quantity', 1)
+    if len(items) == 1:
+        return f"{qty}x {title}"
+    else:
+        return f"{qty}x {title} +{len(items)-1} more"
+
+
+def order_email_context(order):
+    """
+    Template context shared by every email about ``order`` (an Order or its pk).
+
+    Loads the order with its address in one query and the items with their
+    products in a second, then derives the title and totals from those rows.
+    Build it once per event and pass it as ``context`` to each sender, so the
+    customer and admin emails don't each reload the same data.
+    """
+    order = (
+        Order.objects.select_related('shipping_address')
+        .prefetch_related(Prefetch('items', queryset=OrderItem.objects.select_related('product').order_by('pk')))
+        .get(pk=getattr(order, 'pk', order))
+    )
+    items = list(order.items.all())
+    return {
+        'order': order,
+        'order_items': items,
+        'order_title': _get_order_title(items, order.pk),
+        'order_number': order.pk,
+        'customer_name': order.customer_full_name or order.email,
+        'customer_email': order.email,
+        'customer_phone': order.customer_phone,
+        'order_total': order.total,
+        'order_subtotal': order.subtotal,
+        'shipping_cost': order.shipping_cost,
+        'shipping_address': order.shipping_address,
+        'total_items': sum(item.quantity for item in items),
+        'total_item_value': sum(item.line_total() for item in items),
+        'site_name': 'TechRideMobile',
+        'support_email': settings.DEFAULT_FROM_EMAIL,
+    }
+
+
+def _send(template, subject, to, context):
+    """Render orders/emails/<template>.txt and .html and send them as one email."""
+    email = EmailMultiAlternatives(
+        subject=subject,
+        body=render_to_string(f'orders/emails/{template}.txt', context),
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=to,
+    )
+    email.attach_alternative(render_to_string(f'orders/emails/{template}.html', context), "text/html")
+    mail.send(email)
+
+
+def send_order_confirmation_email(order, context=None):
     """
     Send order confirmation email to customer after successful purchase.
     Includes order summary, items, and payment details.
     """
     try:
-        # Prepare context for email template
-        order_title = _get_order_title(order)
-        total_items = order.get_total_items()
-        total_item_value = order.get_total_item_value()
-        context = {
-            'order': order,
-            'order_items': order.items.all(),
-            'order_title': order_title,
-            'customer_name': order.customer_full_name or order.email,
-            'order_total': order.total,
-            'order_subtotal': order.subtotal,
-            'shipping_cost': order.shipping_cost,
-            'shipping_address': order.shipping_address,
-            'total_items': total_items,
-            'total_item_value': total_item_value,
-            'site_name': 'TechRideMobile',
-            'support_email': settings.DEFAULT_FROM_EMAIL,
-        }
-        
-        # Render HTML and plain text versions
-        html_content = render_to_string('orders/emails/order_confirmation.html', context)
-        text_content = render_to_string('orders/emails/order_confirmation.txt', context)
-        
-        # Create email
-        email = EmailMultiAlternatives(
-            subject=f'Order Confirmation - Order #{order.pk} - {order_title}',
-            body=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[order.email],
+        context = context or order_email_context(order)
+        _send(
+            'order_confirmation',
+            f'Order Confirmation - Order #{order.pk} - {context["order_title"]}',
+            [order.email],
+            context,
         )
-        email.attach_alternative(html_content, "text/html")
-        
-        # Send email
-        email.send(fail_silently=False)
         logger.info(f"Order confirmation email sent for Order #{order.pk} to {order.email}")
         return True
         
@@ -78,35 +104,19 @@ def send_order_confirmation_email(order):
         return False
 
 
-def send_payment_received_email(order):
+def send_payment_received_email(order, context=None):
     """
     Send payment received confirmation email.
     Includes order number, amount, and next steps.
     """
     try:
-        order_title = _get_order_title(order)
-        context = {
-            'order': order,
-            'order_title': order_title,
-            'customer_name': order.customer_full_name or order.email,
-            'order_total': order.total,
-            'order_number': order.pk,
-            'site_name': 'TechRideMobile',
-            'support_email': settings.DEFAULT_FROM_EMAIL,
-        }
-        
-        html_content = render_to_string('orders/emails/payment_received.html', context)
-        text_content = render_to_string('orders/emails/payment_received.txt', context)
-        
-        email = EmailMultiAlternatives(
-            subject=f'Payment Received - Order #{order.pk} - {order_title}',
-            body=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[order.email],
+        context = context or order_email_context(order)
+        _send(
+            'payment_received',
+            f'Payment Received - Order #{order.pk} - {context["order_title"]}',
+            [order.email],
+            context,
         )
-        email.attach_alternative(html_content, "text/html")
-        email.send(fail_silently=False)
-        
         logger.info(f"Payment received email sent for Order #{order.pk} to {order.email}")
         return True
         
@@ -115,36 +125,22 @@ def send_payment_received_email(order):
         return False
 
 
-def send_order_shipped_email(order, tracking_number=None):
+def send_order_shipped_email(order, tracking_number=None, context=None):
     """
     Send shipment notification email with tracking information.
     """
     try:
-        order_title = _get_order_title(order)
         context = {
-            'order': order,
-            'order_items': order.items.all(),
-            'order_title': order_title,
-            'customer_name': order.customer_full_name or order.email,
+            **(context or order_email_context(order)),
             'tracking_number': tracking_number or order.tracking_number,
-            'shipping_address': order.shipping_address,
             'estimated_delivery': f'{settings.SHIPPING_ESTIMATED_DAYS[0]}-{settings.SHIPPING_ESTIMATED_DAYS[1]} days',
-            'site_name': 'TechRideMobile',
-            'support_email': settings.DEFAULT_FROM_EMAIL,
         }
-        
-        html_content = render_to_string('orders/emails/order_shipped.html', context)
-        text_content = render_to_string('orders/emails/order_shipped.txt', context)
-        
-        email = EmailMultiAlternatives(
-            subject=f'Your Order is Shipped - Order #{order.pk} - {order_title}',
-            body=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[order.email],
+        _send(
+            'order_shipped',
+            f'Your Order is Shipped - Order #{order.pk} - {context["order_title"]}',
+            [order.email],
+            context,
         )
-        email.attach_alternative(html_content, "text/html")
-        email.send(fail_silently=False)
-        
         logger.info(f"Shipment email sent for Order #{order.pk} to {order.email}")
         return True
         
@@ -153,31 +149,12 @@ def send_order_shipped_email(order, tracking_number=None):
         return False
 
 
-def send_order_delivered_email(order):
+def send_order_delivered_email(order, context=None):
     """
     Send order delivered notification email.
     """
     try:
-        context = {
-            'order': order,
-            'customer_name': order.customer_full_name or order.email,
-            'order_number': order.pk,
-            'site_name': 'TechRideMobile',
-            'support_email': settings.DEFAULT_FROM_EMAIL,
-        }
-        
-        html_content = render_to_string('orders/emails/order_delivered.html', context)
-        text_content = render_to_string('orders/emails/order_delivered.txt', context)
-        
-        email = EmailMultiAlternatives(
-            subject=f'Order Delivered - Order #{order.pk}',
-            body=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[order.email],
-        )
-        email.attach_alternative(html_content, "text/html")
-        email.send(fail_silently=False)
-        
+        _send('order_delivered', f'Order Delivered - Order #{order.pk}', [order.email], context or order_email_context(order))
         logger.info(f"Delivered email sent for Order #{order.pk} to {order.email}")
         return True
         
@@ -186,35 +163,22 @@ def send_order_delivered_email(order):
         return False
 
 
-def send_order_cancelled_email(order, reason=''):
+def send_order_cancelled_email(order, reason='', context=None):
     """
     Send order cancellation notification email.
     """
     try:
-        order_title = _get_order_title(order)
         context = {
-            'order': order,
-            'order_title': order_title,
-            'customer_name': order.customer_full_name or order.email,
-            'order_number': order.pk,
+            **(context or order_email_context(order)),
             'cancellation_reason': reason,
             'refund_amount': order.total,
-            'site_name': 'TechRideMobile',
-            'support_email': settings.DEFAULT_FROM_EMAIL,
         }
-        
-        html_content = render_to_string('orders/emails/order_cancelled.html', context)
-        text_content = render_to_string('orders/emails/order_cancelled.txt', context)
-        
-        email = EmailMultiAlternatives(
-            subject=f'Order Cancelled - Order #{order.pk} - {order_title}',
-            body=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[order.email],
+        _send(
+            'order_cancelled',
+            f'Order Cancelled - Order #{order.pk} - {context["order_title"]}',
+            [order.email],
+            context,
         )
-        email.attach_alternative(html_content, "text/html")
-        email.send(fail_silently=False)
-        
         logger.info(f"Cancellation email sent for Order #{order.pk} to {order.email}")
         return True
         
@@ -223,7 +187,7 @@ def send_order_cancelled_email(order, reason=''):
         return False
 
 
-def send_admin_order_notification_email(order, event_type='created'):
+def send_admin_order_notification_email(order, event_type='created', context=None):
     """
     Send order notification email to admin/owner.
     Notifies shop owner about new orders and status changes.
@@ -231,6 +195,7 @@ def send_admin_order_notification_email(order, event_type='created'):
     Args:
         order: Order object
         event_type: 'created', 'paid', 'shipped', 'delivered', or 'cancelled'
+        context: order_email_context(order), if the caller already built it
     """
     try:
         # Get admin email from settings
@@ -239,52 +204,21 @@ def send_admin_order_notification_email(order, event_type='created'):
             logger.warning(f"ADMIN_EMAIL not configured in settings")
             return False
         
-        # Prepare context for email template
-        order_title = _get_order_title(order)
-        total_items = order.get_total_items()
-        total_item_value = order.get_total_item_value()
         context = {
-            'order': order,
-            'order_items': order.items.all(),
-            'order_title': order_title,
-            'customer_name': order.customer_full_name or order.email,
-            'customer_email': order.email,
-            'customer_phone': order.customer_phone,
-            'order_total': order.total,
-            'order_subtotal': order.subtotal,
-            'shipping_cost': order.shipping_cost,
-            'shipping_address': order.shipping_address,
-            'total_items': total_items,
-            'total_item_value': total_item_value,
+            **(context or order_email_context(order)),
             'event_type': event_type,
-            'site_name': 'TechRideMobile',
             'site_admin_url': getattr(settings, 'SITE_ADMIN_URL', '/admin/'),
         }
         
-        # Render HTML and plain text versions
-        html_content = render_to_string('orders/emails/admin_order_notification.html', context)
-        text_content = render_to_string('orders/emails/admin_order_notification.txt', context)
-        
         # Create email with descriptive subject
-        event_labels = {
-            'created': 'New Order Received',
-            'paid': 'Payment Received',
-            'shipped': 'Order Shipped',
-            'delivered': 'Order Delivered',
-            'cancelled': 'Order Cancelled',
-        }
-        event_label = event_labels.get(event_type, 'Order Updated')
+        event_label = ADMIN_EVENT_LABELS.get(event_type, 'Order Updated')
         
-        email = EmailMultiAlternatives(
-            subject=f'[ADMIN] {event_label} - Order #{order.pk} - {order_title} from {order.customer_full_name or order.email}',
-            body=text_content,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            to=[admin_email],
+        _send(
+            'admin_order_notification',
+            f'[ADMIN] {event_label} - Order #{order.pk} - {context["order_title"]} from {order.customer_full_name or order.email}',
+            [admin_email],
+            context,
         )
-        email.attach_alternative(html_content, "text/html")
-        
-        # Send email
-        email.send(fail_silently=False)
         logger.info(f"Admin notification email sent for Order #{order.pk} ({event_type}) to {admin_email}")
         return True
         
@@ -293,42 +227,92 @@ def send_admin_order_notification_email(order, event_type='created'):
         return False
 
 
-def send_admin_new_order_email(order):
+def send_admin_digest_email(entries):
+    """
+    Send one email to admin summarising held notifications (AdminDigestEntry rows,
+    with their orders loaded), grouped by event in the order they happened.
+    """
+    try:
+        admin_email = getattr(settings, 'ADMIN_EMAIL', None)
+        if not admin_email:
+            logger.warning(f"ADMIN_EMAIL not configured in settings")
+            return False
+        
+        groups = {}
+        for entry in entries:
+            groups.setdefault(entry.event_type, []).append(entry)
+        context = {
+            'groups': [(ADMIN_EVENT_LABELS.get(event_type, 'Order Updated'), group) for event_type, group in groups.items()],
+            'entry_count': len(entries),
+            'since': entries[0].created_at,
+            'site_name': 'TechRideMobile',
+            'site_admin_url': getattr(settings, 'SITE_ADMIN_URL', '/admin/'),
+        }
+        summary = ', '.join(f"{len(group)} {label.lower()}" for label, group in context['groups'])
+        _send('admin_digest', f'[ADMIN] Order digest - {summary}', [admin_email], context)
+        logger.info(f"Admin digest email sent ({len(entries)} notifications) to {admin_email}")
+        return True
+        
+    except Exception as e:
+        logger.error(f"Failed to send admin digest email: {str(e)}")
+        return False
+
+
+def send_admin_new_order_email(order, context=None):
     """
     Send new order notification email to admin.
     Called when a new order is created.
     """
-    return send_admin_order_notification_email(order, event_type='created')
+    return send_admin_order_notification_email(order, event_type='created', context=context)
 
 
-def send_admin_payment_notification_email(order):
+def send_admin_payment_notification_email(order, context=None):
     """
     Send payment received notification email to admin.
     Called when order payment is received.
     """
-    return send_admin_order_notification_email(order, event_type='paid')
+    return send_admin_order_notification_email(order, event_type='paid', context=context)
 
 
-def send_admin_shipped_notification_email(order):
+def send_admin_shipped_notification_email(order, context=None):
     """
     Send order shipped notification email to admin.
     Called when order is marked as shipped.
     """
-    return send_admin_order_notification_email(order, event_type='shipped')
+    return send_admin_order_notification_email(order, event_type='shipped', context=context)
 
 
-def send_admin_delivered_notification_email(order):
+def send_admin_delivered_notification_email(order, context=None):
     """
     Send order delivered notification email to admin.
     Called when order is marked as delivered.
     """
-    return send_admin_order_notification_email(order, event_type='delivered')
+    return send_admin_order_notification_email(order, event_type='delivered', context=context)
 
 
-def send_admin_cancelled_notification_email(order):
+def send_admin_cancelled_notification_email(order, context=None):
     """
     Send order cancelled notification email to admin.
     Called when order is cancelled.
     """
-    return send_admin_order_notification_email(order, event_type='cancelled')
+    return send_admin_order_notification_email(order, event_type='cancelled', context=context)
+
+
+
+# Customer and admin emails for a new order and for each status they are sent on
+# (queued by orders.signals, sent by orders.jobs.send_order_emails)
+EVENT_EMAILS = {
+    'new_order': (send_order_confirmation_email, send_admin_new_order_email),
+    'paid': (send_payment_received_email, send_admin_payment_notification_email),
+    'sent_to_supplier': (send_order_shipped_email, send_admin_shipped_notification_email),
+    'fulfilled': (send_order_delivered_email, send_admin_delivered_notification_email),
+    'cancelled': (send_order_cancelled_email, send_admin_cancelled_notification_email),
+}
 
+# Admin notifications that settings.ADMIN_DIGEST_INTERVAL collects into a digest,
+# as {order event: admin event_type}
+ADMIN_DIGEST_EVENTS = {
+    'new_order': 'created',
+    'paid': 'paid',
+    'sent_to_supplier': 'shipped',
+}
@@ -0,0 +1,60 @@
+import logging
+from django.conf import settings
+from django.db import transaction
+from jobs.queue import Retry, job
+from .emails import EVENT_EMAILS, order_email_context, send_admin_digest_email
+from .models import AdminDigestEntry, Order
+
+logger = logging.getLogger(__name__)
+
+EMAILS = {send.__name__: send for senders in EVENT_EMAILS.values() for send in senders}
+
+
+@job()
+def send_order_emails(order_id, emails):
+    """
+    Send the named orders.emails senders for one order event; queued from orders.signals.
+
+    The order, address, items and products are loaded once and shared by every
+    recipient's email. If some emails fail, only those are retried. Admin
+    emails are skipped while ADMIN_EMAIL is unset: retrying can't fix that.
+    """
+    if not getattr(settings, 'ADMIN_EMAIL', None):
+        skipped = [email for email in emails if email.startswith('send_admin_')]
+        if skipped:
+            logger.warning(f"ADMIN_EMAIL not configured, skipping {', '.join(skipped)} for order {order_id}")
+            emails = [email for email in emails if email not in skipped]
+    if not emails:
+        return
+    try:
+        context = order_email_context(order_id)
+    except Order.DoesNotExist:
+        logger.warning(f"Not sending {', '.join(emails)}: order {order_id} no longer exists")
+        return
+    # The senders log and return False instead of raising
+    failed = [email for email in emails if not EMAILS[email](context['order'], context=context)]
+    if failed:
+        raise Retry(f"{', '.join(failed)} failed for order {order_id}", args=[order_id, failed])
+
+
+def hold_for_digest(order, event_type):
+    """Add an admin notification to the next digest, scheduling one if none is waiting."""
+    AdminDigestEntry.objects.create(order=order, event_type=event_type)
+    send_admin_digest.enqueue_in(settings.ADMIN_DIGEST_INTERVAL * 60)  # no-op while one is waiting
+
+
+@job(unique=True)
+def send_admin_digest():
+    """Send the held admin notifications as one email; queued by hold_for_digest()."""
+    with transaction.atomic():
+        # Entries held while this runs are left for the digest hold_for_digest() schedules next
+        entries = list(
+            AdminDigestEntry.objects.select_for_update(skip_locked=True).select_related('order').order_by('created_at', 'pk')
+        )
+        if not entries:
+            return
+        if not getattr(settings, 'ADMIN_EMAIL', None):
+            logger.warning(f"ADMIN_EMAIL not configured, dropping a digest of {len(entries)} notifications")
+        elif not send_admin_digest_email(entries):
+            raise RuntimeError(f"Admin digest of {len(entries)} notifications failed")
+        AdminDigestEntry.objects.filter(pk__in=[entry.pk for entry in entries]).delete()
@@ -41,6 +41,14 @@ class Order(models.Model):
     customer_full_name = models.CharField(max_length=120, blank=True, help_text="Customer's full name at time of order")
     customer_phone = models.CharField(max_length=25, blank=True, help_text="Customer's phone number at time of order")
 
+    class Meta:
+        indexes = [
+            # Payment callbacks look orders up by the Paystack reference
+            models.Index(fields=["stripe_payment_intent"], name="order_payment_ref_idx"),
+            models.Index(fields=["status", "-created_at"], name="order_status_recent_idx"),
+            models.Index(fields=["email", "-created_at"], name="order_email_recent_idx"),
+        ]
+
     def __str__(self): return f'Order #{self.pk}'
     
     def get_total_items(self):
@@ -66,4 +74,12 @@ class OrderItem(models.Model):
     unit_price = models.DecimalField(max_digits=10, decimal_places=2)
 
     def line_total(self):
-        return self.unit_price * self.quantity
\ No newline at end of file
+        return self.unit_price * self.quantity
+
+class AdminDigestEntry(models.Model):
+    """An admin notification held for the next digest email (settings.ADMIN_DIGEST_INTERVAL)."""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='+')
+    event_type = models.CharField(max_length=20)  # as for send_admin_order_notification_email
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self): return f'{self.event_type} #{self.order_id}'
@@ -0,0 +1,52 @@
+"""
+Order placement.
+
+checkout() loads the cart once and hands its lines and totals to place_order(),
+which writes the address, the order and every line item inside one
+transaction: a failure leaves nothing half-written, and the number of queries
+is fixed whatever the cart size (one insert each for the address and the
+order, one bulk insert for the lines).
+
+bulk_create() sends no post_save for the lines, and nothing that needs the
+complete order runs mid-transaction: the order's post_save handlers queue the
+confirmation emails as jobs (jobs.queue) and defer cache invalidation to
+transaction.on_commit, so both see every line and neither happens if the
+order is rolled back.
+"""
+
+from decimal import Decimal
+from django.db import transaction
+from .models import Order, OrderItem
+
+DEFAULT_ITEM_WEIGHT = Decimal('0.5')  # kg, for products without a weight
+
+
+def order_weight(items):
+    return sum((item['product'].weight or DEFAULT_ITEM_WEIGHT) * item['quantity'] for item in items)
+
+
+def place_order(*, address, items, totals, email, user=None, shipping_method='standard'):
+    """
+    Save ``address`` (unsaved model from CheckoutForm) and create the order with its lines.
+
+    ``items`` are Cart.items() rows and ``totals`` the matching Cart.totals(); both are
+    computed by the caller so the cart is read once per request.
+    """
+    with transaction.atomic():
+        address.user = user
+        address.save()
+        order = Order.objects.create(
+            user=user,
+            email=email,
+            shipping_address=address,
+            subtotal=totals['subtotal'],
+            shipping_cost=totals['shipping'],
+            total=totals['total'],
+            shipping_method=shipping_method,
+            total_weight=order_weight(items),
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product_id=item['product'].id, quantity=item['quantity'], unit_price=item['price'])
+            for item in items
+        ])
+    return order
@@ -1,18 +1,11 @@
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
-from .models import Order
-from .emails import (
-    send_order_confirmation_email,
-    send_payment_received_email,
-    send_order_shipped_email,
-    send_order_delivered_email,
-    send_order_cancelled_email,
-    send_admin_new_order_email,
-    send_admin_payment_notification_email,
-    send_admin_shipped_notification_email,
-    send_admin_delivered_notification_email,
-    send_admin_cancelled_notification_email,
-)
+from .models import Order, OrderItem
+from shop import cache
+from django.conf import settings
+from .emails import ADMIN_DIGEST_EVENTS, EVENT_EMAILS
+from .jobs import hold_for_digest, send_order_emails
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,67 +16,34 @@ def order_status_changed(sender, instance, created, update_fields, **kwargs):
     """
     Signal handler to send emails when order status changes.
     Sends both customer and admin notifications.
+
+    The emails are queued as one job (see jobs.queue) rather than sent here, so SMTP
+    never slows the request. The jobs commit with the order: an order created by
+    orders.services.place_order has its line items by the time a worker sends
+    them, and nothing is sent for an order that is rolled back.
+
+    With settings.ADMIN_DIGEST_INTERVAL set, the admin emails for new, paid and
+    shipped orders are held for a periodic digest instead.
     """
-    # Send confirmation email when order is first created
     if created:
-        try:
-            send_order_confirmation_email(instance)
-        except Exception as e:
-            logger.error(f"Error sending confirmation email for order {instance.pk}: {e}")
-        
-        # Also notify admin of new order
-        try:
-            send_admin_new_order_email(instance)
-        except Exception as e:
-            logger.error(f"Error sending admin new order notification for order {instance.pk}: {e}")
-    
-    # Send emails based on status changes
-    if update_fields and 'status' in update_fields:
-        if instance.status == 'paid':
-            try:
-                send_payment_received_email(instance)
-            except Exception as e:
-                logger.error(f"Error sending payment email for order {instance.pk}: {e}")
-            
-            # Notify admin of payment
-            try:
-                send_admin_payment_notification_email(instance)
-            except Exception as e:
-                logger.error(f"Error sending admin payment notification for order {instance.pk}: {e}")
-        
-        elif instance.status == 'sent_to_supplier':
-            try:
-                send_order_shipped_email(instance)
-            except Exception as e:
-                logger.error(f"Error sending shipment email for order {instance.pk}: {e}")
-            
-            # Notify admin of shipment
-            try:
-                send_admin_shipped_notification_email(instance)
-            except Exception as e:
-                logger.error(f"Error sending admin shipment notification for order {instance.pk}: {e}")
-        
-        elif instance.status == 'fulfilled':
-            try:
-                send_order_delivered_email(instance)
-            except Exception as e:
-                logger.error(f"Error sending delivered email for order {instance.pk}: {e}")
-            
-            # Notify admin of delivery
-            try:
-                send_admin_delivered_notification_email(instance)
-            except Exception as e:
-                logger.error(f"Error sending admin delivery notification for order {instance.pk}: {e}")
-        
-        elif instance.status == 'cancelled':
-            try:
-                send_order_cancelled_email(instance)
-            except Exception as e:
-                logger.error(f"Error sending cancellation email for order {instance.pk}: {e}")
-            
-            # Notify admin of cancellation
-            try:
-                send_admin_cancelled_notification_email(instance)
-            except Exception as e:
-                logger.error(f"Error sending admin cancellation notification for order {instance.pk}: {e}")
+        event = 'new_order'
+    elif update_fields and 'status' in update_fields and instance.status in EVENT_EMAILS:
+        event = instance.status
+    else:
+        return
+    emails = [send.__name__ for send in EVENT_EMAILS[event]]
+    if settings.ADMIN_DIGEST_INTERVAL and event in ADMIN_DIGEST_EVENTS:
+        emails = [email for email in emails if not email.startswith('send_admin_')]
+        hold_for_digest(instance, ADMIN_DIGEST_EVENTS[event])
+    send_order_emails.enqueue(instance.pk, emails)
 
+
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def bump_order_generation(sender, raw=False, **kwargs):
+    """Invalidate values cached with shop.cache.orders_get_or_set (now and again after commit)."""
+    if not raw:
+        cache.bump("order")
+        transaction.on_commit(lambda: cache.bump("order"))
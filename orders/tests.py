@@ -1,9 +1,27 @@
-from django.test import TestCase, RequestFactory
+from datetime import timedelta
+from unittest import mock
+from django.test import TestCase, RequestFactory, override_settings
 from django.contrib.sessions.middleware import SessionMiddleware
 from django.core import mail
+from django.template import Template, RequestContext
 from decimal import Decimal
 from catalog.models import Product, Category
-from orders.cart import Cart
+from orders.cart import Cart, encode_cart, decode_cart
+from orders.services import place_order
+from orders.jobs import send_order_emails
+from orders.emails import order_email_context
+from jobs.models import Job
+from orders.models import AdminDigestEntry
+from orders.jobs import send_admin_digest
+from django.utils import timezone
+from jobs.queue import run_batch
+from catalog import snapshots
+from catalog.snapshots import get_snapshots
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.contrib.auth import get_user_model
 from orders.models import Order, Address, OrderItem
 from orders.shipping import (
     calculate_weight,
@@ -26,6 +44,9 @@ from orders.emails import (
 from shop.payments.paystack import sanitize_phone_number, prepare_customer_metadata
 
 
+User = get_user_model()
+
+
 class ShippingCalculationTest(TestCase):
     """Test shipping calculation functionality."""
 
@@ -144,6 +165,147 @@ class CartShippingTest(TestCase):
         self.assertEqual(totals["shipping_method"], "standard")
 
 
+class CartCountTest(TestCase):
+    """Test the session-cached cart count and the lazy cart context processor."""
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Electronics", slug="electronics")
+        self.phone = Product.objects.create(category=self.category, title="Phone", price=Decimal("30000.00"))
+        self.case = Product.objects.create(category=self.category, title="Case", price=Decimal("2000.00"))
+
+    def test_count_kept_in_session(self):
+        request = RequestFactory().get("/")
+        SessionMiddleware(lambda x: None).process_request(request)
+        cart = Cart(request)
+        cart.add(self.phone.id, 2)
+        cart.add(self.case.id, 1)
+        self.assertEqual(request.session["cart_count"], 3)
+        self.assertEqual(Cart.count(request), 3)
+        cart.remove(self.phone.id)
+        self.assertEqual(Cart.count(request), 1)
+        cart.clear()
+        self.assertEqual(Cart.count(request), 0)
+        self.assertEqual(len(Cart(request)), 0)
+
+    def test_update_cart_qty_updates_count(self):
+        session = self.client.session
+        session["cart"] = {str(self.phone.id): {"quantity": 1, "price": "30000.00", "title": "Phone"}}
+        session.save()
+        response = self.client.post(
+            "/orders/api/update-cart-qty/", {"product_id": self.phone.id, "quantity": 4}, content_type="application/json"
+        )
+        self.assertTrue(response.json()["success"])
+        self.assertEqual(self.client.session["cart_count"], 4)
+
+    def test_context_processor_is_lazy(self):
+        request = RequestFactory().get("/")
+        SessionMiddleware(lambda x: None).process_request(request)
+        Template("no cart here").render(RequestContext(request, {}))
+        self.assertFalse(request.session.accessed)
+        self.assertEqual(Template("{{ cart_count }}").render(RequestContext(request, {})), "0")
+        self.assertTrue(request.session.accessed)
+
+    def test_anonymous_pages_do_not_create_sessions(self):
+        response = self.client.get("/this-page-does-not-exist/")
+        self.assertEqual(response.status_code, 404)
+        self.assertNotIn("sessionid", response.cookies)
+
+
+class CartEncodingTest(TestCase):
+    """Test the compact session encoding of the cart."""
+
+    def setUp(self):
+        self.category = Category.objects.create(name="Electronics", slug="electronics")
+        self.phone = Product.objects.create(category=self.category, title="Phone", price=Decimal("30000.00"))
+
+    def request(self):
+        request = RequestFactory().get("/")
+        SessionMiddleware(lambda x: None).process_request(request)
+        return request
+
+    def test_round_trip(self):
+        cart = {"12": {"quantity": 2, "price": "30000.00"}, "15": {"quantity": 1, "price": "2000.00"}}
+        self.assertEqual(encode_cart(cart), "1;12,2,30000.00;15,1,2000.00")
+        self.assertEqual(decode_cart(encode_cart(cart)), cart)
+        self.assertEqual(decode_cart(encode_cart({})), {})
+
+    def test_legacy_and_unknown_formats(self):
+        legacy = {"12": {"quantity": 2, "price": "30000.00", "title": "Phone"}}
+        self.assertEqual(decode_cart(legacy), {"12": {"quantity": 2, "price": "30000.00"}})
+        self.assertEqual(decode_cart("9;12,2,30000.00"), {})
+        self.assertEqual(decode_cart(None), {})
+
+    def test_damaged_entries_are_skipped(self):
+        self.assertEqual(
+            decode_cart("1;12,2,30000.00;15,1;16,x,2000.00;17,1,abc;;18,1,2000.00,9"),
+            {"12": {"quantity": 2, "price": "30000.00"}},
+        )
+
+    def test_add_stores_encoded_cart(self):
+        request = self.request()
+        Cart(request).add(self.phone.id, 2)
+        self.assertEqual(request.session["cart"], f"1;{self.phone.id},2,30000.00")
+        self.assertEqual(list(Cart(request).items())[0]["title"], "Phone")
+
+    def test_no_session_write_without_cart(self):
+        request = self.request()
+        cart = Cart(request)
+        cart.remove(self.phone.id)
+        cart.clear()
+        self.assertFalse(request.session.modified)
+
+        cart.add(self.phone.id)
+        cart.clear()
+        self.assertNotIn("cart", request.session)
+        self.assertNotIn("cart_count", request.session)
+
+
+class ProductSnapshotTest(TestCase):
+    """Test that cart rendering is served from the product snapshot cache."""
+
+    def setUp(self):
+        cache.clear()
+        snapshots._local.clear()
+        self.category = Category.objects.create(name="Electronics", slug="electronics")
+        self.phone = Product.objects.create(category=self.category, title="Phone", price=Decimal("30000.00"))
+        self.case = Product.objects.create(category=self.category, title="Case", price=Decimal("2000.00"))
+        self.user = User.objects.create_user(username="shopper", email="shopper@example.com", password="pass12345")
+        self.client.force_login(self.user)
+        session = self.client.session
+        session["cart"] = {
+            str(self.phone.id): {"quantity": 1, "price": "30000.00", "title": "Phone"},
+            str(self.case.id): {"quantity": 2, "price": "2000.00", "title": "Case"},
+        }
+        session.save()
+
+    def product_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return [q["sql"] for q in ctx.captured_queries if '"catalog_product"' in q["sql"]]
+
+    def test_cart_pages_skip_product_queries_when_warm(self):
+        self.assertEqual(len(self.product_queries(reverse("orders:cart_detail"))), 1)
+        self.assertEqual(self.product_queries(reverse("orders:cart_detail")), [])
+        self.assertEqual(self.product_queries(reverse("orders:calculate_shipping_api") + "?state=lagos"), [])
+
+    def test_shared_cache_serves_other_workers(self):
+        get_snapshots([self.phone.id])
+        snapshots._local.clear()  # a different process: empty LRU, same shared cache
+        with self.assertNumQueries(0):
+            self.assertEqual(get_snapshots([self.phone.id])[self.phone.id].title, "Phone")
+
+    def test_save_invalidates_snapshot(self):
+        get_snapshots([self.phone.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.phone.title = "Phone 2"
+            self.phone.save()
+        self.assertEqual(get_snapshots([self.phone.id])[self.phone.id].title, "Phone 2")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.case.delete()
+        self.assertEqual(set(get_snapshots([self.phone.id, self.case.id])), {self.phone.id})
+
+
 class PaystackCustomerDetailsTest(TestCase):
     """Test Paystack customer details integration."""
 
@@ -821,3 +983,235 @@ class AdminEmailNotificationTest(TestCase):
         self.assertIn("Admin Test Phone", email.body)
         self.assertIn("Premium Headphones", email.body)
         self.assertIn("2", email.body)  # Quantity of second item
+
+
+class CheckoutTest(TestCase):
+    """Order placement: one transaction, bulk-created lines, emails after commit."""
+
+    ADDRESS = {
+        "full_name": "Ada Obi",
+        "line1": "12 Marina Road",
+        "city": "Lagos",
+        "state": "Lagos",
+        "postcode": "100001",
+        "country": "NG",
+        "phone_0": "NG",
+        "phone_1": "0803 123 4567",
+        "shipping_method": "standard",
+    }
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="ada", email="ada@example.com", password="pw")
+        self.client.force_login(self.user)
+        category = Category.objects.create(name="Electronics", slug="electronics")
+        self.products = [
+            Product.objects.create(category=category, title=f"Gadget {i}", slug=f"gadget-{i}", price=Decimal(1000 * (i + 1)))
+            for i in range(5)
+        ]
+
+    def fill_cart(self, products):
+        session = self.client.session
+        session["cart"] = encode_cart({str(p.id): {"quantity": 2, "price": str(p.price)} for p in products})
+        session.save()
+
+    def checkout(self):
+        with mock.patch("orders.views.initialize_transaction", return_value={"authorization_url": "https://pay.example/x"}):
+            return self.client.post(reverse("orders:checkout"), self.ADDRESS)
+
+    def test_checkout_creates_order_with_all_lines(self):
+        self.fill_cart(self.products[:3])
+        response = self.checkout()
+        self.assertRedirects(response, "https://pay.example/x", fetch_redirect_response=False)
+        order = Order.objects.get()
+        self.assertEqual(order.user, self.user)
+        self.assertEqual(order.shipping_address.user, self.user)
+        self.assertEqual(order.subtotal, Decimal("12000.00"))
+        self.assertEqual(
+            sorted((i.product_id, i.quantity, i.unit_price) for i in order.items.all()),
+            [(p.id, 2, p.price) for p in self.products[:3]],
+        )
+
+    def test_query_count_does_not_depend_on_cart_size(self):
+        counts = []
+        for products in (self.products[:1], self.products):
+            self.fill_cart(products)
+            get_snapshots([p.id for p in products])  # warm, as for a visitor who browsed the products
+            with CaptureQueriesContext(connection) as queries:
+                self.checkout()
+            counts.append(len(queries))
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_emails_queued_not_sent(self):
+        self.fill_cart(self.products[:2])
+        self.checkout()
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Job.objects.get().name, send_order_emails.job_name)
+        with self.settings(ADMIN_EMAIL="owner@example.com"):
+            self.assertEqual(run_batch(), (1, 1))
+        self.assertEqual([m.to for m in mail.outbox], [["ada@example.com"], ["owner@example.com"]])
+        self.assertIn("Gadget 1", mail.outbox[0].body)  # the lines exist by the time the worker sends
+
+    def test_failure_leaves_nothing_behind(self):
+        snapshots = get_snapshots([p.id for p in self.products[:2]])
+        with mock.patch.object(OrderItem.objects, "bulk_create", side_effect=RuntimeError("db down")):
+            with self.assertRaises(RuntimeError):
+                place_order(
+                    address=Address(full_name="Ada Obi", line1="12 Marina Road", city="Lagos"),
+                    items=[{"product": p, "quantity": 1, "price": p.price} for p in snapshots.values()],
+                    totals={"subtotal": Decimal("3000"), "shipping": Decimal("0"), "total": Decimal("3000")},
+                    email="ada@example.com",
+                )
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(Address.objects.exists())
+
+
+class OrderEmailContextTest(TestCase):
+    """Order emails load the order once per event and share it between recipients."""
+
+    def setUp(self):
+        category = Category.objects.create(name="Electronics", slug="electronics")
+        self.products = [
+            Product.objects.create(category=category, title=f"Gadget {i}", slug=f"gadget-{i}", price=Decimal("1000.00"))
+            for i in range(4)
+        ]
+        self.address = Address.objects.create(full_name="Ada Obi", line1="12 Marina Road", city="Lagos", state="Lagos")
+
+    def make_order(self, item_count):
+        order = Order.objects.create(email="ada@example.com", shipping_address=self.address, total=Decimal("5000.00"))
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=p, quantity=2, unit_price=p.price) for p in self.products[:item_count]
+        ])
+        Job.objects.all().delete()
+        mail.outbox = []
+        return order
+
+    def test_context_is_two_queries_whatever_the_item_count(self):
+        for count in (1, 4):
+            order = self.make_order(count)
+            with self.assertNumQueries(2):
+                context = order_email_context(order.pk)
+                self.assertEqual(context["total_items"], 2 * count)
+                self.assertEqual(context["total_item_value"], Decimal("2000.00") * count)
+                self.assertTrue(all(item.product.title for item in context["order_items"]))
+        self.assertEqual(context["order_title"], "2x Gadget 0 +3 more")
+
+    @override_settings(ADMIN_EMAIL="owner@example.com")
+    def test_customer_and_admin_emails_share_one_load(self):
+        order = self.make_order(3)
+        with self.assertNumQueries(2):
+            send_order_emails(order.pk, ["send_order_confirmation_email", "send_admin_new_order_email"])
+        self.assertEqual([m.to for m in mail.outbox], [["ada@example.com"], ["owner@example.com"]])
+        for message in mail.outbox:
+            self.assertIn("Gadget 2", message.body)
+
+    def test_sender_without_context_builds_it(self):
+        order = self.make_order(1)
+        self.assertTrue(send_order_confirmation_email(order))
+        self.assertIn("2x Gadget 0", mail.outbox[0].subject)
+
+    @override_settings(ADMIN_EMAIL="owner@example.com")
+    def test_only_failed_emails_are_retried(self):
+        order = self.make_order(1)
+        send_order_emails.enqueue(order.pk, ["send_order_confirmation_email", "send_admin_new_order_email"])
+        with mock.patch("orders.emails.send_admin_order_notification_email", return_value=False):
+            self.assertEqual(run_batch(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(Job.objects.get().args, [order.pk, ["send_admin_new_order_email"]])
+
+    @override_settings(ADMIN_EMAIL=None)
+    def test_admin_emails_skipped_without_admin_email(self):
+        order = self.make_order(1)
+        send_order_emails.enqueue(order.pk, ["send_order_confirmation_email", "send_admin_new_order_email"])
+        self.assertEqual(run_batch(), (1, 1))  # a missing setting is not worth retrying
+        self.assertEqual([m.to for m in mail.outbox], [["ada@example.com"]])
+        self.assertFalse(Job.objects.exists())
+
+
+@override_settings(ADMIN_DIGEST_INTERVAL=15, ADMIN_EMAIL="owner@example.com")
+class AdminDigestTest(TestCase):
+    """With ADMIN_DIGEST_INTERVAL set, admin notifications are collected into one email."""
+
+    def setUp(self):
+        self.address = Address.objects.create(full_name="Ada Obi", line1="12 Marina Road", city="Lagos", state="Lagos")
+
+    def make_order(self):
+        return Order.objects.create(email="ada@example.com", shipping_address=self.address, total=Decimal("5000.00"))
+
+    def email_jobs(self):
+        return [job.args for job in Job.objects.filter(name=send_order_emails.job_name).order_by("pk")]
+
+    def run_due_jobs(self):
+        Job.objects.update(run_at=timezone.now())
+        return run_batch()
+
+    def test_notifications_held_and_sent_as_one_digest(self):
+        orders = [self.make_order() for _ in range(3)]
+        orders[0].status = "paid"
+        orders[0].save(update_fields=["status"])
+        self.assertEqual(AdminDigestEntry.objects.count(), 4)
+        digest = Job.objects.get(name=send_admin_digest.job_name)
+        self.assertGreater(digest.run_at, timezone.now() + timedelta(minutes=14))
+        self.assertFalse(any("send_admin_new_order_email" in emails for _, emails in self.email_jobs()))
+
+        self.run_due_jobs()
+        admin_mail = [m for m in mail.outbox if m.to == ["owner@example.com"]]
+        self.assertEqual(len(admin_mail), 1)
+        self.assertIn("3 new order received, 1 payment received", admin_mail[0].subject)
+        self.assertIn(f"Order #{orders[2].pk}", admin_mail[0].body)
+        self.assertEqual(len(mail.outbox), 5)  # plus the four customer emails
+        self.assertFalse(AdminDigestEntry.objects.exists())
+
+    def test_cancellation_is_not_held(self):
+        order = self.make_order()
+        order.status = "cancelled"
+        order.save(update_fields=["status"])
+        self.assertEqual(AdminDigestEntry.objects.count(), 1)  # only the new order
+        self.assertEqual(self.email_jobs()[-1], [order.pk, ["send_order_cancelled_email", "send_admin_cancelled_notification_email"]])
+
+    def test_digest_dropped_without_admin_email(self):
+        self.make_order()
+        with self.settings(ADMIN_EMAIL=None):
+            send_admin_digest()
+        self.assertFalse(AdminDigestEntry.objects.exists())
+        self.assertFalse([m for m in mail.outbox if m.to == ["owner@example.com"]])
+
+    def test_empty_digest_sends_nothing(self):
+        send_admin_digest()
+        self.assertEqual(len(mail.outbox), 0)
+
+    @override_settings(ADMIN_DIGEST_INTERVAL=0)
+    def test_disabled_by_default(self):
+        self.make_order()
+        self.assertFalse(AdminDigestEntry.objects.exists())
+        self.assertEqual(self.email_jobs()[0][1], ["send_order_confirmation_email", "send_admin_new_order_email"])
+
+
+
+class OrderAdminStatusCountTest(TestCase):
+    """Test the cached per-status totals on the admin order list."""
+
+    def setUp(self):
+        cache.clear()
+        self.address = Address.objects.create(
+            full_name="Ada", phone="+234 803 000 0000", line1="1 Test St", city="Lagos", state="lagos", country="NG"
+        )
+        self.order = Order.objects.create(email="ada@example.com", shipping_address=self.address)
+        admin_user = get_user_model().objects.create_superuser("boss", "boss@example.com", "pass12345")
+        self.client.force_login(admin_user)
+        self.url = reverse("admin:orders_order_changelist")
+
+    def status_counts(self):
+        return dict(self.client.get(self.url).context["status_counts"])
+
+    def test_counts_are_cached_until_an_order_changes(self):
+        self.assertEqual(self.status_counts()["Created"], 1)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url)
+        self.assertFalse([q for q in ctx.captured_queries if "GROUP BY" in q["sql"]])
+
+        self.order.status = "paid"
+        self.order.save()
+        counts = self.status_counts()
+        self.assertEqual((counts["Created"], counts["Paid"]), (0, 1))
@@ -4,7 +4,9 @@ from django.contrib import messages
 from .cart import Cart
 from .forms import CheckoutForm
 from .models import Order, OrderItem, Address
+from .services import place_order
 from catalog.models import Product
+from catalog.snapshots import get_snapshot
 from .emails import send_order_confirmation_email
 from django.conf import settings
 from pathlib import Path
@@ -63,90 +65,56 @@ def cart_remove(request, product_id):
 @login_required
 def checkout(request):
     cart = Cart(request)
-    items = list(cart.items())
-    
-    # Get shipping method from POST or default to 'standard'
-    shipping_method = request.POST.get('shipping_method', 'standard') if request.method == 'POST' else 'standard'
-    destination_state = request.POST.get('state', None) if request.method == 'POST' else None
-    
-    # Calculate totals with selected shipping
-    items = list(cart.items())
-    subtotal = sum(item['price'] * item['quantity'] for item in items)
-    totals = cart.totals(shipping_method=shipping_method, destination_state=destination_state)
-    
+    items = list(cart.items())  # loaded once; the totals, shipping options and order all reuse it
+
     if not items:
         messages.warning(request, 'Your cart is empty.')
         return redirect('catalog:list')
 
+    # Get shipping method from POST or default to 'standard'
+    shipping_method = request.POST.get('shipping_method', 'standard') if request.method == 'POST' else 'standard'
+    destination_state = request.POST.get('state', None) if request.method == 'POST' else None
+    totals = cart.totals(shipping_method=shipping_method, destination_state=destination_state, items=items)
+
     if request.method == 'POST':
         form = CheckoutForm(request.POST)
         if form.is_valid():
             addr = form.save(commit=False)
-            if request.user.is_authenticated:
-                addr.user = request.user
-            addr.save()
-
-            # Calculate total weight for the order
-            total_weight = sum(
-                (item['product'].weight or Decimal('0.5')) * item['quantity'] 
-                for item in items
-            )
-
-            order = Order.objects.create(
-                user=request.user if request.user.is_authenticated else None,
-                email=request.user.email if request.user.is_authenticated else request.POST.get('email', ''),
-                shipping_address=addr,
-                subtotal=totals['subtotal'],
-                shipping_cost=totals['shipping'],
-                total=totals['total'],
+            user = request.user if request.user.is_authenticated else None
+            order = place_order(
+                address=addr,
+                items=items,
+                totals=totals,
+                email=user.email if user else request.POST.get('email', ''),
+                user=user,
                 shipping_method=shipping_method,
-                total_weight=total_weight,
             )
-            for i in items:
-                OrderItem.objects.create(
-                    order=order,
-                    product=i['product'],
-                    quantity=i['quantity'],
-                    unit_price=i['price'],
-                )
 
             # Initialize a Paystack transaction and redirect the user
             try:
                 callback = settings.PAYSTACK_CALLBACK_URL or request.build_absolute_uri(reverse('orders:verify_paystack'))
-                # Get customer details from the address
-                full_name = addr.full_name
-                phone_number = addr.phone
-                
                 init = initialize_transaction(
                     totals['total'],
                     order.email,
                     reference=f"order_{order.pk}",
                     callback_url=callback,
-                    full_name=full_name,
-                    phone_number=phone_number
+                    full_name=addr.full_name,
+                    phone_number=addr.phone
                 )
                 # Paystack returns an authorization_url to redirect the customer to
-                auth_url = init.get('authorization_url')
-                # Store the returned reference on the order for later verification (reuse stripe_payment_intent field)
-                # order.stripe_payment_intent = init.get('reference') or ''
-                order.save()
-                return HttpResponseRedirect(auth_url)
+                return HttpResponseRedirect(init.get('authorization_url'))
             except Exception as e:
                 messages.error(request, f"Payment initialization failed: {e}")
                 # Let user retry or return to checkout
                 return redirect('orders:checkout')
     else:
         form = CheckoutForm()
-        # Get all shipping options to display
-        items = list(cart.items())
-        subtotal = sum(Decimal(str(item['price'])) * item['quantity'] for item in items)
-        shipping_options = get_all_shipping_options(items, destination_state, subtotal)
 
     return render(request, 'orders/checkout.html', {
         'form': form,
         'cart_items': items,
         'totals': totals,
-        'shipping_options': shipping_options,
+        'shipping_options': get_all_shipping_options(items, destination_state, totals['subtotal']),
         'selected_shipping_method': shipping_method,
 
     })
@@ -210,7 +178,8 @@ def verify_paystack(request):
 
     # expected metadata or amount can be checked here
     # Find corresponding order by stored reference
-    order = Order.objects.filter(stripe_payment_intent__iexact=reference).first()
+    # Exact match so the lookup can use order_payment_ref_idx (references are case-sensitive anyway)
+    order = Order.objects.filter(stripe_payment_intent=reference).first()
     if not order:
         # Try matching reference prefix order_<id>
         if reference.startswith('order_'):
@@ -269,8 +238,8 @@ def update_cart_qty(request):
             if new_qty < 1:
                 return JsonResponse({'success': False, 'message': f'Quantity for product {product_id} must be at least 1'})
             
-            # Get the product to verify it exists
-            product = Product.objects.get(id=product_id)
+            # Verify the product exists (served from the snapshot cache)
+            get_snapshot(product_id)
             
             # Update quantity in cart
             if str(product_id) in cart.cart:
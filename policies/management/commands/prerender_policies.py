@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from policies.prerender import build, output_dir
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-render the policy pages to static HTML for anonymous visitors. "
+        "Run after collectstatic on deploy and again just after midnight, since the pages show today's date."
+    )
+
+    def handle(self, *args, **options):
+        written = build()
+        self.stdout.write(self.style.SUCCESS(f"Pre-rendered {len(written)} policy pages into {output_dir()}."))
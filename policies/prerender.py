@@ -0,0 +1,127 @@
+"""
+Pre-rendered policy pages.
+
+The policy pages only change on deploy or when ``effective_date`` rolls over at
+midnight, so ``manage.py prerender_policies`` renders them once, as an anonymous
+visitor sees them, into PRERENDER_ROOT/policies/ together with a manifest
+recording the date they were built for. Requests from visitors without a
+session are then answered from memory: no session load, no cart, no template
+engine.
+
+The two per-request pieces of the page are rendered as sentinels and filled in
+when serving: the CSRF token (newsletter/search forms) and the site origin used
+by the share links.
+
+When the files are missing or were built for an earlier day, the same anonymous
+render is done on demand and cached for the rest of the day.
+"""
+
+import json
+import time
+from datetime import date
+from importlib import import_module
+from pathlib import Path
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+PRERENDER_HOST = "prerender.invalid"
+ORIGIN_SENTINEL = f"http://{PRERENDER_HOST}"
+CSRF_SENTINEL = "__prerender_csrf_token__"
+CACHE_TIMEOUT = 60 * 60
+RECHECK_INTERVAL = 60  # seconds between disk checks while the files are missing or stale
+
+_loaded = {}  # page name -> (date the html is valid for, html, monotonic time of the last disk check)
+
+
+def output_dir():
+    return Path(settings.PRERENDER_ROOT) / "policies"
+
+
+class _PrerenderRequest(HttpRequest):
+    """A request for the page as a first-time anonymous visitor, on a placeholder host."""
+
+    def __init__(self, path):
+        super().__init__()
+        self.method = "GET"
+        self.path = self.path_info = path
+        self.META = {"SERVER_NAME": PRERENDER_HOST, "SERVER_PORT": "80"}
+        self.user = AnonymousUser()
+        self.session = import_module(settings.SESSION_ENGINE).SessionStore()  # never saved
+
+    def get_host(self):
+        # Skip ALLOWED_HOSTS validation for the placeholder host
+        return PRERENDER_HOST
+
+
+def render_anonymous(name):
+    """Render policy page ``name`` with sentinels in place of the per-request values."""
+    from .views import POLICY_PAGES, policy_context
+
+    request = _PrerenderRequest(reverse(f"policies:{name}"))
+    context = {**policy_context(name), "csrf_token": CSRF_SENTINEL}
+    return render_to_string(POLICY_PAGES[name], context, request)
+
+
+def build(names=None):
+    """Write every policy page plus manifest.json; returns the paths written."""
+    from .views import POLICY_PAGES
+
+    directory = output_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    written = []
+    for name in names or POLICY_PAGES:
+        path = directory / f"{name}.html"
+        path.write_text(render_anonymous(name), encoding="utf-8")
+        written.append(path)
+    manifest = {"date": date.today().isoformat(), "pages": sorted(p.stem for p in written)}
+    (directory / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+    _loaded.clear()
+    return written
+
+
+def _read_from_disk(name):
+    directory = output_dir()
+    try:
+        manifest = json.loads((directory / "manifest.json").read_text(encoding="utf-8"))
+        if manifest.get("date") != date.today().isoformat():
+            return None
+        return (directory / f"{name}.html").read_text(encoding="utf-8")
+    except (OSError, ValueError):
+        return None
+
+
+def prerendered_html(name):
+    """Today's pre-built page from memory, reading it from disk at most once per RECHECK_INTERVAL."""
+    today = date.today().isoformat()
+    built_for, html, checked_at = _loaded.get(name, (None, None, None))
+    if built_for == today:
+        return html
+    if checked_at is None or time.monotonic() - checked_at > RECHECK_INTERVAL:
+        html = _read_from_disk(name)
+        _loaded[name] = (today if html is not None else None, html, time.monotonic())
+        return html
+    return None
+
+
+def is_anonymous_visit(request):
+    """True if the response can't depend on the visitor: no session (so no user, no cart) and no flash messages."""
+    return (
+        request.method in ("GET", "HEAD")
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and "messages" not in request.COOKIES  # CookieStorage's cookie
+    )
+
+
+def anonymous_page(request, name):
+    html = prerendered_html(name)
+    if html is None:
+        html = cache.get_or_set(
+            f"policies:page:{name}:{date.today().isoformat()}", lambda: render_anonymous(name), CACHE_TIMEOUT
+        )
+    origin = f"{request.scheme}://{request.get_host()}"
+    return HttpResponse(html.replace(CSRF_SENTINEL, get_token(request)).replace(ORIGIN_SENTINEL, origin))
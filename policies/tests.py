@@ -1,3 +1,57 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import date
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+from policies import prerender
+from policies.views import POLICY_PAGES
 
-# Create your tests here.
+User = get_user_model()
+
+
+class PrerenderedPolicyPagesTest(TestCase):
+    """Test pre-rendered policy pages and their dynamic fallback."""
+
+    def setUp(self):
+        cache.clear()
+        prerender._loaded.clear()
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        override = override_settings(PRERENDER_ROOT=root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_build_writes_every_page_and_manifest(self):
+        written = prerender.build()
+        self.assertEqual(sorted(p.stem for p in written), sorted(POLICY_PAGES))
+        manifest = (prerender.output_dir() / "manifest.json").read_text()
+        self.assertIn(date.today().isoformat(), manifest)
+
+    def test_anonymous_visit_served_without_session_or_queries(self):
+        prerender.build()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("policies:privacy"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, date.today().strftime("%B %d, %Y"))
+        self.assertNotContains(response, prerender.CSRF_SENTINEL)
+        self.assertNotContains(response, prerender.PRERENDER_HOST)
+        self.assertContains(response, "http://testserver/policies/privacy/")
+        self.assertIn(settings.CSRF_COOKIE_NAME, response.cookies)
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+
+    def test_stale_build_falls_back_to_cached_render(self):
+        prerender.build()
+        (prerender.output_dir() / "manifest.json").write_text('{"date": "2000-01-01", "pages": []}')
+        prerender._loaded.clear()
+        response = self.client.get(reverse("policies:about"))
+        self.assertContains(response, date.today().strftime("%B %d, %Y"))
+        self.assertIsNotNone(cache.get(f"policies:page:about:{date.today().isoformat()}"))
+
+    def test_logged_in_users_get_a_personal_render(self):
+        prerender.build()
+        user = User.objects.create_user(username="shopper", email="shopper@example.com", password="pass12345")
+        self.client.force_login(user)
+        self.assertContains(self.client.get(reverse("policies:terms")), "Welcome shopper")
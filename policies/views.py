@@ -1,95 +1,69 @@
 from datetime import date
 from django.shortcuts import render
-
-# Create your views here.
-def about(request):
+from .prerender import is_anonymous_visit, anonymous_page
+
+# Template for each policy page, keyed by its URL name
+POLICY_PAGES = {
+    "about": "policies/about.html",
+    "privacy": "policies/privacy.html",
+    "terms": "policies/terms.html",
+    "affiliate": "policies/affiliate.html",
+    "editorial": "policies/editorial.html",
+    "advertising": "policies/advertising.html",
+    "user_content": "policies/user-content.html",
+    "accessibility": "policies/accessibility.html",
+    "faqs": "policies/faqs.html",
+}
+
+
+def policy_context(name):
     context = {
         "company_name": "JagOfTrade",
-        "mission_statement": "We empower shoppers in Nigeria and beyond to make confident, value‑driven decisions.",
-        "values_statement": "Integrity, clarity, and accessibility guide everything we publish.",
         "contact_email": "support@jagoftrade.com",
         "location": "Abuja, FCT, Nigeria",
         "effective_date": date.today().strftime("%B %d, %Y"),
     }
+    if name == "about":
+        context.update({
+            "mission_statement": "We empower shoppers in Nigeria and beyond to make confident, value‑driven decisions.",
+            "values_statement": "Integrity, clarity, and accessibility guide everything we publish.",
+        })
+    return context
 
-    return render(request, "policies/about.html", context)
 
-def privacy(request):
-    context = {
-        "company_name": "JagOfTrade",
-        "contact_email": "support@jagoftrade.com",
-        "location": "Abuja, FCT, Nigeria",
-        "effective_date": date.today().strftime("%B %d, %Y"),
-    }
+def policy_page(request, name):
+    """
+    Anonymous visitors without a session (crawlers, first-time visitors) get the
+    pre-rendered page; anyone else gets a normal render with their own header.
+    """
+    if is_anonymous_visit(request):
+        return anonymous_page(request, name)
+    return render(request, POLICY_PAGES[name], policy_context(name))
 
-    return render(request, "policies/privacy.html", context)
 
-def terms(request):
-    context = {
-        "company_name": "JagOfTrade",
-        "contact_email": "support@jagoftrade.com",
-        "location": "Abuja, FCT, Nigeria",
-        "effective_date": date.today().strftime("%B %d, %Y"),
-    }
+def about(request):
+    return policy_page(request, "about")
 
-    return render(request, "policies/terms.html", context)
+def privacy(request):
+    return policy_page(request, "privacy")
 
-def affiliate(request):
-    context = {
-        "company_name": "JagOfTrade",
-        "contact_email": "support@jagoftrade.com",
-        "location": "Abuja, FCT, Nigeria",
-        "effective_date": date.today().strftime("%B %d, %Y"),
-    }
+def terms(request):
+    return policy_page(request, "terms")
 
-    return render(request, "policies/affiliate.html", context)
+def affiliate(request):
+    return policy_page(request, "affiliate")
 
 def editorial(request):
-    context = {
-        "company_name": "JagOfTrade",
-        "contact_email": "support@jagoftrade.com",
-        "location": "Abuja, FCT, Nigeria",
-        "effective_date": date.today().strftime("%B %d, %Y"),
-    }
-
-    return render(request, "policies/editorial.html", context)
+    return policy_page(request, "editorial")
 
 def advertising(request):
-    context = {
-        "company_name": "JagOfTrade",
-        "contact_email": "support@jagoftrade.com",
-        "location": "Abuja, FCT, Nigeria",
-        "effective_date": date.today().strftime("%B %d, %Y"),
-    }
-
-    return render(request, "policies/advertising.html", context)
+    return policy_page(request, "advertising")
 
 def user_content(request):
-    context = {
-        "company_name": "JagOfTrade",
-        "contact_email": "support@jagoftrade.com",
-        "location": "Abuja, FCT, Nigeria",
-        "effective_date": date.today().strftime("%B %d, %Y"),
-    }
-
-    return render(request, "policies/user-content.html", context)
+    return policy_page(request, "user_content")
 
 def accessibility(request):
-    context = {
-        "company_name": "JagOfTrade",
-        "contact_email": "support@jagoftrade.com",
-        "location": "Abuja, FCT, Nigeria",
-        "effective_date": date.today().strftime("%B %d, %Y"),
-    }
-
-    return render(request, "policies/accessibility.html", context)
+    return policy_page(request, "accessibility")
 
 def faqs(request):
-    context = {
-        "company_name": "JagOfTrade",
-        "contact_email": "support@jagoftrade.com",
-        "location": "Abuja, FCT, Nigeria",
-        "effective_date": date.today().strftime("%B %d, %Y"),
-    }
-
-    return render(request, "policies/faqs.html", context)
\ No newline at end of file
+    return policy_page(request, "faqs")
@@ -0,0 +1,153 @@
+"""
+Two-tier cache used by the apps, with generation-based invalidation.
+
+Tiers:
+- ``shared`` is Django's default cache (``settings.CACHES``, configured from
+  ``CACHE_URL``): Redis, Memcached or a file cache in production, seen by
+  every worker; LocMemCache in development and tests.
+- ``local`` is a small per-process LRU in front of it for values read on
+  most requests, so a warm lookup costs no network round trip beyond the
+  generation check.
+
+Invalidation never deletes or scans keys. Each kind of data ("product",
+"category", "order", or a single object such as "product:12") has a
+generation counter in the shared cache. Values are stored under keys that
+embed the generations they depend on, so bumping a counter (done from the
+model signals) makes every worker's next lookup miss in both tiers, and the
+outdated entries simply age out.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from django.core.cache import cache as shared
+
+LOCAL_SIZE = 4096
+LOCAL_TIMEOUT = 30  # seconds; only matters for values that don't depend on a generation
+DEFAULT_TIMEOUT = 60 * 60
+
+CATALOG = ("product", "category")
+ORDERS = ("order",)
+
+_MISSING = object()
+
+
+class LRU:
+    """A small thread-safe least-recently-used mapping with optional per-entry expiry."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.lock = threading.Lock()
+        self.data = OrderedDict()
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires is not None and expires < time.monotonic():
+                del self.data[key]
+                return default
+            self.data.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        with self.lock:
+            self.data[key] = (None if timeout is None else time.monotonic() + timeout, value)
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+    def __len__(self):
+        return len(self.data)
+
+
+local = LRU(LOCAL_SIZE)
+
+
+# --- generations ---
+
+def _generation_key(name):
+    return f"gen:{name}"
+
+
+def generations(names):
+    """``{name: generation}`` in one shared-cache round trip; unknown counters are started."""
+    keys = {_generation_key(name): name for name in names}
+    found = {keys[key]: value for key, value in shared.get_many(keys).items()}
+    missing = {key: time.time_ns() for key, name in keys.items() if name not in found}
+    if missing:
+        # Seed from the clock, never from 0: after an eviction or a flushed cache a
+        # counter must not return to a value some worker has cached entries under
+        shared.set_many(missing, timeout=None)
+        found.update({keys[key]: value for key, value in missing.items()})
+    return found
+
+
+def generation(name):
+    return generations([name])[name]
+
+
+def bump(name):
+    """Advance one generation; returns the new value."""
+    try:
+        return shared.incr(_generation_key(name))
+    except ValueError:
+        value = time.time_ns()
+        shared.set(_generation_key(name), value, timeout=None)
+        return value
+
+
+def bump_many(names):
+    """Advance several generations in one round trip (e.g. a batch of products)."""
+    shared.set_many({_generation_key(name): time.time_ns() for name in names}, timeout=None)
+
+
+# --- cached values ---
+
+def versioned_key(key, depends_on):
+    """``key`` suffixed with the current generations of ``depends_on``."""
+    if not depends_on:
+        return key
+    current = generations(depends_on)
+    return f"{key}:g" + ".".join(str(current[name]) for name in depends_on)
+
+
+def get_or_set(key, compute, depends_on=(), timeout=DEFAULT_TIMEOUT):
+    """
+    Return the cached value for ``key``, calling ``compute()`` on a miss in both tiers.
+
+    ``depends_on`` names the generations that invalidate the value when bumped.
+    """
+    key = versioned_key(key, depends_on)
+    value = local.get(key, _MISSING)
+    if value is not _MISSING:
+        return value
+    value = shared.get(key, _MISSING)
+    if value is _MISSING:
+        value = compute()
+        shared.set(key, value, timeout)
+    local.set(key, value, LOCAL_TIMEOUT if not depends_on else timeout)
+    return value
+
+
+def put(key, value, depends_on=(), timeout=DEFAULT_TIMEOUT):
+    """Store ``value`` as get_or_set() would, e.g. to refresh it ahead of the next read."""
+    key = versioned_key(key, depends_on)
+    shared.set(key, value, timeout)
+    local.set(key, value, LOCAL_TIMEOUT if not depends_on else timeout)
+
+
+def catalog_get_or_set(name, compute, timeout=DEFAULT_TIMEOUT):
+    """Cache a value derived from products and categories (e.g. facet rows, listings)."""
+    return get_or_set(f"catalog:{name}", compute, CATALOG, timeout)
+
+
+def orders_get_or_set(name, compute, timeout=DEFAULT_TIMEOUT):
+    """Cache a value derived from orders (e.g. dashboard counts)."""
+    return get_or_set(f"orders:{name}", compute, ORDERS, timeout)
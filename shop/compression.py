@@ -0,0 +1,228 @@
+"""
+Compression of dynamic responses (pages, JSON), negotiated from Accept-Encoding.
+
+WhiteNoise already serves pre-compressed static files; this covers everything
+the views render. Brotli is used when the ``brotli`` package is installed and
+the client prefers or accepts it, gzip otherwise. Responses below
+``COMPRESSION_MIN_SIZE`` bytes, non-text types and responses that already carry
+a Content-Encoding are left alone. Streaming responses are compressed chunk by
+chunk with a flush after each one, so clients still receive data as soon as
+the view yields it.
+
+HTML is always gzip, with a random-length filename in the gzip header, as
+Django's GZipMiddleware does: pages carry CSRF tokens next to reflected input
+(search terms, form values), and the padding makes the compressed length too
+noisy for a BREACH attack to read a secret out of it. Brotli has no header
+field to pad, so it is only used for the other types (JSON, scripts, SVG).
+
+Byte savings are counted per route (URL name). Each process accumulates them
+in memory and adds them to shared-cache counters every FLUSH_INTERVAL
+seconds; ``manage.py compression_report`` prints the totals.
+"""
+
+import gzip
+import secrets
+import threading
+import time
+import zlib
+from django.core.cache import cache
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/xhtml+xml",
+    "image/svg+xml",
+)
+BROTLI_QUALITY = 5  # dynamic content: 4-6 is close to max ratio at a fraction of the CPU cost of 11
+GZIP_LEVEL = 6
+MAX_RANDOM_BYTES = 100  # gzip filename padding for HTML, as in django.middleware.gzip.GZipMiddleware
+FLUSH_INTERVAL = 30
+STATS_PREFIX = "compression:"
+ROUTES_KEY = f"{STATS_PREFIX}routes"
+
+
+def supported_encodings():
+    return ("br", "gzip") if brotli else ("gzip",)
+
+
+def negotiate(accept_encoding, encodings=None):
+    """
+    Pick the content coding for an Accept-Encoding header, or None for identity.
+
+    The highest q-value wins; on a tie Brotli is preferred. ``*`` covers
+    codings not listed explicitly, and ``q=0`` refuses one. ``encodings``
+    limits the choice (default: supported_encodings()).
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding] = q
+    best, best_q = None, 0.0
+    for coding in encodings or supported_encodings():
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def _content_type(response):
+    return response.get("Content-Type", "").split(";")[0].strip().lower()
+
+
+def is_compressible(response):
+    return _content_type(response).startswith(COMPRESSIBLE_TYPES)
+
+
+def needs_padding(response):
+    """HTML pages can hold secrets next to reflected input; see the module docstring."""
+    return _content_type(response) in ("text/html", "application/xhtml+xml")
+
+
+def pad_gzip_header(data):
+    """Insert a random-length FNAME field into the header of a gzip member (``data`` starts with it)."""
+    header = bytearray(data[:10])
+    header[3] |= gzip.FNAME
+    return bytes(header) + b"a" * secrets.randbelow(MAX_RANDOM_BYTES) + b"\0" + data[10:]
+
+
+def compress(data, encoding, pad=False):
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    data = zlib.compress(data, GZIP_LEVEL, wbits=31)
+    return pad_gzip_header(data) if pad else data
+
+
+class StreamCompressor:
+    """Incremental compressor; every ``compress()`` returns output the client can decode immediately."""
+
+    def __init__(self, encoding, pad=False):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+            self._pad = pad  # until the header has gone out
+
+    def compress(self, chunk):
+        if self.encoding == "br":
+            return self._brotli.process(chunk) + self._brotli.flush()
+        return self._gzip(self._zlib.compress(chunk) + self._zlib.flush(zlib.Z_SYNC_FLUSH))
+
+    def finish(self):
+        if self.encoding == "br":
+            return self._brotli.finish()
+        return self._gzip(self._zlib.flush(zlib.Z_FINISH))
+
+    def _gzip(self, data):
+        # zlib writes the 10-byte header with the first output, and every flush produces output
+        if self._pad and data:
+            self._pad = False
+            return pad_gzip_header(data)
+        return data
+
+
+def compress_stream(chunks, encoding, on_done, pad=False):
+    """Compress an iterator of byte chunks; calls ``on_done(original bytes, compressed bytes)`` at the end."""
+    compressor, size_in, size_out = StreamCompressor(encoding, pad), 0, 0
+    for chunk in chunks:
+        size_in += len(chunk)
+        data = compressor.compress(chunk)
+        size_out += len(data)
+        if data:
+            yield data
+    data = compressor.finish()
+    on_done(size_in, size_out + len(data))
+    yield data
+
+
+async def acompress_stream(chunks, encoding, on_done, pad=False):
+    compressor, size_in, size_out = StreamCompressor(encoding, pad), 0, 0
+    async for chunk in chunks:
+        size_in += len(chunk)
+        data = compressor.compress(chunk)
+        size_out += len(data)
+        if data:
+            yield data
+    data = compressor.finish()
+    on_done(size_in, size_out + len(data))
+    yield data
+
+
+# --- per-route savings ---
+
+class CompressionStats:
+    """Per-process byte counters, periodically added to the shared cache."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}  # route -> [responses, original bytes, sent bytes]
+        self.routes = set()  # every route this process has seen, re-registered on each flush
+        self.flushed_at = time.monotonic()
+
+    def record(self, route, size_in, size_out):
+        with self.lock:
+            counts = self.pending.setdefault(route, [0, 0, 0])
+            counts[0] += 1
+            counts[1] += size_in
+            counts[2] += size_out
+            due = time.monotonic() - self.flushed_at >= FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.routes.update(pending)
+            routes = set(self.routes)
+            self.flushed_at = time.monotonic()
+        for route, counts in pending.items():
+            for field, value in zip(("responses", "original", "sent"), counts):
+                key = f"{STATS_PREFIX}{route}:{field}"
+                cache.add(key, 0, timeout=None)
+                cache.incr(key, value)
+        known = cache.get(ROUTES_KEY) or set()
+        if not routes <= known:
+            cache.set(ROUTES_KEY, known | routes, timeout=None)
+
+
+stats = CompressionStats()
+
+
+def report():
+    """``{route: {"responses", "original", "sent"}}`` summed over every process that has flushed."""
+    stats.flush()
+    routes = sorted(cache.get(ROUTES_KEY) or ())
+    keys = [f"{STATS_PREFIX}{route}:{field}" for route in routes for field in ("responses", "original", "sent")]
+    values = cache.get_many(keys)
+    return {
+        route: {
+            field: values.get(f"{STATS_PREFIX}{route}:{field}", 0) for field in ("responses", "original", "sent")
+        }
+        for route in routes
+    }
+
+
+def reset_report():
+    routes = cache.get(ROUTES_KEY) or ()
+    cache.delete_many([f"{STATS_PREFIX}{route}:{field}" for route in routes for field in ("responses", "original", "sent")])
+    cache.delete(ROUTES_KEY)
+    with stats.lock:
+        stats.pending.clear()
+        stats.routes.clear()
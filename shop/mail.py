@@ -0,0 +1,65 @@
+"""
+Outgoing mail over a shared connection.
+
+EmailMessage.send() without a connection opens a new one for every message:
+a TCP connect, TLS handshake and SMTP login each time. Inside ``batch()``,
+messages sent with ``send()`` (and anything passing ``connection()`` to
+Django's mail functions) reuse one connection, opened on the first message
+and closed when the batch ends. The job worker runs each batch of jobs
+inside one (see jobs.queue.run_batch), so a burst of order emails shares a
+single SMTP session.
+
+Outside a batch ``connection()`` is None and Django opens one per message
+as before.
+"""
+
+import threading
+from contextlib import contextmanager
+from django.core.mail import get_connection
+
+_local = threading.local()
+
+
+@contextmanager
+def batch():
+    """Share one connection for the messages sent in this block (nested batches reuse the outer one)."""
+    if getattr(_local, "active", False):
+        yield
+        return
+    _local.active, _local.connection = True, None
+    try:
+        yield
+    finally:
+        reset()
+        _local.active = False
+
+
+def connection():
+    """The batch's open connection (opened now if needed), or None outside a batch."""
+    if not getattr(_local, "active", False):
+        return None
+    if _local.connection is None:
+        _local.connection = get_connection()
+        _local.connection.open()
+    return _local.connection
+
+
+def reset():
+    """Close the batch's connection; the next message opens a fresh one."""
+    current, _local.connection = getattr(_local, "connection", None), None
+    if current is not None:
+        try:
+            current.close()
+        except Exception:
+            pass  # already broken; the point is to stop using it
+
+
+def send(message):
+    """Send an EmailMessage over the batch connection."""
+    message.connection = connection()
+    try:
+        return message.send(fail_silently=False)
+    except Exception:
+        # The server may have dropped the session; don't hand it to the next message
+        reset()
+        raise
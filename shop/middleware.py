@@ -1,4 +1,9 @@
 # myapp/middleware.py
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from shop import compression
+
+
 class CSPReportOnlyMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -10,4 +15,57 @@ class CSPReportOnlyMiddleware:
             "frame-src https://accounts.google.com/gsi/; "
             "connect-src https://accounts.google.com/gsi/;"
         )
-        return response
\ No newline at end of file
+        return response
+
+class CompressionMiddleware:
+    """
+    Brotli/gzip compression of dynamic responses (see shop/compression.py).
+
+    Sits right after WhiteNoiseMiddleware, so static files, which WhiteNoise
+    serves pre-compressed, never reach it.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, "COMPRESSION_MIN_SIZE", 1024)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header("Content-Encoding") or not compression.is_compressible(response):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        pad = compression.needs_padding(response)  # BREACH: padded gzip only
+        encoding = compression.negotiate(request.META.get("HTTP_ACCEPT_ENCODING", ""), ("gzip",) if pad else None)
+        if encoding is None:
+            return response
+
+        match = getattr(request, "resolver_match", None)
+        route = (match.view_name if match else None) or "-"
+
+        def record(size_in, size_out):
+            compression.stats.record(route, size_in, size_out)
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compression.acompress_stream(response.streaming_content, encoding, record, pad)
+            else:
+                response.streaming_content = compression.compress_stream(response.streaming_content, encoding, record, pad)
+            # The compressed length isn't known until the stream ends
+            del response.headers["Content-Length"]
+        else:
+            compressed = compression.compress(response.content, encoding, pad)
+            if len(compressed) >= len(response.content):
+                return response
+            record(len(response.content), len(compressed))
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # A strong ETag must not be shared by different encodings (RFC 9110 8.8.1)
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,132 @@
+"""
+A local stand-in for the Paystack API, for load and failure testing offline.
+
+Implements the two endpoints the shop uses, POST /transaction/initialize and
+GET /transaction/verify/<reference>, with Paystack's response shapes.
+Behaviour is adjustable while it runs (``server.behaviour``):
+
+- ``latency``: seconds added to every response, plus up to ``jitter`` more;
+- ``failure_rate``: fraction of requests answered with ``failure_status``;
+- ``hang_rate``: fraction of requests that stall for ``hang`` seconds
+  before answering, to exercise read timeouts.
+
+It counts requests and the TCP connections they arrived on, so connection
+reuse can be checked. Start it with ``manage.py fake_paystack`` and set
+PAYSTACK_BASE_URL=http://127.0.0.1:<port>, or use ``start()`` in tests.
+"""
+
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class Behaviour:
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, failure_status=503, hang_rate=0.0, hang=30.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.hang_rate = hang_rate
+        self.hang = hang
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+    disable_nagle_algorithm = True  # headers and body are separate writes; don't add delayed-ACK stalls
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if self.path.rstrip("/") != "/transaction/initialize":
+            return self.respond(404, {"status": False, "message": "Not found"})
+        if not body.get("email") or not body.get("amount"):
+            return self.respond(400, {"status": False, "message": "Email and amount are required"})
+        reference = body.get("reference") or uuid.uuid4().hex[:12]
+        with self.server.lock:
+            self.server.transactions[reference] = body
+        self.respond(200, {
+            "status": True,
+            "message": "Authorization URL created",
+            "data": {
+                "authorization_url": f"http://{self.headers.get('Host')}/checkout/{reference}",
+                "access_code": uuid.uuid4().hex[:15],
+                "reference": reference,
+            },
+        })
+
+    def do_GET(self):
+        prefix = "/transaction/verify/"
+        if not self.path.startswith(prefix):
+            return self.respond(404, {"status": False, "message": "Not found"})
+        reference = self.path[len(prefix):]
+        with self.server.lock:
+            transaction = self.server.transactions.get(reference)
+        if transaction is None:
+            return self.respond(400, {"status": False, "message": "Transaction reference not found"})
+        self.respond(200, {
+            "status": True,
+            "message": "Verification successful",
+            "data": {
+                "status": "success",
+                "reference": reference,
+                "amount": transaction["amount"],
+                "customer": {"email": transaction["email"]},
+                "metadata": transaction.get("metadata", {}),
+            },
+        })
+
+    def respond(self, status, payload):
+        behaviour = self.server.behaviour
+        with self.server.lock:
+            self.server.requests += 1
+        delay = behaviour.latency + random.uniform(0, behaviour.jitter)
+        if random.random() < behaviour.hang_rate:
+            delay += behaviour.hang
+        if delay:
+            time.sleep(delay)
+        if random.random() < behaviour.failure_rate:
+            status, payload = behaviour.failure_status, {"status": False, "message": "Injected failure"}
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakePaystackServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # a load test opens many connections at once
+
+    def __init__(self, address=("127.0.0.1", 0), behaviour=None, verbose=False):
+        super().__init__(address, Handler)
+        self.behaviour = behaviour or Behaviour()
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.transactions = {}
+        self.requests = 0
+        self.connections = 0
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start(behaviour=None):
+    """Run a server on a free port in a background thread; stop it with ``server.shutdown()``."""
+    server = FakePaystackServer(behaviour=behaviour)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -1,8 +1,45 @@
+"""
+Paystack API client.
+
+Every call goes through one PaystackClient per process (``client()``), which
+keeps a pooled requests.Session, so checkout and verification reuse open
+keep-alive connections to api.paystack.co instead of paying a TCP and TLS
+handshake per call. On top of that:
+
+- timeouts are split: a short connect timeout (an unreachable host fails
+  fast) and a longer read timeout (Paystack can be slow to answer);
+- failures are retried a bounded number of times with jittered exponential
+  backoff, but only when that is safe: any call whose connection could not
+  be established, and idempotent calls (verify) after timeouts, 429s and 5xx
+  responses. A POST that reached Paystack is never resent;
+- a circuit breaker counts consecutive failures (connection errors,
+  timeouts, any other transport error, 5xx). Past PAYSTACK_BREAKER_THRESHOLD it opens, and calls raise
+  PaystackUnavailable immediately instead of tying up a worker for the full
+  timeout. After PAYSTACK_BREAKER_RESET seconds one trial call is let
+  through; success closes the breaker again.
+
+PAYSTACK_BASE_URL points the client elsewhere, e.g. at the local fake server
+in shop.payments.fake_paystack (``manage.py fake_paystack``) for offline load
+and failure testing.
+"""
+
+import random
+import threading
+import time
 import requests
+from requests.adapters import HTTPAdapter
 from django.conf import settings
 
-PAYSTACK_INITIALIZE_URL = "https://api.paystack.co/transaction/initialize"
-PAYSTACK_VERIFY_URL = "https://api.paystack.co/transaction/verify/{}"
+DEFAULT_BASE_URL = "https://api.paystack.co"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class PaystackError(Exception):
+    """Paystack answered, but not with a successful result."""
+
+
+class PaystackUnavailable(PaystackError):
+    """Paystack could not be reached or the circuit breaker is open."""
 
 
 def sanitize_phone_number(phone):
@@ -50,6 +87,133 @@ def prepare_customer_metadata(full_name=None, phone_number=None):
     return metadata
 
 
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker, shared by the threads of one process."""
+
+    def __init__(self, threshold=5, reset_timeout=30):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        """Whether a call may go ahead; while open, lets one trial call through every reset_timeout."""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if self.trial_running or time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.trial_running = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.failures, self.opened_at, self.trial_running = 0, None, False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+
+
+class PaystackClient:
+    """Pooled, retrying Paystack API client; see the module docstring."""
+
+    def __init__(self, secret_key, base_url=DEFAULT_BASE_URL, connect_timeout=3.05, read_timeout=10,
+                 retries=2, backoff=0.25, pool_size=20, breaker=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {secret_key}"
+        # Retries are done here rather than by urllib3 so they can respect idempotency and the breaker
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def request(self, method, path, idempotent, **kwargs):
+        """Send a request and return the ``data`` of a successful Paystack response."""
+        for attempt in range(self.retries + 1):
+            if attempt:
+                # Full jitter, so callers that failed together don't retry together
+                time.sleep(random.uniform(0, self.backoff * 2 ** (attempt - 1)))
+            if not self.breaker.allow():
+                raise PaystackUnavailable("Paystack is unavailable (circuit open); try again shortly")
+            try:
+                resp = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+            except requests.ConnectTimeout as e:
+                self.breaker.record_failure()
+                error = PaystackUnavailable(f"Could not connect to Paystack: {e}")
+                continue  # never sent, so safe to resend
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.breaker.record_failure()
+                error = PaystackUnavailable(f"Paystack request failed: {e}")
+                if idempotent:
+                    continue
+                raise error  # it may have reached Paystack
+            except requests.RequestException as e:
+                # Broken bodies, redirect loops...: still a failed call, and it must end a breaker trial
+                self.breaker.record_failure()
+                raise PaystackUnavailable(f"Paystack request failed: {e}") from e
+            if resp.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            if resp.status_code in RETRY_STATUSES and idempotent and attempt < self.retries:
+                continue
+            resp.raise_for_status()
+            data = resp.json()
+            if not data.get("status"):
+                raise PaystackError(f"Paystack {method} {path} failed: {data}")
+            return data.get("data")
+        raise error
+
+    def initialize_transaction(self, payload):
+        return self.request("POST", "/transaction/initialize", idempotent=False, json=payload)
+
+    def verify_transaction(self, reference):
+        return self.request("GET", f"/transaction/verify/{reference}", idempotent=True)
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def client():
+    """The process-wide client, configured from settings on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = PaystackClient(
+                settings.PAYSTACK_SECRET_KEY,
+                base_url=settings.PAYSTACK_BASE_URL,
+                connect_timeout=settings.PAYSTACK_CONNECT_TIMEOUT,
+                read_timeout=settings.PAYSTACK_READ_TIMEOUT,
+                retries=settings.PAYSTACK_RETRIES,
+                breaker=CircuitBreaker(settings.PAYSTACK_BREAKER_THRESHOLD, settings.PAYSTACK_BREAKER_RESET),
+            )
+        return _client
+
+
+def reset_client():
+    """Drop the process-wide client (after changing settings, e.g. in tests)."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.session.close()
+        _client = None
+
+
 def initialize_transaction(amount, email, reference=None, callback_url=None, full_name=None, phone_number=None):
     """
     Initialize a Paystack transaction.
@@ -59,12 +223,10 @@ def initialize_transaction(amount, email, reference=None, callback_url=None, ful
     - callback_url: optional callback URL
     - full_name: customer's full name (optional)
     - phone_number: customer's phone number (optional)
-    Returns parsed JSON from Paystack or raises requests.HTTPError on failure.
+    Returns the ``data`` of Paystack's response. Raises requests.HTTPError for a
+    rejected request, PaystackError if Paystack reports failure and
+    PaystackUnavailable if it can't be reached.
     """
-    headers = {
-        "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-        "Content-Type": "application/json",
-    }
     payload = {
         "email": email,
         # Paystack expects amount in kobo (smallest currency unit)
@@ -80,23 +242,9 @@ def initialize_transaction(amount, email, reference=None, callback_url=None, ful
     if metadata:
         payload["metadata"] = metadata
 
-    resp = requests.post(PAYSTACK_INITIALIZE_URL, json=payload, headers=headers, timeout=15)
-    resp.raise_for_status()
-    data = resp.json()
-    if not data.get("status"):
-        raise Exception(f"Paystack initialize failed: {data}")
-    return data.get("data")
+    return client().initialize_transaction(payload)
 
 
 def verify_transaction(reference):
-    """Verify a Paystack transaction by reference."""
-    headers = {
-        "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-    }
-    url = PAYSTACK_VERIFY_URL.format(reference)
-    resp = requests.get(url, headers=headers, timeout=15)
-    resp.raise_for_status()
-    data = resp.json()
-    if not data.get("status"):
-        raise Exception(f"Paystack verify failed: {data}")
-    return data.get("data")
+    """Verify a Paystack transaction by reference (retried on transient failures)."""
+    return client().verify_transaction(reference)
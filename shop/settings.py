@@ -59,6 +59,7 @@ INSTALLED_APPS = [
     'catalog',
     'orders',
     'policies',
+    'jobs',
     'crispy_forms',
     'crispy_bootstrap4',
     'rest_framework',
@@ -160,6 +161,7 @@ REST_FRAMEWORK = {
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'shop.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -170,7 +172,18 @@ MIDDLEWARE = [
     'shop.middleware.CSPReportOnlyMiddleware',
 ]
 
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    # Hashed, compressed static files plus optimized image variants (core/static_images.py).
+    # Development serves the source files directly, without running collectstatic.
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+        else 'core.static_images.OptimizedStaticFilesStorage',
+    },
+}
+
+# Responses smaller than this go out uncompressed: the saving would be under one packet
+COMPRESSION_MIN_SIZE = 1024
 
 ROOT_URLCONF = 'shop.urls'
 
@@ -178,8 +191,15 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Compiled templates are kept in memory for the life of the process; in
+            # development the autoreloader clears them when a template file changes
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -244,6 +264,39 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Pre-rendered HTML written by `manage.py prerender_policies`
+PRERENDER_ROOT = BASE_DIR / 'prerendered'
+# Absolute URLs in the pre-built sitemaps (`manage.py build_sitemaps`, core.jobs.build_sitemaps)
+SITEMAP_DOMAIN = os.getenv('SITEMAP_DOMAIN', ALLOWED_HOSTS[0])
+SITEMAP_PROTOCOL = os.getenv('SITEMAP_PROTOCOL', 'https')
+# Seconds a catalog change waits before its sitemap rebuild runs, so a burst of edits shares one build
+SITEMAP_BUILD_DELAY = int(os.getenv('SITEMAP_BUILD_DELAY', '300'))
+
+# Cache shared by every worker (shop/cache.py layers a per-process LRU on top).
+# CACHE_URL selects the backend:
+#   redis://host:6379/1      (needs the `redis` package)
+#   memcached://host:11211   (needs `pymemcache`)
+#   file:///var/tmp/shop-cache
+# Without it each process gets its own LocMemCache: fine for development and tests only.
+CACHE_URL = os.getenv('CACHE_URL', '')
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    _cache_backend = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_URL}
+elif CACHE_URL.startswith('memcached://'):
+    _cache_backend = {'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache', 'LOCATION': CACHE_URL.removeprefix('memcached://')}
+elif CACHE_URL.startswith('file://'):
+    _cache_backend = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': CACHE_URL.removeprefix('file://')}
+else:
+    _cache_backend = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+CACHES = {
+    'default': {**_cache_backend, 'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'shop'), 'TIMEOUT': 300},
+    # {% cache %} fragments of the base layout: per process, so a deploy (which
+    # restarts the workers) never serves fragments with old URLs or static names
+    'templates': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'templates',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
 
 LOGIN_REDIRECT_URL = 'core:home'
 LOGOUT_REDIRECT_URL = 'core:home'
@@ -266,6 +319,9 @@ EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = os.getenv('EMAIL_HOST_USER')
 ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', os.getenv('EMAIL_HOST_USER'))  # Defaults to EMAIL_HOST_USER if not set
+# Minutes to collect admin notifications for new, paid and shipped orders into one digest email;
+# 0 sends each one as it happens. Delivered and cancelled orders are always notified immediately.
+ADMIN_DIGEST_INTERVAL = int(os.getenv('ADMIN_DIGEST_INTERVAL', '0'))
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 # EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'  # Use SMTP in production
 
@@ -274,6 +330,13 @@ PAYSTACK_PUBLIC_KEY = os.getenv('PAYSTACK_PUBLIC_KEY')
 PAYSTACK_SECRET_KEY = os.getenv('PAYSTACK_SECRET_KEY')
 PAYSTACK_CALLBACK_URL = os.getenv('PAYSTACK_CALLBACK_URL')
 PAYSTACK_PAYMENT_URL = os.getenv('PAYSTACK_PAYMENT_URL')
+# API client (shop.payments.paystack): point PAYSTACK_BASE_URL at `manage.py fake_paystack` to test offline
+PAYSTACK_BASE_URL = os.getenv('PAYSTACK_BASE_URL', 'https://api.paystack.co')
+PAYSTACK_CONNECT_TIMEOUT = float(os.getenv('PAYSTACK_CONNECT_TIMEOUT', '3.05'))
+PAYSTACK_READ_TIMEOUT = float(os.getenv('PAYSTACK_READ_TIMEOUT', '10'))
+PAYSTACK_RETRIES = int(os.getenv('PAYSTACK_RETRIES', '2'))  # extra attempts, for calls that are safe to repeat
+PAYSTACK_BREAKER_THRESHOLD = int(os.getenv('PAYSTACK_BREAKER_THRESHOLD', '5'))  # consecutive failures that open the circuit
+PAYSTACK_BREAKER_RESET = float(os.getenv('PAYSTACK_BREAKER_RESET', '30'))  # seconds before a trial call
 # Shipping settings
 SHIPPING_FLAT_RATE = 500.00  # Flat rate shipping cost in your currency
 SHIPPING_FREE_THRESHOLD = 10000.00  # Free shipping for orders above this amount
@@ -1,27 +1,65 @@
 # shop/sitemaps.py
+"""
+Sitemaps, pre-built as a sitemap index plus gzip sections.
+
+Products are split into sections by id range (ids 0–9999 go to
+products-0.xml.gz, 10000–19999 to products-1.xml.gz, ...). A product edit
+therefore only changes one section. ``manage.py build_sitemaps`` rewrites
+only the sections whose signature (URL count plus newest ``updated_at``)
+changed since the last build. A product or category change queues a
+build (core.jobs.build_sitemaps, a unique job, delayed by
+SITEMAP_BUILD_DELAY so a burst of edits shares one run); ``--full`` rewrites
+everything. The files are served with long cache headers by
+core.views.sitemap_index / sitemap_section.
+"""
+
+import gzip
+import json
+import math
+import os
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from django.conf import settings
 from django.contrib.sitemaps import Sitemap
+from django.db.models import Count, F, Max
+from django.template.loader import render_to_string
 from django.urls import reverse
 from catalog.models import Product, Category
 
+SECTION_SIZE = 10000  # URLs per section file
+
+
 class ProductSitemap(Sitemap):
     changefreq = "daily"
     priority = 0.9
+    limit = SECTION_SIZE
+
+    def __init__(self, chunk=None):
+        self.chunk = chunk
 
     def items(self):
-        return Product.objects.filter(is_active=True)
+        products = Product.objects.filter(is_active=True).only("id", "slug", "updated_at").order_by("id")
+        if self.chunk is not None:
+            products = products.filter(id__gte=self.chunk * SECTION_SIZE, id__lt=(self.chunk + 1) * SECTION_SIZE)
+        return products
 
     def lastmod(self, obj):
-        return obj.created_at  # assuming you track updates
+        return obj.updated_at
 
 class CategorySitemap(Sitemap):
     changefreq = "weekly"
     priority = 0.7
+    limit = SECTION_SIZE
 
     def items(self):
-        return Category.objects.all()
+        return Category.objects.order_by("id")
 
     def location(self, obj):
-        return reverse("catalog:detail", args=[obj.slug])
+        return reverse("catalog:category_list_by_category", args=[obj.slug])
+
+    def lastmod(self, obj):
+        return obj.updated_at
 
 class StaticViewSitemap(Sitemap):
     changefreq = "monthly"
@@ -30,13 +68,97 @@ class StaticViewSitemap(Sitemap):
     def items(self):
         return [
             "core:home",
-            "suppliers:terms",
-            "suppliers:privacy",
-            "suppliers:shipping_returns",
-            "suppliers:faq",
-            "suppliers:about_us",
-            "accounts:contact",  
+            "policies:about",
+            "policies:terms",
+            "policies:privacy",
+            "policies:faqs",
+            "accounts:contact",
         ]
 
     def location(self, item):
-        return reverse(item)
\ No newline at end of file
+        return reverse(item)
+
+
+def output_dir():
+    return Path(settings.PRERENDER_ROOT) / "sitemaps"
+
+
+def section_signatures():
+    """``{section name: (url count, newest lastmod)}`` for every section, from one grouped query per model."""
+    signatures = {}
+    chunks = (
+        Product.objects.filter(is_active=True)
+        .annotate(chunk=F("id") / SECTION_SIZE)
+        .values_list("chunk")
+        .annotate(n=Count("id"), last=Max("updated_at"))
+        .order_by("chunk")
+    )
+    for chunk, n, last in chunks:
+        signatures[f"products-{chunk}"] = (n, last.isoformat())
+    categories = Category.objects.aggregate(n=Count("id"), last=Max("updated_at"))
+    for page in range(1, math.ceil(categories["n"] / SECTION_SIZE) + 1):
+        signatures[f"categories-{page}"] = (categories["n"], categories["last"].isoformat())
+    signatures["static-1"] = (len(StaticViewSitemap().items()), None)
+    return signatures
+
+
+def _sitemap_for(name):
+    kind, number = name.rsplit("-", 1)
+    if kind == "products":
+        return ProductSitemap(chunk=int(number)), 1
+    if kind == "categories":
+        return CategorySitemap(), int(number)
+    return StaticViewSitemap(), 1
+
+
+def _write(path, data):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)  # readers never see a half-written file
+
+
+def build(full=False, domain=None, protocol=None):
+    """Rewrite changed sections and the index; returns ``(rewritten, removed)`` section names."""
+    domain = domain or settings.SITEMAP_DOMAIN
+    protocol = protocol or settings.SITEMAP_PROTOCOL
+    site = SimpleNamespace(domain=domain, name=domain)
+    directory = output_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest_path = directory / "manifest.json"
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        manifest = {}
+    if manifest.get("domain") != f"{protocol}://{domain}":
+        full = True
+    previous = manifest.get("sections", {})
+
+    signatures = section_signatures()
+    rewritten = []
+    for name, signature in signatures.items():
+        signature = list(signature)
+        if not full and previous.get(name) == signature and (directory / f"{name}.xml.gz").exists():
+            continue
+        sitemap, page = _sitemap_for(name)
+        xml = render_to_string("sitemap.xml", {"urlset": sitemap.get_urls(page=page, site=site, protocol=protocol)})
+        _write(directory / f"{name}.xml.gz", gzip.compress(xml.encode(), mtime=0))
+        rewritten.append(name)
+
+    removed = sorted(set(previous) - set(signatures))
+    for name in removed:
+        (directory / f"{name}.xml.gz").unlink(missing_ok=True)
+
+    sections = [
+        SimpleNamespace(
+            location=f"{protocol}://{domain}{reverse('sitemap_section', args=[f'{name}.xml.gz'])}",
+            last_mod=datetime.fromisoformat(signature[1]) if signature[1] else None,
+        )
+        for name, signature in signatures.items()
+    ]
+    _write(directory / "sitemap.xml", render_to_string("sitemap_index.xml", {"sitemaps": sections}).encode())
+    manifest = {
+        "domain": f"{protocol}://{domain}",
+        "sections": {name: list(signature) for name, signature in signatures.items()},
+    }
+    _write(manifest_path, json.dumps(manifest).encode())
+    return rewritten, removed
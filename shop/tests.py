@@ -0,0 +1,329 @@
+import io
+import gzip
+import zlib
+import shutil
+import tempfile
+import time
+import requests
+from unittest import mock
+from decimal import Decimal
+from django.test import TestCase, RequestFactory, override_settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core import mail
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+from catalog.models import Category, Product
+from core.jobs import build_sitemaps, send_email
+from jobs.models import Job
+from jobs.queue import run_batch
+from shop import cache as tiered
+from shop import sitemaps
+from shop import compression
+from shop import mail as shared_mail
+from shop.middleware import CompressionMiddleware
+from shop.payments import fake_paystack
+from shop.payments.paystack import CircuitBreaker, PaystackClient, PaystackUnavailable
+
+
+class CompressionTest(TestCase):
+    """Test Accept-Encoding negotiation and compression of dynamic responses."""
+
+    def setUp(self):
+        cache.clear()
+        compression.reset_report()
+
+    def test_negotiate(self):
+        self.assertEqual(compression.negotiate("gzip, deflate"), "gzip")
+        self.assertEqual(compression.negotiate("gzip;q=0, deflate"), None)
+        self.assertEqual(compression.negotiate("identity"), None)
+        self.assertEqual(compression.negotiate(""), None)
+        self.assertIn(compression.negotiate("*"), compression.supported_encodings())
+        if compression.brotli:
+            self.assertEqual(compression.negotiate("gzip, br"), "br")
+            self.assertEqual(compression.negotiate("gzip;q=1, br;q=0.5"), "gzip")
+
+    def test_page_is_gzipped_and_counted(self):
+        plain = self.client.get(reverse("core:home"))
+        response = self.client.get(reverse("core:home"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        html = gzip.decompress(response.content)
+        self.assertEqual(len(html), len(plain.content))  # same page, different masked CSRF token
+        self.assertLess(len(response.content), len(html) / 3)
+
+        totals = compression.report()["core:home"]
+        self.assertEqual(totals["responses"], 1)
+        self.assertEqual(totals["original"], len(html))
+        self.assertEqual(totals["sent"], len(response.content))
+        out = io.StringIO()
+        call_command("compression_report", stdout=out)
+        self.assertIn("core:home", out.getvalue())
+
+    def test_html_gets_padded_gzip(self):
+        page = "<p>csrf token and reflected input</p>" * 100
+        middleware = CompressionMiddleware(lambda request: HttpResponse(page))
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="br, gzip")
+        responses = [middleware(request) for _ in range(20)]
+        for response in responses:
+            self.assertEqual(response["Content-Encoding"], "gzip")  # never Brotli, which can't be padded
+            self.assertTrue(response.content[3] & gzip.FNAME)
+            self.assertEqual(gzip.decompress(response.content), page.encode())
+        self.assertGreater(len({len(response.content) for response in responses}), 1)
+
+        json = CompressionMiddleware(lambda request: JsonResponse({"items": list(range(1000))}))(request)
+        self.assertEqual(json["Content-Encoding"], "br" if compression.brotli else "gzip")
+        if not compression.brotli:
+            self.assertFalse(json.content[3] & gzip.FNAME)
+
+    def test_small_and_binary_responses_untouched(self):
+        middleware = CompressionMiddleware(lambda request: HttpResponse("x" * 100))
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertFalse(middleware(request).has_header("Content-Encoding"))
+        middleware = CompressionMiddleware(lambda request: HttpResponse(b"x" * 5000, content_type="application/gzip"))
+        self.assertFalse(middleware(request).has_header("Content-Encoding"))
+
+    def test_streaming_chunks_decode_as_they_arrive(self):
+        chunks = [b"<p>first</p>" * 10, b"<p>second</p>" * 10]
+        middleware = CompressionMiddleware(lambda request: StreamingHttpResponse(iter(chunks)))
+        response = middleware(RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip"))
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        decoder = zlib.decompressobj(31)
+        stream = iter(response.streaming_content)
+        self.assertEqual(decoder.decompress(next(stream)), chunks[0])
+        self.assertEqual(b"".join(decoder.decompress(data) for data in stream), chunks[1])
+        self.assertEqual(compression.report()["-"]["original"], sum(map(len, chunks)))
+
+
+class PaystackClientTest(TestCase):
+    """The pooled Paystack client against the local fake server."""
+
+    def setUp(self):
+        self.server = fake_paystack.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.client = PaystackClient(
+            "sk_test", base_url=self.server.url, read_timeout=0.5, backoff=0.01,
+            breaker=CircuitBreaker(threshold=3, reset_timeout=60),
+        )
+        self.addCleanup(self.client.session.close)
+
+    def initialize(self, reference="order_1"):
+        return self.client.initialize_transaction({"email": "ada@example.com", "amount": 250000, "reference": reference})
+
+    def test_initialize_and_verify_share_a_connection(self):
+        data = self.initialize()
+        self.assertIn("/checkout/order_1", data["authorization_url"])
+        for _ in range(3):
+            self.assertEqual(self.client.verify_transaction("order_1")["status"], "success")
+        self.assertEqual((self.server.requests, self.server.connections), (4, 1))
+
+    def test_verify_retries_server_errors(self):
+        self.initialize()
+        self.server.behaviour.failure_rate = 1
+        with self.assertRaises(requests.HTTPError):
+            self.client.verify_transaction("order_1")
+        self.assertEqual(self.server.requests, 1 + 3)  # initialize, then verify plus two retries
+
+    def test_initialize_is_not_resent_after_a_timeout(self):
+        self.server.behaviour.hang_rate, self.server.behaviour.hang = 1, 1
+        with self.assertRaises(PaystackUnavailable):
+            self.initialize()
+        self.assertEqual(self.server.requests, 1)
+
+    def test_rejected_request_is_not_retried(self):
+        with self.assertRaises(requests.HTTPError):
+            self.client.verify_transaction("unknown")
+        self.assertEqual(self.server.requests, 1)
+        self.assertFalse(self.client.breaker.is_open)  # a 4xx says nothing about Paystack's health
+
+    def test_breaker_opens_and_fails_fast(self):
+        self.server.behaviour.failure_rate = 1
+        with self.assertRaises(requests.HTTPError):
+            self.client.verify_transaction("order_1")  # three failed attempts open the breaker
+        self.assertTrue(self.client.breaker.is_open)
+        requests_before = self.server.requests
+        with self.assertRaisesMessage(PaystackUnavailable, "circuit open"):
+            self.initialize()
+        self.assertEqual(self.server.requests, requests_before)
+
+    def test_breaker_lets_a_trial_call_through_and_closes(self):
+        self.client.breaker.reset_timeout = 0.05
+        self.server.behaviour.failure_rate = 1
+        with self.assertRaises(requests.HTTPError):
+            self.client.verify_transaction("order_1")
+        time.sleep(0.06)
+        self.server.behaviour.failure_rate = 0
+        self.initialize("order_2")
+        self.assertFalse(self.client.breaker.is_open)
+
+    def test_any_transport_error_ends_a_trial(self):
+        self.client.breaker.reset_timeout = 0.05
+        self.server.behaviour.failure_rate = 1
+        with self.assertRaises(requests.HTTPError):
+            self.client.verify_transaction("order_1")
+        time.sleep(0.06)
+        with mock.patch.object(self.client.session, "request", side_effect=requests.exceptions.ChunkedEncodingError):
+            with self.assertRaises(PaystackUnavailable):
+                self.initialize("order_2")
+        self.assertFalse(self.client.breaker.trial_running)
+        time.sleep(0.06)
+        self.server.behaviour.failure_rate = 0
+        self.initialize("order_3")  # the next trial is let through
+        self.assertFalse(self.client.breaker.is_open)
+
+
+class TieredCacheTest(TestCase):
+    """Test the local LRU + shared cache tiers and generation-based invalidation."""
+
+    def setUp(self):
+        cache.clear()
+        tiered.local.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return ["value", self.calls]
+
+    def test_local_then_shared_tier(self):
+        self.assertEqual(tiered.catalog_get_or_set("thing", self.compute), ["value", 1])
+        self.assertEqual(tiered.catalog_get_or_set("thing", self.compute), ["value", 1])
+        tiered.local.clear()  # another worker: empty LRU, same shared cache
+        self.assertEqual(tiered.catalog_get_or_set("thing", self.compute), ["value", 1])
+        self.assertEqual(self.calls, 1)
+
+    def test_model_saves_bump_generations(self):
+        tiered.catalog_get_or_set("thing", self.compute)
+        tiered.orders_get_or_set("thing", self.compute)
+        Category.objects.create(name="Phones", slug="phones")
+        self.assertEqual(tiered.catalog_get_or_set("thing", self.compute), ["value", 3])
+        self.assertEqual(tiered.orders_get_or_set("thing", self.compute), ["value", 2])
+        tiered.bump("order")
+        self.assertEqual(tiered.orders_get_or_set("thing", self.compute), ["value", 4])
+
+    def test_generations_survive_a_flushed_cache(self):
+        before = tiered.generation("product")
+        cache.clear()
+        self.assertNotEqual(tiered.generation("product"), before)
+
+    def test_lru_eviction_and_expiry(self):
+        lru = tiered.LRU(2)
+        lru.set("a", 1)
+        lru.set("b", 2)
+        lru.get("a")
+        lru.set("c", 3)
+        self.assertIsNone(lru.get("b"))
+        self.assertEqual(lru.get("a"), 1)
+        lru.set("d", 4, timeout=-1)
+        self.assertIsNone(lru.get("d"))
+
+
+class SharedMailConnectionTest(TestCase):
+    """Messages sent within shop.mail.batch() share one connection."""
+
+    def message(self, n):
+        return EmailMessage(f"Message {n}", "Body", "shop@example.com", ["ada@example.com"])
+
+    def test_batch_reuses_one_connection(self):
+        with mock.patch("shop.mail.get_connection", wraps=get_connection) as opened:
+            with shared_mail.batch():
+                for n in range(3):
+                    shared_mail.send(self.message(n))
+            self.assertEqual(opened.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIsNone(shared_mail.connection())
+
+    def test_nothing_opened_for_a_batch_without_mail(self):
+        with mock.patch("shop.mail.get_connection") as opened:
+            with shared_mail.batch():
+                pass
+        opened.assert_not_called()
+
+    def test_failed_send_drops_the_connection(self):
+        broken = mock.Mock(**{"send_messages.side_effect": OSError("connection reset")})
+        with mock.patch("shop.mail.get_connection", side_effect=[broken, get_connection()]):
+            with shared_mail.batch():
+                with self.assertRaises(OSError):
+                    shared_mail.send(self.message(1))
+                broken.close.assert_called_once()
+                shared_mail.send(self.message(2))
+        self.assertEqual([m.subject for m in mail.outbox], ["Message 2"])
+
+    def test_worker_batch_shares_a_connection(self):
+        for n in range(3):
+            send_email.enqueue(f"Message {n}", "Body", "shop@example.com", ["ada@example.com"])
+        with mock.patch("shop.mail.get_connection", wraps=get_connection) as opened:
+            self.assertEqual(run_batch(), (3, 3))
+        self.assertEqual(opened.call_count, 1)
+        self.assertEqual(len(mail.outbox), 3)
+
+
+@override_settings(SITEMAP_DOMAIN="shop.example.com", SITEMAP_PROTOCOL="https")
+class SitemapTest(TestCase):
+    """Test the pre-built, incrementally regenerated sitemap."""
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        override = override_settings(PRERENDER_ROOT=root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.category = Category.objects.create(name="Phones", slug="phones")
+        self.product = Product.objects.create(category=self.category, title="Galaxy", price=Decimal("1.00"))
+
+    def section(self, name):
+        return gzip.decompress((sitemaps.output_dir() / f"{name}.xml.gz").read_bytes()).decode()
+
+    def test_build_and_serve(self):
+        rewritten, _ = sitemaps.build()
+        self.assertEqual(sorted(rewritten), ["categories-1", "products-0", "static-1"])
+        self.assertIn("https://shop.example.com/catalog/galaxy/", self.section("products-0"))
+        self.assertIn("https://shop.example.com/catalog/category/phones/", self.section("categories-1"))
+        self.assertIn("/policies/privacy/", self.section("static-1"))
+
+        response = self.client.get("/sitemap.xml")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("max-age=86400", response["Cache-Control"])
+        index = b"".join(response.streaming_content).decode()
+        self.assertIn("https://shop.example.com/sitemaps/products-0.xml.gz", index)
+
+        response = self.client.get(reverse("sitemap_section", args=["products-0.xml.gz"]))
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertEqual(self.client.get(reverse("sitemap_section", args=["manifest.json"])).status_code, 404)
+
+    def test_incremental_rebuild(self):
+        sitemaps.build()
+        self.assertEqual(sitemaps.build(), ([], []))
+
+        far = Product.objects.create(category=self.category, title="Pixel", price=Decimal("1.00"))
+        Product.objects.filter(pk=far.pk).update(id=sitemaps.SECTION_SIZE + 1)
+        self.assertEqual(sitemaps.build(), (["products-1"], []))
+
+        self.product.title = "Galaxy S24"
+        self.product.save()
+        self.assertEqual(sitemaps.build()[0], ["products-0"])
+
+        Product.objects.filter(id=sitemaps.SECTION_SIZE + 1).delete()
+        self.assertEqual(sitemaps.build(), ([], ["products-1"]))
+        self.assertFalse((sitemaps.output_dir() / "products-1.xml.gz").exists())
+
+    def test_catalog_changes_queue_one_build(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.price = Decimal("2.00")
+            self.product.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name="Bags", slug="bags")
+        job = Job.objects.get(name=build_sitemaps.job_name)
+        self.assertGreater(job.run_at, timezone.now())  # waits for more changes to join it
+        Job.objects.update(run_at=timezone.now())
+        run_batch()
+        self.assertIn("/catalog/category/bags/", self.section("categories-1"))
+        self.assertFalse(Job.objects.filter(name=build_sitemaps.job_name).exists())
+
+    def test_dynamic_fallback_before_first_build(self):
+        response = self.client.get("/sitemap.xml")
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "/catalog/galaxy/")
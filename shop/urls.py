@@ -20,21 +20,12 @@ from django.conf import settings
 from django.conf.urls.static import static
 from django.shortcuts import render
 from django.conf.urls import handler404, handler500, handler403
-from django.contrib.staticfiles.storage import staticfiles_storage
-from django.views.generic.base import RedirectView
-from django.contrib.sitemaps.views import sitemap
-from shop.sitemaps import ProductSitemap, CategorySitemap, StaticViewSitemap
+from core.views import sitemap_index, sitemap_section, favicon
 
 admin.site.site_header = "JagofTrade Administration"
 admin.site.site_title = "JagofTrade Portal"
 admin.site.index_title = "Welcome to JagofTrade Admin"
 
-sitemaps_dict = {
-    "products": ProductSitemap,
-    "categories": CategorySitemap,
-    "static": StaticViewSitemap,
-}
-
 def custom_permission_denied(request, exception):
     return render(request, "errors/403.html", status=403)
 
@@ -56,8 +47,10 @@ urlpatterns = [
     path('policies/', include('policies.urls', namespace="policies")),
     path('accounts/', include('accounts.urls', namespace="accounts")),
     path('accounts/', include('allauth.urls')),  # Django-allauth social auth URLs
-    path('favicon.ico/', RedirectView.as_view(url=staticfiles_storage.url('img/jagoftrade.png'))),
-    path("sitemap.xml/", sitemap, {"sitemaps": sitemaps_dict}, name="django_sitemap"),
+    path('favicon.ico', favicon),
+    path('favicon.ico/', favicon),
+    path("sitemap.xml", sitemap_index, name="django_sitemap"),
+    path("sitemaps/<str:filename>", sitemap_section, name="sitemap_section"),
 
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 if settings.DEBUG: